@@ -27,6 +27,7 @@ import argparse
 import cProfile
 
 from swarm import World
+from swarm.world import engine_kwargs
 from swarm import visualize
 from swarm.exceptions import SimulationException
 
@@ -47,7 +48,7 @@ def visual(args):
     Run the visual/PyGame version of the simulation
     """
     start = time.time()
-    world = World(ally_conf_path=args.conf_path)
+    world = World(ally_conf_path=args.conf_path, **engine_kwargs(args.engine))
     size  = args.screen_size
     fps   = args.fps
     visualize(world, [size, size], fps)
@@ -64,10 +65,10 @@ def simulate(args):
     Run a headless simulation with configuration file
     """
     start = time.time()
-    world = World(ally_conf_path=args.conf_path)
+    world = World(ally_conf_path=args.conf_path, **engine_kwargs(args.engine))
 
     print "Starting headless simulation, use CTRL+C to quit."
-    while world.time < world.iterations:
+    while not world.finished:
         try:
             world.update()
             if world.time % 1000 == 0:
@@ -81,7 +82,13 @@ def simulate(args):
 
     output = []
     output.append("Ran %i time steps in %0.3f seconds" % (world.time, delta))
+    if world.final_time is not None:
+        output.append("Outcome was final after %i time steps" % world.final_time)
     output.append("Agents successfully collected %i resources" % world.ally_home.stash)
+    for name, stats in sorted(world.index_stats.items()):
+        output.append("Spatial index %s: %i builds, %i pair and %i point queries in %0.3f seconds" % (
+            name, stats.builds, stats.pairs, stats.queries, stats.time
+        ))
     return "\n".join(output)
 
 def profile(args):
@@ -90,7 +97,7 @@ def profile(args):
     """
 
     def run():
-        world = World(ally_conf_path=args.conf_path)
+        world = World(ally_conf_path=args.conf_path, **engine_kwargs(args.engine))
         while world.time < args.iterations:
             try:
                 world.update()
@@ -107,12 +114,12 @@ def head2head(args):
     each team in the simulation at every time step.
     """
     start = time.time()
-    world = World(ally_conf_path=args.conf_path, maximum_time=args.iterations)
+    world = World(ally_conf_path=args.conf_path, maximum_time=args.iterations, **engine_kwargs(args.engine))
 
     print "Starting headless simulation, use CTRL+C to quit."
     writer = csv.writer(args.stream, delimiter='\t')
     writer.writerow(('black', 'red'))
-    while world.time < world.iterations:
+    while not world.finished:
         try:
             world.update()
             writer.writerow((str(world.ally_home.stash), str(world.enemy_home.stash)))
@@ -122,11 +129,19 @@ def head2head(args):
             print "Quitting Early!"
             break
 
+    # Once the outcome is final the stashes can't change, so the remaining
+    # time steps are written out without being simulated.
+    if world.final_time is not None:
+        for step in xrange(world.time, world.iterations):
+            writer.writerow((str(world.ally_home.stash), str(world.enemy_home.stash)))
+
     finit = time.time()
     delta = finit - start
 
     output = []
     output.append("Ran %i time steps in %0.3f seconds" % (world.time, delta))
+    if world.final_time is not None:
+        output.append("Outcome was final after %i time steps" % world.final_time)
     output.append("Agents successfully collected %i resources" % world.ally_home.stash)
     return "\n".join(output)
 
@@ -146,11 +161,13 @@ def main(*argv):
                                default=720, help='size of window to run in.')
     visual_parser.add_argument('-f', '--fps', type=int, default=30, help='frames per second to run simulation in.')
     visual_parser.add_argument('-c', '--conf-path', type=str, dest='conf_path', default='./conf/params.yaml', help='path to ally configuration file.')
+    visual_parser.add_argument('-e', '--engine', choices=('reference', 'array'), default=None, help='simulation engine to run the world with.')
     visual_parser.set_defaults(func=visual)
 
     # parser headless simulation
     headless_parser = subparsers.add_parser('simulate', help='Run a headless simulation with the configuration file')
     headless_parser.add_argument('-c', '--conf-path', type=str, dest='conf_path', default='./conf/params.yaml', help='path to ally configuration file.')
+    headless_parser.add_argument('-e', '--engine', choices=('reference', 'array'), default=None, help='simulation engine to run the world with.')
     headless_parser.set_defaults(func=simulate)
 
     # parser for profiling
@@ -162,11 +179,13 @@ def main(*argv):
     profile_parser.add_argument('-i', '--iterations', metavar='STEPS', type=int, default=100,
                                 help='Number of iterations to profile')
     profile_parser.add_argument('-c', '--conf-path', type=str, dest='conf_path', default='./conf/params.yaml', help='path to ally configuration file.')
+    profile_parser.add_argument('-e', '--engine', choices=('reference', 'array'), default=None, help='simulation engine to run the world with.')
     profile_parser.set_defaults(func=profile)
 
     # head2head headless simulation
     head2head_parser = subparsers.add_parser('head2head', help='Run a headless simulation with the configuration file')
     head2head_parser.add_argument('-c', '--conf-path', type=str, dest='conf_path', default='./conf/params.yaml', help='path to ally configuration file.')
+    head2head_parser.add_argument('-e', '--engine', choices=('reference', 'array'), default=None, help='simulation engine to run the world with.')
     head2head_parser.add_argument('-o', '--outpath', dest='stream', type=argparse.FileType('w'), default=sys.stdout, help='Write head to head results out.')
     head2head_parser.add_argument('-i', '--iterations', metavar='STEPS', type=int, default=10000,
                                     help='Number of iterations to profile')
@@ -21,22 +21,27 @@ import csv
 import time
 
 from swarm import World
+from swarm.world import engine_kwargs
+from swarm.pool import worlds as pool
+from swarm.engine import EnsembleEngine
 from evolve.celery import app
-from swarm.exceptions import SimulationException
+from swarm.exceptions import SimulationException, ImproperlyConfigured
 
 ##########################################################################
 ## Tasks
 ##########################################################################
 
 @app.task
-def runsim(configuration):
+def runsim(configuration, engine=None):
     """
     Run a simulation for the given number of timesteps and return fitness.
+    The engine defaults to the one in the world parameters; worlds are
+    reused from the pool of the process.
     """
     start = time.time()
-    world = World(ally_conf_path=configuration)
+    world = pool.acquire(configuration, **engine_kwargs(engine))
 
-    for step in xrange(world.iterations):
+    while not world.finished:
         try:
             world.update()
         except Exception as e:
@@ -45,23 +50,54 @@ def runsim(configuration):
     finit = time.time()
     delta = finit - start
 
-    return {
+    results = {
         'fitness':     world.ally_home.stash,
         'run_time':    delta,
         'iterations':  world.time,
+        'final_time':  world.final_time,
         'home_stash':  world.ally_home.stash,
         'enemy_stash': world.enemy_home.stash,
     }
 
+    pool.release(world)
+    return results
+
 @app.task
-def head2head(configuration, outpath, iterations=10000):
+def runensemble(configurations, seeds=None):
+    """
+    Run one simulation per configuration in lock-step with the ensemble
+    engine and return a list of their fitness results, in the same order
+    and shape as runsim (the run time is shared among the simulations).
+    Each world can be given a seed, e.g. to evaluate one configuration
+    under many seeds reproducibly.
+    """
+    if seeds is None:
+        seeds = [None] * len(configurations)
+    if len(seeds) != len(configurations):
+        raise ImproperlyConfigured("An ensemble requires one seed per configuration")
+
+    start  = time.time()
+    worlds = [
+        World(ally_conf_path=configuration, engine='reference', seed=seed)
+        for configuration, seed in zip(configurations, seeds)
+    ]
+    ensemble = EnsembleEngine(worlds)
+
+    for step in xrange(ensemble.iterations):
+        if ensemble.finished: break
+        ensemble.step()
+
+    return ensemble.results(time.time() - start)
+
+@app.task
+def head2head(configuration, outpath, iterations=10000, engine=None):
     """
     Run a head to head simulation using the configuration for the black
     team against the red team. Write detailed stats out to the outpath.
     Can also specificy the number of iterations to run the simulation for.
     """
     start = time.time()
-    world = World(ally_conf_path=configuration, maximum_time=iterations)
+    world = pool.acquire(configuration, maximum_time=iterations, **engine_kwargs(engine))
 
     with open(outpath, 'w') as outfile:
         writer = csv.writer(outfile)
@@ -69,20 +105,29 @@ def head2head(configuration, outpath, iterations=10000):
         writer.writerow(header)
         writer.writerow(world.status())
 
-        for step in xrange(world.iterations):
+        while not world.finished:
             try:
                 world.update()
                 writer.writerow(world.status())
             except Exception as e:
                 break
 
+        # The stashes can't change once the outcome is final
+        if world.final_time is not None:
+            for step in xrange(world.time, world.iterations):
+                writer.writerow(world.status())
+
     finit = time.time()
     delta = finit - start
 
-    return {
+    results = {
         'fitness':     world.ally_home.stash,
         'run_time':    delta,
         'iterations':  world.time,
+        'final_time':  world.final_time,
         'home_stash':  world.ally_home.stash,
         'enemy_stash': world.enemy_home.stash,
     }
+
+    pool.release(world)
+    return results
@@ -19,10 +19,9 @@ Helper functions
 
 import os
 import json
-import yaml
 import random
 
-from swarm.params import AllyParameters
+from swarm.params import AllyParameters, load_yaml
 
 ##########################################################################
 ## File system helpers
@@ -50,8 +49,7 @@ def parse_genotype(path):
     """
     Extracts the genotype out of a configuration yaml file.
     """
-    with open(path, 'r') as conf:
-        return yaml.load(conf)
+    return load_yaml(path)
 
 def export_genotype(genotype, path=None):
     """
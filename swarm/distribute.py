@@ -24,6 +24,8 @@ supported distributions currently:
 
 import numpy as np
 
+from vectors import VectorArray
+
 ##########################################################################
 ## Linear helper functions
 ##########################################################################
@@ -69,24 +71,23 @@ def linear_graph(num=50, l=100, m=1, b=0):
 ## Circular helper functions
 ##########################################################################
 
-def circular_distribute(num=50, r=100, center=(0,0)):
+def circular_distribute(num=50, r=100, center=(0,0), random=np.random):
     """
     Distrubte num points randomly around a center point with a particular
     radius. Used to deploy particles around their home position.
     """
-    theta = np.linspace(0, 2*np.pi, num)
-    rands = np.random.rand((num))
-    xvals = r * rands * np.cos(theta) + center[0]
-    yvals = r * rands * np.sin(theta) + center[1]
-    return xvals, yvals
+    theta  = np.linspace(0, 2*np.pi, num)
+    rands  = random.rand((num))
+    points = VectorArray.polar(r * rands, theta, center)
+    return points.x, points.y
 
 def circular_line(num=50, r=100, center=(0,0)):
     """
     A helper function for drawing a boundary line around the center with
     the given radius. Used to visualize how particles are being deployed.
     """
-    theta = np.linspace(0, 2*np.pi, num)
-    return r * np.cos(theta) + center[0], r * np.sin(theta) + center[1]
+    points = VectorArray.polar(r, np.linspace(0, 2*np.pi, num), center)
+    return points.x, points.y
 
 def circular_graph(num=50, r=100, center=(0,0)):
     """
@@ -0,0 +1,21 @@
+# swarm.engine
+# Package for the array based simulation engines of the world.
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 09:14:02 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: __init__.py [] benjamin@bengfort.com $
+
+"""
+Package for the array based simulation engines of the world.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+from base import *
+from ensemble import *
@@ -0,0 +1,707 @@
+# swarm.engine.base
+# A struct-of-arrays engine that steps every agent of a world at once
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 09:14:02 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: base.py [] benjamin@bengfort.com $
+
+"""
+A struct-of-arrays engine that steps every agent of a world at once.
+
+Rather than keeping a Particle object (and a handful of Vectors) per agent,
+the ArrayEngine stores the position, velocity, state, team, target, loaded
+flag and stun cooldown of every agent in contiguous NumPy arrays and
+advances them all with one double-buffered step per tick. The static
+resources (the homes and the deposits) are held in their own arrays.
+
+The World exposes the engine through thin read-only views so that the
+visualization and the tests can still iterate over `world.agents`.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import numpy as np
+
+from swarm.vectors import Vector, ceil_supplement
+from swarm.params import ParameterTable, FLOCK_COMPONENTS, TARGET_COMPONENTS
+from swarm.params import STUN_RADIUS, MINERAL_RADIUS
+from swarm.exceptions import *
+from swarm.particle import *
+from swarm.spatial import PairTable, StaticIndex, unit, minimal_image, half_size
+
+import fsm
+import kernels
+
+##########################################################################
+## Module Constants
+##########################################################################
+
+## Integer codes for the particle states (index into STATES)
+STATES         = (SPREADING, SEEKING, CARAVAN, GUARDING, STUNNED)
+SPREADING_CODE = STATES.index(SPREADING)
+SEEKING_CODE   = STATES.index(SEEKING)
+CARAVAN_CODE   = STATES.index(CARAVAN)
+GUARDING_CODE  = STATES.index(GUARDING)
+STUNNED_CODE   = STATES.index(STUNNED)
+
+## Every velocity component (see swarm.params)
+COMPONENTS = FLOCK_COMPONENTS + TARGET_COMPONENTS
+
+## Use a cell list to find the candidate pairs of worlds with more agents
+GRID_THRESHOLD = 200
+
+##########################################################################
+## Read-only views onto the engine
+##########################################################################
+
+class AgentView(object):
+    """
+    A thin read-only view of a single agent stored in the ArrayEngine,
+    providing the attributes of a Particle that the visualization and the
+    tests rely on.
+    """
+
+    __slots__ = ('engine', 'index', 'idx')
+
+    def __init__(self, engine, index, identifier=None):
+        self.engine = engine
+        self.index  = index
+        self.idx    = identifier
+
+    def __repr__(self):
+        identifier = self.idx or "anonymous"
+        return "<view Particle %s of %r>" % (identifier, self.world)
+
+    @property
+    def world(self):
+        return self.engine.world
+
+    @property
+    def pos(self):
+        return Vector.arr(self.engine.pos[self.index].copy())
+
+    @property
+    def vel(self):
+        return Vector.arr(self.engine.vel[self.index].copy())
+
+    @property
+    def state(self):
+        return STATES[self.engine.state[self.index]]
+
+    @property
+    def team(self):
+        return self.engine.teams[self.engine.team[self.index]]
+
+    @property
+    def enemy(self):
+        code = self.engine.enemy[self.index]
+        return self.engine.teams[code] if code >= 0 else None
+
+    @property
+    def target(self):
+        return self.engine.resource(self.engine.target[self.index])
+
+    @property
+    def home(self):
+        return self.engine.resource(self.engine.home[self.index])
+
+    @property
+    def memory(self):
+        base = self.engine.rbase[self.index]
+        return [self.engine.resource(base + ridx) for ridx in fsm.ordered(self.engine.memory[self.index])]
+
+    @property
+    def loaded(self):
+        return bool(self.engine.loaded[self.index])
+
+    @property
+    def stun_cooldown(self):
+        return self.engine.stun_cooldown[self.index]
+
+class ResourceView(object):
+    """
+    A thin view of a resource (a home or a deposit) stored in the
+    ArrayEngine. Only the stash can be modified, via mine and drop.
+    """
+
+    __slots__ = ('engine', 'index', 'idx')
+
+    team   = 'mineral'
+    state  = SPREADING
+    loaded = False
+    target = None
+
+    def __init__(self, engine, index, identifier=None):
+        self.engine = engine
+        self.index  = index
+        self.idx    = identifier
+
+    def __repr__(self):
+        identifier = self.idx or "anonymous"
+        return "<view ResourceParticle %s of %r>" % (identifier, self.world)
+
+    @property
+    def world(self):
+        return self.engine.world
+
+    @property
+    def pos(self):
+        return Vector.arr(self.engine.rpos[self.index].copy())
+
+    @property
+    def vel(self):
+        return Vector.arrp(0, 1)
+
+    @property
+    def stash(self):
+        return int(self.engine.stash[self.index])
+
+    def mine(self):
+        """
+        Decrements the stash by one and returns True if there is anything
+        left, otherwise returns False if this thing is unminable.
+        """
+        if self.engine.stash[self.index] > 0:
+            self.engine.stash[self.index] -= 1
+            return True
+        return False
+
+    def drop(self):
+        """
+        Increments the stash by one, always returns true.
+        """
+        self.engine.stash[self.index] += 1
+        return True
+
+    def __nonzero__(self):
+        return self.stash > 0
+
+##########################################################################
+## Array Engine
+##########################################################################
+
+class ArrayEngine(object):
+    """
+    Stores the agents of a world as a struct of arrays and advances all of
+    them with a single vectorized, double-buffered step per tick.
+
+    The engine is loaded from the particles that the world initialized,
+    so both engines start from identical initial conditions. Particles
+    with the same params object share a compiled set of behaviors; the
+    enemy of a team follows the same convention as Particle.
+
+    The behaviors are compiled into (param set, state, component) tables
+    of the weight, radius and vision cosine of every velocity component, so
+    that each component is computed for every agent in a single call to
+    its kernel no matter which state the agents are in.
+    """
+
+    def __init__(self, world, particles):
+        self.world = world
+        self.vmax  = float(world.maximum_velocity)
+        particles  = list(particles)
+        agents, resources = self.load([particles], world.size)
+
+        # The resources never move so they are only indexed once
+        self.statics = StaticIndex(self.rpos, world.size, self.cutoff)
+
+        # Views in the same order as the particles were given
+        self.agent_views    = [AgentView(self, idx, p.idx) for idx, p in enumerate(agents)]
+        self.resource_views = [ResourceView(self, idx, r.idx) for idx, r in enumerate(resources)]
+        self.views = dict(
+            [(id(p), view) for p, view in zip(agents, self.agent_views)] +
+            [(id(r), view) for r, view in zip(resources, self.resource_views)]
+        )
+        self.agents = tuple(self.views[id(p)] for p in particles)
+
+    def load(self, groups, size):
+        """
+        Loads the arrays from groups of particles, one group per world of
+        the given size, and returns the lists of agents and resources in
+        the order they are stored. Agents only ever interact with agents
+        and resources of their own world; every world must have the same
+        number of resources since memory is indexed by the resources of
+        the agent's own world (rbase is the index of its first resource).
+        """
+        self.size = np.array(size, dtype=float)
+        self.half = half_size(size)
+
+        agents    = []
+        resources = []
+        rbase     = []
+        homes     = {}
+        self.rcount = 0
+        for particles in groups:
+            statics = [p for p in particles if p.static]
+            movers  = [p for p in particles if not p.static]
+            if resources and len(statics) != self.rcount:
+                raise SimulationException("Every world must have the same number of resources")
+
+            self.rcount = len(statics)
+            homes.update(((len(resources), r.idx), len(resources) + ridx) for ridx, r in enumerate(statics))
+            rbase.extend([len(resources)] * len(movers))
+            resources.extend(statics)
+            agents.extend(movers)
+
+        # Resources are static: positions and stashes
+        self.rpos  = np.array([r.pos for r in resources], dtype=float).reshape(-1, 2)
+        self.stash = np.array([r.stash for r in resources], dtype=np.int64)
+        self.rlookup = dict((id(r), ridx) for ridx, r in enumerate(resources))
+        self.rbase = np.array(rbase, dtype=np.intp)
+
+        # Team and parameter tables shared by many agents
+        self.teams  = []
+        self.psets  = []
+        for p in agents:
+            if p.team not in self.teams: self.teams.append(p.team)
+            if p.enemy is not None and p.enemy not in self.teams: self.teams.append(p.enemy)
+            if not any(p.params is params for params in self.psets): self.psets.append(p.params)
+
+        # Per-agent arrays, the underscore arrays are the back buffers
+        count = len(agents)
+        self.shape = (len(groups), count / len(groups) if groups else 0)
+        self.pos    = np.array([p.pos for p in agents], dtype=float).reshape(-1, 2)
+        self.vel    = np.array([p.vel for p in agents], dtype=float).reshape(-1, 2)
+        self.state  = np.array([STATES.index(p.state) for p in agents], dtype=np.int8)
+        self.team   = np.array([self.teams.index(p.team) for p in agents], dtype=np.int8)
+        self.enemy  = np.array([self.teams.index(p.enemy) if p.enemy is not None else -1 for p in agents], dtype=np.int8)
+        self.pset   = np.array([self.param_index(p.params) for p in agents], dtype=np.int8)
+        self.target = np.array([self.resource_index(p.target) for p in agents], dtype=np.intp)
+        self.home   = np.array([self.resource_index(p.home) for p in agents], dtype=np.intp)
+        self.loaded = np.array([p.loaded for p in agents], dtype=bool)
+        self.stun_cooldown = np.array([p.stun_cooldown for p in agents], dtype=float)
+
+        # Memory stamps, the initial memories are older than any tick
+        self.ticks  = 0
+        self.memory = np.zeros((count, self.rcount), dtype=np.int64)
+        for idx, p in enumerate(agents):
+            for order, resource in enumerate(p.memory):
+                self.memory[idx, self.resource_index(resource) - rbase[idx]] = order + 1
+
+        # The home of the enemy of every agent (which is never guarded)
+        self.enemy_home = np.array([
+            homes.get((base, "%s_home" % p.enemy), -1) for p, base in zip(agents, rbase)
+        ], dtype=np.intp)
+
+        self._pos    = np.empty_like(self.pos)
+        self._vel    = np.empty_like(self.vel)
+        self._state  = np.empty_like(self.state)
+        self._target = np.empty_like(self.target)
+        self._loaded = np.empty_like(self.loaded)
+
+        # The guards of every team at every resource
+        self.count_guards()
+
+        # Compile the behaviors and radii of every parameter set
+        self.compile_params()
+
+        return agents, resources
+
+    ##////////////////////////////////////////////////////////////////////
+    ## Loading helpers
+    ##////////////////////////////////////////////////////////////////////
+
+    def count_guards(self):
+        """
+        Counts the guarding agents of every team at every resource from the
+        current states; blit keeps the counts up to date from then on.
+        """
+        self.guards = np.zeros((len(self.teams), len(self.stash)), dtype=np.int64)
+        guarding = (self.state == GUARDING_CODE) & (self.target >= 0)
+        np.add.at(self.guards, (self.team[guarding], self.target[guarding]), 1)
+
+    def param_index(self, params):
+        for idx, pset in enumerate(self.psets):
+            if pset is params: return idx
+        raise SimulationException("Unknown parameter set %r" % params)
+
+    def resource_index(self, resource):
+        if resource is None: return -1
+        try:
+            return self.rlookup[id(resource)]
+        except KeyError:
+            raise SimulationException("%r is not a resource in this world" % resource)
+
+    def resource(self, ridx):
+        """
+        Returns the view of the resource at the index or None if negative.
+        """
+        if ridx < 0: return None
+        return self.resource_views[ridx]
+
+    def view(self, particle):
+        """
+        Returns the view that replaced the given particle.
+        """
+        return self.views[id(particle)]
+
+    def compile_params(self):
+        """
+        Compiles the radii, guard thresholds and behaviors of every param
+        set, and re-indexes the resources if the largest radius changed.
+        The tables of the world are shared with its particles.
+        """
+        compile = self.world.compile if self.world is not None else ParameterTable.compile
+        self.tables = [compile(params) for params in self.psets]
+
+        self.max_radius = np.array([table.max_radius for table in self.tables], dtype=float)
+        self.cutoff = self.max_radius.max() if len(self.tables) else 0.0
+        self.depo_guard_threshold = np.array([table.depo_guard_threshold for table in self.tables])
+        self.home_guard_threshold = np.array([table.home_guard_threshold for table in self.tables])
+        self.compile_behaviors()
+
+        statics = getattr(self, 'statics', None)
+        if statics is not None and statics.radius != self.cutoff:
+            self.statics = StaticIndex(self.rpos, self.size, self.cutoff)
+
+    def replace_params(self, old, new):
+        """
+        Replaces a parameter set with another one (e.g. the parameters of
+        the allies when the world is reset for another genotype).
+        """
+        self.psets = [new if params is old else params for params in self.psets]
+        self.compile_params()
+
+    def compile_behaviors(self):
+        """
+        Gathers the compiled tables of every parameter set into arrays
+        indexed by (param set, state code, component) of the weight, the
+        radius (capped at the maximum radius of the param set) and the cosine
+        of half of the alpha of every velocity component, along with a mask
+        of which of the components are active. Stunned particles have no
+        components.
+        """
+        shape = (len(self.tables), len(STATES), len(COMPONENTS))
+        self.weights    = np.zeros(shape)
+        self.radii      = np.zeros(shape)
+        self.cosines    = np.zeros(shape)
+        self.active     = np.zeros(shape, dtype=bool)
+
+        for pidx, table in enumerate(self.tables):
+            for code, state in enumerate(STATES):
+                if state == STUNNED: continue
+
+                if state not in table.behaviors:
+                    raise ImproperlyConfigured("No movement behaviors for state '%s'." % state)
+
+                for component in table.behaviors[state]:
+                    if component.name not in COMPONENTS:
+                        raise ImproperlyConfigured("No velocity component named '%s'" % component.name)
+                    key = (pidx, code, COMPONENTS.index(component.name))
+                    self.active[key]  = True
+                    self.weights[key] = component.weight
+                    if component.name in FLOCK_COMPONENTS:
+                        self.radii[key] = min(component.radius, table.max_radius)
+                        self.cosines[key] = component.cosine
+
+    ##////////////////////////////////////////////////////////////////////
+    ## Simulation
+    ##////////////////////////////////////////////////////////////////////
+
+    def step(self):
+        """
+        Advances every agent by one tick: velocities, positions and the
+        finite state machine are computed from the current buffers into
+        the back buffers, which are then swapped in.
+        """
+        pairs   = self.pair_table()
+        statics = self.static_table()
+        tdelta  = self.target_displacements()
+
+        self.update_velocity(pairs, tdelta)
+        self.update_position()
+        self.update_state(pairs, statics, tdelta)
+        self.blit()
+
+    def pair_table(self):
+        """
+        Returns the displacements of every pair of agents within the
+        largest radius of any param set, whose candidates are found with the
+        ghost padding of the world if it has one, otherwise with the spatial
+        index of the world when there are many agents.
+        """
+        if self.world.ghosts is not None:
+            return self.world.ghosts.table(self.pos, self.cutoff)
+
+        cells = None
+        if len(self.pos) > GRID_THRESHOLD:
+            cells = self.world.build_index(self.pos, self.cutoff)
+        return PairTable(self.pos, self.world.size, self.cutoff, cells)
+
+    def static_table(self):
+        """
+        Returns the displacements from every agent to the resources within
+        the largest radius of any param set.
+        """
+        return self.statics.within(self.pos)
+
+    def target_displacements(self):
+        """
+        Returns the minimal image displacement from every agent to its
+        target, which the seeking, homing and mineral cohesion components
+        all steer toward. Agents without a target get a zero displacement.
+        """
+        delta = np.zeros_like(self.pos)
+        valid = np.flatnonzero(self.target >= 0)
+        delta[valid] = self.rpos[self.target[valid]] - self.pos[valid]
+        return minimal_image(delta, self.size, self.half)
+
+    def update_velocity(self, pairs, tdelta):
+        """
+        Computes the new velocity of every agent into the back buffer by
+        summing the weighted velocity components of the agent's state, one
+        kernel call per component for all of the agents.
+        """
+        count = len(self.pos)
+        rows  = pairs.rows
+        key   = (self.pset, self.state)
+
+        weights = self.weights[key]
+        radii   = self.radii[key]
+        cosine  = self.cosines[key]
+        active  = self.active[key]
+
+        cosines = kernels.bearing_cosines(rows, pairs.unit, unit(self.vel))
+        masks  = self.neighbor_masks(pairs)
+
+        velocity = self.vel.copy()
+        for cidx, name in enumerate(FLOCK_COMPONENTS):
+            if not active[:, cidx].any(): continue
+            radius = radii[:, cidx]
+            mask   = masks[name] & active[rows, cidx]
+            mask  &= kernels.sight(rows, pairs.dist2, cosines, radius, cosine[:, cidx])
+            velocity += weights[:, cidx, np.newaxis] * self.flock_component(name, mask, pairs, radius)
+
+        steering = kernels.steering(tdelta, self.vmax)
+        for cidx in xrange(len(FLOCK_COMPONENTS), len(COMPONENTS)):
+            velocity += weights[:, cidx, np.newaxis] * steering
+
+        # Stunned agents have no components and keep their velocity
+        kernels.clamp(velocity, self.vmax)
+        stunned = self.state == STUNNED_CODE
+        velocity[stunned] = self.vel[stunned]
+        self._vel[:] = velocity
+
+    def update_position(self):
+        """
+        Adds the new velocity to get a new position in the periodic world,
+        stunned agents don't move.
+        """
+        np.mod(self.pos + self._vel, self.size, out=self._pos)
+        stunned = self.state == STUNNED_CODE
+        self._pos[stunned] = self.pos[stunned]
+
+    def update_state(self, pairs, statics, tdelta):
+        """
+        Uses the finite state machine to compute the new state of every
+        agent at once with boolean masks over the state codes.
+
+        Unlike the reference engine, which updates agents one at a time,
+        every decision is made from the world at the start of the tick:
+        when several agents arrive at a deposit in the same tick they mine
+        in agent index order until the stash runs out (the rest forget it
+        and start spreading again). Drops are added after mining, and guards
+        abandon deposits that are empty at the end of the tick. In both
+        engines guards are counted per target at the start of the tick.
+        """
+        rows    = pairs.rows
+        cols    = pairs.cols
+        maxr2   = self.max_radius[self.pset] ** 2
+        state   = self.state
+        target  = self.target
+        home    = self.home
+        stunned = state == STUNNED_CODE
+
+        newstate  = self._state
+        newtarget = self._target
+        loaded    = self._loaded
+        newstate[:]  = state
+        newtarget[:] = target
+        loaded[:]    = self.loaded
+
+        # Stun on contact with the nearest non-stunned enemy in stun radius
+        radius2  = np.minimum(STUN_RADIUS ** 2, maxr2)[rows]
+        enemies  = (self.enemy[rows] == self.team[cols]) & (pairs.dist2 <= radius2)
+        enemies &= state[cols] != STUNNED_CODE
+        nearest  = self.nearest(pairs, enemies)
+        contact  = (nearest >= 0) & ~stunned
+
+        hit = np.flatnonzero(contact)
+        newstate[hit] = STUNNED_CODE
+        bearing = unit(self.pos[nearest[hit]] - self.pos[hit])
+        self.stun_cooldown[hit] = ceil_supplement((bearing * unit(self.vel[hit])).sum(-1))
+
+        # Stunned agents cool down and then resume what they were doing
+        self.stun_cooldown[stunned] -= 1
+        recovered = stunned & (self.stun_cooldown <= 0)
+        homeward  = recovered & (target == home)
+        newstate[homeward & self.loaded]  = CARAVAN_CODE
+        newstate[homeward & ~self.loaded] = GUARDING_CODE
+        newstate[recovered & (target != home)] = SPREADING_CODE
+
+        active   = ~stunned & ~contact
+        targeted = target >= 0
+        tdist2   = np.where(targeted, (tdelta*tdelta).sum(-1), np.inf)
+        stash    = self.stash[target]
+
+        # Teammates guarding the target of every agent
+        guards = np.where(targeted, self.guards[self.team, target], 0)
+
+        # Spreading agents remember the deposits in sight and seek the latest
+        spreading = active & (state == SPREADING_CODE)
+        srows, scols = statics.rows, statics.cols
+        seen  = statics.dist2 <= np.minimum(MINERAL_RADIUS ** 2, maxr2)[srows]
+        seen &= spreading[srows] & (self.stash[scols] > 0) & (scols != home[srows])
+        scols = scols - self.rbase[srows]
+        seen &= self.memory[srows, scols] == 0
+        srows, scols = srows[seen], scols[seen]
+        self.memory[srows, scols] = fsm.stamp(self.ticks, self.rcount)[scols]
+
+        remembered, remembers = fsm.latest(self.memory)
+        remembered += self.rbase
+        seeking = spreading & remembers
+        newtarget[seeking] = remembered[seeking]
+        newstate[seeking]  = SEEKING_CODE
+
+        # Seeking agents that arrive guard, mine or forget their target
+        arrived  = active & (state == SEEKING_CODE) & (tdist2 < 900)
+        stocked  = arrived & (stash > 0)
+        guarding = stocked & (target != self.enemy_home)
+        guarding &= guards < self.depo_guard_threshold[self.pset]
+        newstate[guarding] = GUARDING_CODE
+
+        miners = stocked & ~guarding
+        mined  = miners & (fsm.rank(target, miners) < stash)
+        loaded[mined]    = True
+        newtarget[mined] = home[mined]
+        newstate[mined]  = CARAVAN_CODE
+
+        forget = arrived & ~guarding & ~mined
+        self.memory[forget, target[forget] - self.rbase[forget]] = 0
+        newtarget[forget] = -1
+        newstate[forget]  = SPREADING_CODE
+
+        # Caravans that arrive drop their load, then guard or move on
+        dropped  = active & (state == CARAVAN_CODE) & (tdist2 < 100)
+        loaded[dropped] = False
+        guarding = dropped & (guards < self.home_guard_threshold[self.pset])
+        newstate[guarding] = GUARDING_CODE
+
+        remembered, remembers = fsm.latest(self.memory)
+        remembered += self.rbase
+        moving  = dropped & ~guarding
+        seeking = moving & remembers
+        newtarget[seeking] = remembered[seeking]
+        newstate[seeking]  = SEEKING_CODE
+        newtarget[moving & ~remembers] = -1
+        newstate[moving & ~remembers]  = SPREADING_CODE
+
+        resources = len(self.stash)
+        self.stash -= np.bincount(target[mined], minlength=resources)
+        self.stash += np.bincount(target[dropped], minlength=resources)
+
+        # Guards abandon deposits that have been emptied
+        abandon = active & (state == GUARDING_CODE) & targeted
+        abandon &= self.stash[target] <= 0
+        newstate[abandon] = SPREADING_CODE
+
+    def nearest(self, pairs, mask):
+        """
+        Returns the index of the nearest masked neighbor of every agent (the
+        lowest index on ties) or -1 if the agent has no masked neighbors.
+        """
+        rows  = pairs.rows[mask]
+        cols  = pairs.cols[mask]
+        order = np.lexsort((cols, pairs.dist2[mask], rows))
+        rows  = rows[order]
+        first = np.ones(len(rows), dtype=bool)
+        first[1:] = rows[1:] != rows[:-1]
+
+        nearest = np.full(len(self.pos), -1, dtype=np.intp)
+        nearest[rows[first]] = cols[order][first]
+        return nearest
+
+    def terminal(self):
+        """
+        Returns a boolean array of which worlds can no longer change: no
+        agent is carrying a load, and every resource with anything left in
+        it is the home of every agent of its world. Agents never take from
+        their own home, but they do raid the homes of the other teams, so
+        the deposits being empty isn't enough on its own.
+        """
+        worlds, count = self.shape
+        loaded  = self.loaded.reshape(worlds, count).any(1)
+        stocked = (self.stash > 0).reshape(worlds, self.rcount)
+        homes   = (self.home - self.rbase).reshape(worlds, count)
+
+        shared = np.zeros_like(stocked)
+        if count:
+            uniform = (homes == homes[:, :1]).all(1) & (homes[:, 0] >= 0)
+            shared[np.flatnonzero(uniform), homes[uniform, 0]] = True
+        return ~loaded & ~(stocked & ~shared).any(1)
+
+    def blit(self):
+        """
+        Swap the back buffers in for the current ones, moving the guards that
+        start or stop guarding (or guard another target) between the counts.
+        """
+        guarding = self.state == GUARDING_CODE
+        joining  = self._state == GUARDING_CODE
+        moved    = self.target != self._target
+        left     = guarding & (~joining | moved)
+        joined   = joining & (~guarding | moved)
+        np.subtract.at(self.guards, (self.team[left], self.target[left]), 1)
+        np.add.at(self.guards, (self.team[joined], self._target[joined]), 1)
+
+        self.pos, self._pos = self._pos, self.pos
+        self.vel, self._vel = self._vel, self.vel
+        self.state, self._state = self._state, self.state
+        self.target, self._target = self._target, self.target
+        self.loaded, self._loaded = self._loaded, self.loaded
+        self.ticks += 1
+
+    ##////////////////////////////////////////////////////////////////////
+    ## Velocity components
+    ##////////////////////////////////////////////////////////////////////
+
+    def neighbor_masks(self, pairs):
+        """
+        Returns the mask of the pairs whose neighbor has the team and the
+        state that each flocking component of the agent considers.
+        """
+        rows, cols = pairs.rows, pairs.cols
+        state = self.state[cols]
+        same  = self.team[rows] == self.team[cols]
+        free  = same & (state != GUARDING_CODE) & (state != STUNNED_CODE)
+        return {
+            'cohesion':   free,
+            'alignment':  same & ((state == SEEKING_CODE) | (state == SPREADING_CODE)),
+            'avoidance':  (self.enemy[rows] == self.team[cols]) & (state != STUNNED_CODE),
+            'separation': same,
+            'clearance':  free,
+        }
+
+    def flock_component(self, name, mask, pairs, radius):
+        """
+        Computes the named flocking component of every agent from the
+        masked pairs, see the kernels module for the formulas.
+        """
+        count = len(self.pos)
+        if name == 'avoidance':
+            return kernels.avoidance(pairs.rows, mask, pairs.dist2, pairs.unit, radius, count, self.vmax)
+
+        center, found = kernels.centers(pairs.rows, mask, pairs.delta, count)
+        if name == 'cohesion':
+            return kernels.cohesion(center, found, radius, self.vmax)
+        if name == 'alignment':
+            velocity, number = kernels.totals(pairs.rows, mask, self.vel[pairs.cols], count)
+            return kernels.alignment(center, found, velocity, radius, self.vmax)
+        if name == 'separation':
+            return kernels.separation(center, found, radius, self.vmax)
+        return kernels.clearance(center, found, self.vel, self.vmax)
@@ -0,0 +1,166 @@
+# swarm.engine.ensemble
+# An array engine that advances many independent worlds in lock-step
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 15:20:36 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: ensemble.py [] benjamin@bengfort.com $
+
+"""
+An array engine that advances many independent worlds in lock-step.
+
+Evolution spends most of its time simulating many small, independent
+worlds: one per genotype, or one per seed. The EnsembleEngine loads the
+agents of K worlds into the arrays of a single ArrayEngine, numbering the
+agents of world k after those of world k-1, so that every kernel and
+state machine mask advances all of the worlds at once. The displacements
+are computed with a leading world dimension so that agents only ever see
+the agents and resources of their own world.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import numpy as np
+
+from base import ArrayEngine
+from swarm.exceptions import *
+from swarm.spatial import PairTable, StaticTable, minimal_image
+
+##########################################################################
+## Ensemble Engine
+##########################################################################
+
+class EnsembleEngine(ArrayEngine):
+    """
+    Advances K worlds of the same size, maximum velocity, maximum time and
+    number of agents and resources in lock-step. Each world keeps its own parameters
+    (e.g. the AllyParameters of a genotype), which are compiled into the
+    tables of the engine like any other param set.
+
+    The worlds must have been created with the reference engine; their
+    particles are copied into the arrays and are not updated.
+    """
+
+    def __init__(self, worlds):
+        self.world  = None
+        self.worlds = list(worlds)
+        if not self.worlds:
+            raise SimulationException("An ensemble requires at least one world")
+
+        if any(world.arrays is not None for world in self.worlds):
+            raise SimulationException("Ensemble worlds must use the reference engine")
+
+        if len(set(world.size for world in self.worlds)) > 1:
+            raise SimulationException("Every world in an ensemble must have the same size")
+
+        if len(set(len(world.dynamic) for world in self.worlds)) > 1:
+            raise SimulationException("Every world in an ensemble must have the same number of agents")
+
+        if len(set(float(world.maximum_velocity) for world in self.worlds)) > 1:
+            raise SimulationException("Every world in an ensemble must have the same maximum velocity")
+        self.vmax = float(self.worlds[0].maximum_velocity)
+
+        # Worlds are stepped together, so they also stop together
+        if len(set(world.iterations for world in self.worlds)) > 1:
+            raise ImproperlyConfigured("Every world in an ensemble must have the same maximum time")
+        self.iterations = self.worlds[0].iterations
+
+        groups = [list(world.agents) for world in self.worlds]
+        self.load(groups, self.worlds[0].size)
+
+        # The tick at which the outcome of every world became final
+        self.final_time = np.where(self.terminal(), 0, -1)
+
+        # Resources of every world reported by status (homes, then deposits)
+        self.reports = [
+            [self.resource_index(world.ally_home), self.resource_index(world.enemy_home)] +
+            [self.resource_index(depot) for depot in world.resources]
+            for world in self.worlds
+        ]
+
+    def __len__(self):
+        return len(self.worlds)
+
+    @property
+    def finished(self):
+        """
+        True once the outcome of every world in the ensemble is final.
+        """
+        return bool((self.final_time >= 0).all())
+
+    def step(self):
+        """
+        Advances every world by one tick and records the tick at which the
+        outcome of each world became final. Worlds that are already final
+        are still stepped along with the others but can no longer change.
+        """
+        super(EnsembleEngine, self).step()
+        final = self.terminal() & (self.final_time < 0)
+        self.final_time[final] = self.ticks
+
+    def pair_table(self):
+        """
+        Returns the displacements of every pair of agents of the same world
+        within the largest radius of any param set, computed for all of the
+        worlds at once with a leading world dimension.
+        """
+        worlds, count = self.shape
+        first, second = np.triu_indices(count, 1)
+
+        points = self.pos.reshape(worlds, count, 2)
+        delta  = points[:, second] - points[:, first]
+        minimal_image(delta, self.size, self.half)
+        dist2  = (delta*delta).sum(-1)
+
+        keep = dist2 <= self.cutoff * self.cutoff
+        base = (np.arange(worlds) * count)[:, np.newaxis]
+        return PairTable.from_pairs(
+            worlds * count, self.cutoff,
+            (first + base)[keep], (second + base)[keep], delta[keep], dist2[keep]
+        )
+
+    def static_table(self):
+        """
+        Returns the displacements from every agent to the resources of its
+        own world within the largest radius of any param set.
+        """
+        worlds, count = self.shape
+        points = self.pos.reshape(worlds, count, 1, 2)
+        rpos   = self.rpos.reshape(worlds, 1, self.rcount, 2)
+        delta  = minimal_image(rpos - points, self.size, self.half)
+        dist2  = (delta*delta).sum(-1)
+
+        keep = dist2 <= self.cutoff * self.cutoff
+        world, agent, resource = np.nonzero(keep)
+        rows = world * count + agent
+        cols = world * self.rcount + resource
+        return StaticTable(worlds * count, rows, cols, delta[keep], dist2[keep], self.cutoff)
+
+    def status(self):
+        """
+        Reports the stash of the homes and the deposits of every world, like
+        World.status, as a list of tuples.
+        """
+        return [tuple(int(self.stash[ridx]) for ridx in report) for report in self.reports]
+
+    def results(self, run_time=0.0):
+        """
+        Returns the results of every world in the shape of the results of
+        evolve.tasks.runsim, with the run time shared among the worlds.
+        """
+        share = run_time / len(self)
+        return [
+            {
+                'fitness':     status[0],
+                'run_time':    share,
+                'iterations':  int(final) if final >= 0 else self.ticks,
+                'final_time':  int(final) if final >= 0 else None,
+                'home_stash':  status[0],
+                'enemy_stash': status[1],
+            } for status, final in zip(self.status(), self.final_time)
+        ]
@@ -0,0 +1,78 @@
+# swarm.engine.fsm
+# Vectorized helpers for the finite state machine of the array engine
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 13:12:40 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: fsm.py [] benjamin@bengfort.com $
+
+"""
+Vectorized helpers for the finite state machine of the array engine.
+
+The transitions of every agent are computed at once with boolean masks
+over the integer state codes. Whenever several agents compete for the
+same thing in the same tick (the last units of a deposit) they are served
+in agent index order, so that the outcome never depends on anything but
+the state of the world at the start of the tick.
+
+Memory is stored as an (N, R) array of stamps: zero if the agent doesn't
+remember the resource, otherwise a number that increases with the time
+the resource was remembered. The most recent memory is the target.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import numpy as np
+
+##########################################################################
+## State machine helpers
+##########################################################################
+
+def rank(keys, mask):
+    """
+    Returns the rank of every masked agent among the masked agents with
+    the same key (e.g. the same target) in agent index order, and -1 for
+    the agents that aren't masked.
+    """
+    agents = np.flatnonzero(mask)
+    order  = agents[np.argsort(keys[agents], kind='mergesort')]
+    keys   = keys[order]
+
+    position  = np.arange(len(order))
+    first     = np.ones(len(order), dtype=bool)
+    first[1:] = keys[1:] != keys[:-1]
+    start     = np.maximum.accumulate(np.where(first, position, 0))
+
+    ranks = np.full(len(mask), -1, dtype=np.intp)
+    ranks[order] = position - start
+    return ranks
+
+def stamp(tick, count):
+    """
+    Returns the memory stamps of the count resources remembered during a
+    tick. Stamps of later ticks are always larger and, within a tick, the
+    resource with the largest index is remembered last.
+    """
+    return (tick + 1) * (count + 1) + np.arange(count)
+
+def latest(memory):
+    """
+    Returns the most recently remembered resource of every agent and a
+    boolean array of which agents remember anything at all.
+    """
+    if not memory.shape[1]:
+        return np.full(len(memory), -1, dtype=np.intp), np.zeros(len(memory), dtype=bool)
+    return memory.argmax(1), (memory > 0).any(1)
+
+def ordered(stamps):
+    """
+    Returns the resources remembered in a single row of stamps, from the
+    oldest to the most recent memory like Particle.memory.
+    """
+    order = np.argsort(stamps, kind='mergesort')
+    return [ridx for ridx in order if stamps[ridx] > 0]
@@ -0,0 +1,151 @@
+# swarm.engine.kernels
+# Vectorized velocity component kernels for every agent at once
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 12:05:19 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: kernels.py [] benjamin@bengfort.com $
+
+"""
+Vectorized velocity component kernels for every agent at once.
+
+Each kernel computes one velocity component of the Particle class for all
+of the agents in a single call. Neighborhoods are given as pairs: parallel
+arrays of the agent (rows) and neighbor (cols) index of every candidate
+pair along with the displacement, squared distance and bearing of the
+pair, and a boolean mask of the pairs that are in the neighborhood of the
+component. Component parameters (radius, half alpha) are per-agent arrays
+so that agents in different states are computed in the same call.
+
+The formulas are exactly those of the Particle velocity components. Since
+pairs never have to be between agents of the same world, several worlds
+can be stepped by the same kernels by numbering their agents in sequence.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import numpy as np
+
+from swarm.spatial import unit
+from swarm.vectors import VectorArray
+
+##########################################################################
+## Neighborhoods
+##########################################################################
+
+def bearing_cosines(rows, bearing, heading):
+    """
+    Returns the cosine of the angle between the (unit) heading of the
+    agent of every pair and the bearing of its neighbor.
+    """
+    return (heading[rows] * bearing).sum(-1)
+
+def sight(rows, dist2, cosines, radius, cosine):
+    """
+    Returns the mask of the pairs whose neighbor is in sight of the agent
+    given per-agent arrays of the radius and the cosine of half of the
+    alpha (see swarm.vectors.view_cosine). If every agent sees the full
+    circle only the distance is tested.
+    """
+    mask = dist2 <= (radius * radius)[rows]
+    if (cosine >= -1).any():
+        mask &= cosines >= cosine[rows]
+    return mask
+
+def totals(rows, mask, values, count):
+    """
+    Returns the sum of the (M, 2) values of the masked pairs of every
+    agent along with the number of masked pairs of every agent.
+    """
+    rows   = rows[mask]
+    values = values[mask]
+    total  = np.column_stack((
+        np.bincount(rows, weights=values[:, 0], minlength=count),
+        np.bincount(rows, weights=values[:, 1], minlength=count),
+    ))
+    return total, np.bincount(rows, minlength=count)
+
+def centers(rows, mask, delta, count):
+    """
+    Returns the mean displacement from every agent to its masked
+    neighbors and a boolean array of the agents that have any neighbors.
+    """
+    center, number = totals(rows, mask, delta, count)
+    found = number > 0
+    center[found] /= number[found][:, np.newaxis]
+    return center, found
+
+def safe(radius):
+    """
+    Replaces the radius of agents without the component to avoid dividing
+    by zero (their components are masked out anyway).
+    """
+    return np.where(radius > 0, radius, 1.0)
+
+##########################################################################
+## Velocity components
+##########################################################################
+
+def cohesion(center, found, radius, vmax):
+    """
+    Steer toward the center of the neighbors, scaled by the square of the
+    distance to the center over the radius.
+    """
+    scale = (center*center).sum(-1) / (safe(radius) ** 2)
+    return np.where(found[:, np.newaxis], vmax * unit(center) * scale[:, np.newaxis], 0.0)
+
+def alignment(center, found, velocity, radius, vmax):
+    """
+    Steer in the average direction of the neighbors, scaled by the square
+    of the distance to their center over the radius.
+    """
+    scale = (center*center).sum(-1) / (safe(radius) ** 2)
+    return np.where(found[:, np.newaxis], vmax * unit(velocity) * scale[:, np.newaxis], 0.0)
+
+def avoidance(rows, mask, dist2, bearing, radius, count, vmax):
+    """
+    Steer away from every neighbor, each scaled by (r - distance) / r.
+    """
+    r     = safe(radius)[rows]
+    scale = vmax * (r - np.sqrt(dist2)) / r
+    total, number = totals(rows, mask, -bearing * scale[:, np.newaxis], count)
+    return total
+
+def separation(center, found, radius, vmax):
+    """
+    Steer away from the center of the neighbors, scaled by the square of
+    (r - distance to center) / r.
+    """
+    r     = safe(radius)
+    scale = ((r - np.sqrt((center*center).sum(-1))) / r) ** 2
+    return np.where(found[:, np.newaxis], -1 * vmax * unit(center) * scale[:, np.newaxis], 0.0)
+
+def clearance(center, found, velocity, vmax):
+    """
+    Steer orthogonally to the center of the neighbors, on the side the
+    agent is already heading toward.
+    """
+    cross  = center[:, 0] * velocity[:, 1] - center[:, 1] * velocity[:, 0]
+    center = np.where((cross < 0)[:, np.newaxis], -center, center)
+    ortho  = VectorArray.arr(center).orthogonal.view(np.ndarray)
+    return np.where(found[:, np.newaxis], vmax * ortho, 0.0)
+
+def steering(delta, vmax):
+    """
+    Steer toward a target (the seeking, homing and mineral cohesion
+    components) given the displacement to the target.
+    """
+    return vmax * unit(delta)
+
+def clamp(velocity, vmax):
+    """
+    Clamps velocities longer than vmax to vmax, in place.
+    """
+    fast = (velocity*velocity).sum(-1) > vmax * vmax
+    velocity[fast] = vmax * unit(velocity[fast])
+    return velocity
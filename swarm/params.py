@@ -46,11 +46,68 @@ dictionary-like access.
 ##########################################################################
 
 import os
-import yaml
-import fileinput
-import re
+import hashlib
+import numpy as np
 
 from copy import deepcopy
+from collections import namedtuple, OrderedDict
+from vectors import view_cosine
+
+## The number of parsed YAML files that are kept by load_yaml
+CACHE_SIZE = 256
+
+##########################################################################
+## YAML helpers
+##########################################################################
+
+## Parsed YAML files keyed by the hash of their contents
+_parsed = OrderedDict()
+
+def yaml_codec():
+    """
+    Returns PyYAML with the safe loader and dumper to use, the C accelerated
+    (libyaml) ones if available. PyYAML is only imported once a file is read
+    or written since importing it compiles a large regular expression.
+    """
+    import yaml
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    dumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+    return yaml, loader, dumper
+
+def load_yaml(path):
+    """
+    Parses a YAML file and returns a copy of its data. The parsed data is
+    cached by the hash of the contents of the file, so the genotypes that
+    are read over and over by the workers of an evolution (or files that
+    are rewritten under the same name) are only parsed once per process.
+    """
+    with open(path, 'rb') as conf:
+        content = conf.read()
+
+    key = hashlib.sha1(content).hexdigest()
+    if key in _parsed:
+        data = _parsed.pop(key)
+    else:
+        yaml, loader, dumper = yaml_codec()
+        data = yaml.load(content, Loader=loader)
+        if len(_parsed) >= CACHE_SIZE:
+            _parsed.popitem(last=False)
+
+    _parsed[key] = data
+    return deepcopy(data)
+
+def plain(value):
+    """
+    Converts configurations (and the dictionaries and lists that contain
+    them) into plain types that are written to YAML without any tags.
+    """
+    if isinstance(value, Configuration):
+        return value.serialize()
+    if isinstance(value, dict):
+        return dict((key, plain(val)) for key, val in value.items())
+    if isinstance(value, (list, tuple)):
+        return [plain(val) for val in value]
+    return value
 
 ##########################################################################
 ## Configuration Base Class
@@ -103,8 +160,7 @@ class Configuration(object):
         config = klass()
         for path in klass.CONF_PATHS:
             if os.path.exists(path):
-                with open(path, 'r') as conf:
-                    config.configure(yaml.load(conf))
+                config.configure(load_yaml(path))
         return config
 
     @classmethod
@@ -114,22 +170,26 @@ class Configuration(object):
         configuration from the YAML file at the given path.
         """
         config = klass()
-        with open(path, 'r') as conf:
-            config.configure(yaml.load(conf))
+        config.configure(load_yaml(path))
         return config
 
     def dump_file(self, path):
         """
         Dumps the YAML configuration out to a file.
         """
+        yaml, loader, dumper = yaml_codec()
         with open(path, 'wb') as out:
-            data = dict(self.options())
-            del data['max_radius']
-            yaml.dump(data, out, default_flow_style=False)
+            yaml.dump(self.serialize(), out, Dumper=dumper, default_flow_style=False)
 
-        # kludgy way of removing the type tags
-        for line in fileinput.input(path, inplace = True):
-            print re.sub(r'!!.*$', '', line),
+    def serialize(self):
+        """
+        Returns the options of the configuration as plain types, leaving
+        out the properties that are computed from the options.
+        """
+        return dict(
+            (opt, plain(val)) for opt, val in self.options()
+            if not isinstance(getattr(self.__class__, opt, None), property)
+        )
 
     def configure(self, conf={}):
         """
@@ -146,6 +206,10 @@ class Configuration(object):
         for key in keys:
             opt = self.get(key, None)
             if isinstance(opt, Configuration):
+                # Copy class level defaults so instances don't share them
+                if key.lower() not in self.__dict__:
+                    opt = deepcopy(opt)
+                    setattr(self, key.lower(), opt)
                 opt.configure(conf.pop(key))
         self.__dict__.update(conf)
 
@@ -229,6 +293,26 @@ class VelocityComponent(Configuration):
         self.radius   = radius
         self.alpha    = alpha
 
+    def serialize(self):
+        """
+        Returns every field of the component, including the radius and the
+        alpha of components that don't see neighbors (None).
+        """
+        return {
+            'priority': self.priority, 'weight': self.weight,
+            'radius': self.radius, 'alpha': self.alpha,
+        }
+
+    def view_cosine(self):
+        """
+        Returns the cosine of half of the vision angle for dot product
+        vision tests, cached until the alpha is configured again.
+        """
+        cached = self.__dict__.get('_cosine')
+        if cached is None or cached[0] != self.alpha:
+            cached = self._cosine = (self.alpha, view_cosine(self.alpha))
+        return cached[1]
+
 ##########################################################################
 ## Movement Behavior Parameter
 ##########################################################################
@@ -269,12 +353,18 @@ class SimulationParameters(Configuration):
     """
 
     debug            = True
+    engine           = "reference"
+    vectors          = "ndarray"
     maximum_velocity = 12
     team_size        = 50
     deposits         = 5
     stash_size       = 80
     maximum_time     = 40000
     world_size       = 3000
+    verlet_skin      = None
+    verlet_period    = None
+    spatial_index    = "grid"
+    boundary         = "wrap"
     home_guard_threshold  = 1
     depo_guard_threshold  = 0
 
@@ -382,11 +472,147 @@ class AllyParameters(Configuration):
         return self._max_radius
 
 ##########################################################################
-## Import this loaded Configuration
+## Compiled Parameter Tables
+##########################################################################
+
+## The states with movement behaviors (stunned agents do not move)
+BEHAVIORS = ('spreading', 'seeking', 'caravan', 'guarding')
+
+## Velocity components that steer toward the target rather than neighbors
+TARGET_COMPONENTS = ('seeking', 'homing', 'mineral_cohesion')
+FLOCK_COMPONENTS  = ('cohesion', 'alignment', 'avoidance', 'separation', 'clearance')
+
+## Fixed radii used by the finite state machine (guards are counted by the
+## world per target, see World.guards)
+STUN_RADIUS    = 30
+MINERAL_RADIUS = 200
+
+## The radii of the state machine checks made by agents in each state
+STATE_RADII = {
+    'spreading': (STUN_RADIUS, MINERAL_RADIUS),
+    'seeking':   (STUN_RADIUS,),
+    'caravan':   (STUN_RADIUS,),
+    'guarding':  (STUN_RADIUS,),
+}
+
+## A velocity component of a movement behavior, compiled
+Component = namedtuple('Component', 'name priority weight radius alpha cosine')
+
+class ParameterTable(namedtuple('ParameterTable', (
+        'behaviors', 'components', 'priorities', 'weights', 'radii', 'cosines',
+        'reach', 'max_radius', 'home_guard_threshold', 'depo_guard_threshold'))):
+    """
+    The immutable compiled form of a parameter set (the AllyParameters or
+    SimulationParameters of a team), built once when a world is created so
+    that no Configuration lookup is made while it is simulated.
+
+    For every state with a movement behavior, `behaviors` holds the tuple
+    of compiled velocity components in the order they are summed and
+    `components` maps their names to them; the priority, weight, radius
+    (NaN if it has none) and cosine of half of the alpha of the components
+    are also held in read-only arrays aligned with that tuple.
+    """
+
+    @classmethod
+    def compile(klass, params):
+        """
+        Compiles a parameter set into a table.
+        """
+        behaviors, components, reach = {}, {}, {}
+        arrays = ({}, {}, {}, {})
+
+        for state in BEHAVIORS:
+            behavior = params.get(state)
+            if behavior is None: continue
+
+            compiled = tuple(
+                Component(
+                    name, component.priority, component.weight, component.radius,
+                    component.alpha, component.view_cosine() if component.alpha is not None else None,
+                ) for name, component in behavior.components.items()
+            )
+
+            behaviors[state]  = compiled
+            components[state] = dict((component.name, component) for component in compiled)
+            for table, field in zip(arrays, ('priority', 'weight', 'radius', 'cosine')):
+                values = [getattr(component, field) for component in compiled]
+                values = np.array([np.nan if value is None else value for value in values], dtype=float)
+                values.flags.writeable = False
+                table[state] = values
+
+            radii = [
+                component.radius for component in compiled
+                if component.name in FLOCK_COMPONENTS and isinstance(component.radius, (int, float))
+            ]
+            reach[state] = max(radii + list(STATE_RADII[state]))
+            if params.max_radius is not None:
+                reach[state] = min(reach[state], params.max_radius)
+
+        return klass(
+            behaviors, components, *arrays, reach=reach,
+            max_radius=params.max_radius,
+            home_guard_threshold=params.home_guard_threshold,
+            depo_guard_threshold=params.depo_guard_threshold
+        )
+
+##########################################################################
+## Lazily loaded Configuration
 ##########################################################################
 
-world_parameters = SimulationParameters.load()
-ally_parameters = AllyParameters.load()
+class LazyConfiguration(object):
+    """
+    Stands in for a configuration that is only loaded from the files of
+    CONF_PATHS (see Configuration.load) when it is first accessed, so that
+    importing the package (e.g. in a freshly forked worker or a short CLI
+    invocation) doesn't read any YAML. Every access is forwarded to the
+    loaded configuration; code that needs the configuration itself (e.g.
+    for isinstance checks) resolves the stand in first (see resolve).
+    """
+
+    def __init__(self, klass):
+        self.__dict__['_klass']  = klass
+        self.__dict__['_config'] = None
+
+    @property
+    def loaded(self):
+        return self._config is not None
+
+    def setup(self):
+        """
+        Loads the configuration if it hasn't been loaded and returns it.
+        """
+        if self._config is None:
+            self.__dict__['_config'] = self._klass.load()
+        return self._config
+
+    def __getattr__(self, name):
+        if name in ('_klass', '_config'):
+            raise AttributeError(name)
+        return getattr(self.setup(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self.setup(), name, value)
+
+    def __getitem__(self, key):
+        return self.setup()[key]
+
+    def __repr__(self):
+        return repr(self.setup())
+
+    def __str__(self):
+        return str(self.setup())
+
+def resolve(config):
+    """
+    Returns the configuration a LazyConfiguration stands in for, loading it
+    if it hasn't been loaded, or any other configuration as it is.
+    """
+    if isinstance(config, LazyConfiguration):
+        return config.setup()
+    return config
+
+world_parameters = LazyConfiguration(SimulationParameters)
+ally_parameters = LazyConfiguration(AllyParameters)
 
 if __name__ == '__main__':
     print world_parameters
@@ -21,7 +21,7 @@ import numpy as np
 
 from swarm.params import *
 from swarm.exceptions import *
-from swarm.vectors import Vector
+from swarm.vectors import Vector, view_cosine, ceil_supplement
 
 ##########################################################################
 ## Module Constants
@@ -34,27 +34,28 @@ CARAVAN   = "caravan"
 GUARDING  = "guarding"
 STUNNED   = "stunned"
 
-## Maximum Velocity
-VMAX      = float(world_parameters.get('maximum_velocity'))
-VMAX2     = VMAX*VMAX
-
 ##########################################################################
 ## Particle Object
 ##########################################################################
 
 class Particle(object):
 
+    static = False  # Static particles never move and are indexed once
+    vector = Vector # The class of the position and velocity vectors
+
     def __init__(self, position, velocity, identifier=None, **kwargs):
         """
         Initialize a particle by assigning a position and velocity to it.
         Optional parameters include assigning an idx value (a unique way
         to identify the particle) and the world it belongs to, so that it
-        can be bound to discover its own neighborhood.
+        can be bound to discover its own neighborhood. Particles given no
+        params use the params of the world they are added to.
         """
-        self.params = kwargs.get('params', world_parameters)
+        self.params = kwargs.get('params', None)
+        self.table  = None                           # Compiled params (by the world)
 
-        self.pos    = Vector.arr(position)           # Init vectors here?
-        self.vel    = Vector.arr(velocity)           # Init vectors here?
+        self.pos    = self.vector.arr(position)      # Init vectors here?
+        self.vel    = self.vector.arr(velocity)      # Init vectors here?
         self.idx    = identifier
         self.world  = kwargs.get('world', None)      # Initialize in world
         self.state  = kwargs.get('state', SPREADING) # Set initial state...
@@ -65,6 +66,7 @@ class Particle(object):
         self.loaded = False                          # Are we carrying minerals or not?
         self.enemy  = "enemy" if self.team == "ally" else ("ally" if self.team == "enemy" else None)
         self.stun_cooldown = 0
+        self.slot   = None                           # Index of the particle in the world
 
         # Hidden variables to reduce computation complexity
         self._pos    = None                          # Holder for new position
@@ -72,7 +74,10 @@ class Particle(object):
         self._state  = None                          # Holder for new state
         self._target = None                          # Holder for new target
         self._loaded = None                          # Holder for loaded state
-        self._neighbors = None                       # Holder for neighbors in RMAX
+
+        # Neighborhood queries of the current tick (see neighborhood)
+        self._table   = None                         # Pair table of the queries
+        self._queries = {}                           # Memoized neighborhood queries
 
     def __repr__(self):
         type_name  = self.__class__.__name__
@@ -107,7 +112,7 @@ class Particle(object):
         newpos = self.pos + self._vel
         x = newpos.x % self.world.size[0]
         y = newpos.y % self.world.size[1]
-        self._pos = Vector.arrp(x,y)
+        self._pos = self.vector.arrp(x,y)
 
     def update_velocity(self):
         """
@@ -119,21 +124,21 @@ class Particle(object):
             self._vel = self.vel
             return
 
-        vectors = []    # Tuples of vector components and their priority
-        for component, parameters in self.components.items():
-            # Get the method by name and compute
-            if hasattr(self, component):
-                velocity = getattr(self, component)
-                vectors.append((component, velocity(), parameters))
-            else:
-                raise Exception("No method on %r, '%s'" % (self, component))
+        behavior = self.table.behaviors.get(self.state)
+        if behavior is None:
+            raise ImproperlyConfigured("No movement behaviors for state '%s'." % self.state)
 
         newvel = self.vel
-        for comp, vec, params in vectors:
-            newvel = newvel + (params.weight * vec)
+        for component in behavior:
+            # Get the method by name and compute
+            velocity = getattr(self, component.name, None)
+            if velocity is None:
+                raise Exception("No method on %r, '%s'" % (self, component.name))
+            newvel = newvel + (component.weight * velocity())
 
-        if newvel.length2 > VMAX2:
-            newvel = VMAX * newvel.unit
+        vmax = self.vmax
+        if newvel.length2 > vmax * vmax:
+            newvel = vmax * newvel.unit
 
         self._vel = newvel
 
@@ -152,11 +157,12 @@ class Particle(object):
         self._loaded = self.loaded
 
         if self.state != STUNNED:
-            enemy = self.find_nearest(30, 360, team=self.enemy, except_state=STUNNED)
+            enemy = self.find_contact()
             if enemy:
                 self._state = STUNNED
-                angle = (enemy.pos - self.pos).angle(self.vel)
-                self.stun_cooldown = (180 - angle) / 1
+                # Stunned for 180 - the angle of the enemy from the heading
+                cosine = (enemy.pos - self.pos).unit.dot(self.vel.unit)
+                self.stun_cooldown = int(ceil_supplement(cosine))
                 return
 
         if self.state == STUNNED:
@@ -170,7 +176,7 @@ class Particle(object):
 
         if self.state == SPREADING:
             # scan for mineral stashes
-            for mineral in [m for m in self.neighbors(200, 360, team='mineral') if m != self.home and m.stash > 0 and m not in self.memory]:
+            for mineral in [m for m in self.neighbors(MINERAL_RADIUS, 360, team='mineral') if m != self.home and m.stash > 0 and m not in self.memory]:
                 self.memory.append(mineral)
 
             if len(self.memory) > 0:
@@ -179,10 +185,10 @@ class Particle(object):
                 return
 
         if self.state == SEEKING:
-            if self.pos.distance2(self.target.relative_pos(self.pos)) < 900:
+            if self.displacement(self.target).length2 < 900:
                 if self.target.stash > 0:
                     if self.target.idx != (self.enemy + '_home') and \
-                            len([n for n in self.neighbors(200, 360, team=self.team) if n.state == GUARDING or n._state == GUARDING]) < self.params.depo_guard_threshold:
+                            self.world.guard_count(self.team, self.target) < self.table.depo_guard_threshold:
                         self._state = GUARDING
                         return
                     else:
@@ -197,12 +203,11 @@ class Particle(object):
                     return
 
         if self.state == CARAVAN:
-            if self.pos.distance2(self.target.relative_pos(self.pos)) < 100:
+            if self.displacement(self.target).length2 < 100:
                 self.target.drop()
                 self._loaded = False
 
-                guards = [n for n in self.neighbors(200, 360, team=self.team) if n.state == GUARDING or n._state == GUARDING]
-                if len(guards) < self.params.home_guard_threshold:
+                if self.world.guard_count(self.team, self.target) < self.table.home_guard_threshold:
                     self._state = GUARDING
                     return
                 else:
@@ -222,16 +227,11 @@ class Particle(object):
 
     def blit(self):
         """
-        Swap new pos/vel for old ones.
+        Swap new pos/vel for old ones. Changes are traced by the world (see
+        swarm.trace), not by the particles; the world does count the guards.
         """
-        if world_parameters.debug:
-            print "Particle %s" % self.idx
-            print "Position: %s --> %s" % (self.pos, self._pos)
-            print "Velocity: %s --> %s" % (self.vel, self._vel)
-            print "State:    %s --> %s" % (self.state, self._state)
-            print "Target:   %s --> %s" % (self.target, self._target)
-            print "Loaded:   %s --> %s" % (self.loaded, self._loaded)
-            print
+        if self.world is not None and GUARDING in (self.state, self._state):
+            self.world.move_guard(self, self._state, self._target)
         self.pos     = self._pos
         self.vel     = self._vel
         self.state   = self._state
@@ -242,7 +242,10 @@ class Particle(object):
         self._state  = None
         self._target = None
         self._loaded = None
-        self._neighbors = None
+
+        # Neighborhoods are only valid for the tick they were found in
+        self._table   = None
+        self._queries = {}
 
     def copy(self):
         """
@@ -250,22 +253,29 @@ class Particle(object):
         """
         return self.__class__(
             self.pos.copy(), self.vel.copy(), self.idx,
-            team=self.team, state=self.state, home=self.home,
+            team=self.team, state=self.state, home=self.home, params=self.params,
         )
 
     ##////////////////////////////////////////////////////////////////////
     ## Helper Functions
     ##////////////////////////////////////////////////////////////////////
 
+    @property
+    def vmax(self):
+        """
+        The maximum velocity of the world the particle is bound to.
+        """
+        return float(self.world.maximum_velocity)
+
     @property
     def components(self):
         """
-        Get movement behaviors components based on state
+        Get the compiled movement behavior components based on state
         """
-        _behavior = self.params.get(self.state)
-        if _behavior is None:
+        components = self.table.components.get(self.state)
+        if components is None:
             raise ImproperlyConfigured("No movement behaviors for state '%s'." % self.state)
-        return _behavior.components
+        return components
 
     def is_bound(self):
         """
@@ -283,11 +293,18 @@ class Particle(object):
         delta = point - self.pos
         if delta.length2 > radius2: return False # The distance is outside the vision radius
 
-        angle = self.vel.angle(delta)
-        alpha = alpha / 2
-        if angle > alpha: return False         # The angle is outside our vision angle from heading
+        return self.in_view(delta.unit, alpha)   # The angle must be within our vision angle from heading
 
-        return True
+    def in_view(self, bearing, alpha):
+        """
+        Determines whether or not a bearing (the unit vector toward another
+        point) is within the vision angle alpha from the heading, which is
+        the case if the dot product of the two is at least cos(alpha/2).
+        """
+        cosine = view_cosine(alpha)
+        if cosine < -1: return True             # Nothing is outside a full circle
+
+        return self.vel.unit.dot(bearing) >= cosine
 
     def relative_pos(self, point):
         size_x = self.world.size[0]
@@ -298,27 +315,100 @@ class Particle(object):
             rel_x += (-1 if (self.pos.x - point.x) > 0 else 1) * size_x
         if (abs(self.pos.y - point.y) > size_y/ 2):
             rel_y += (-1 if (self.pos.y - point.y) > 0 else 1) * size_y
-        return Vector.arrp(rel_x, rel_y)
+        return self.vector.arrp(rel_x, rel_y)
+
+    def displacement(self, other):
+        """
+        Returns the minimal image displacement (Vector) from the particle
+        to another particle, read from the world's pair table when the
+        pair is within it, otherwise computed from relative_pos.
+        """
+        if self.world is not None and other.world is self.world and other.slot is not None:
+            pairs = self.world.minerals if other.static else self.world.pairs
+            entry = pairs.find(self.slot, other.slot)
+            if entry is not None:
+                return self.vector.arr(pairs.delta[entry])
+        return other.relative_pos(self.pos) - self.pos
 
     def neighbors(self, radius, alpha, team='any', source='internal'):
         """
         Finds the neighbors given a radius and an alpha
+        """
+        for agent, delta in self.neighborhood(radius, alpha, team, source):
+            yield agent
 
-        Only checks neighbors that are within RMAX (the maximum radius of
-        any movement component), therefore only evaluates the entire agent
-        space once per update rather than for every movmement behavior.
+    def neighborhood(self, radius, alpha, team='any', source='internal'):
+        """
+        Finds the neighbors given a radius and an alpha, returning a list of
+        tuples of the neighbor and its displacement from the particle.
+
+        Radii are capped at RMAX (the maximum radius of any movement
+        component). Queries within the reach of the current state of the
+        particle (the largest radius of its components and state machine
+        checks) read the candidates of the particle at the current tick
+        (see candidates), larger ones search the world. The positions of the
+        particles only change at blit, so identical queries (e.g. the same
+        radius and alpha of two components, or the guard counts of the state
+        machine) are memoized until then. Filters on the state of neighbors
+        are left to the caller since states change during the tick.
+
+        Searching the world as the source inspects the cells of the world's
+        cell list around the particle instead.
         """
 
         if not self.is_bound():
             raise Exception("Can only find neighbors for bound particles.")
 
-        if source=='internal' and self._neighbors is None:
-            self._neighbors = list(self.neighbors(self.params.max_radius, 360, team='any', source='world'))
+        if source == 'internal' and not self.static:
+            radius = min(radius, self.table.max_radius)
+            if radius <= self.table.reach.get(self.state, 0):
+                pairs = self.world.pairs
+                if self._table is not pairs:
+                    self._table   = pairs
+                    self._queries = {}
+
+                key = (radius, alpha, team)
+                if key not in self._queries:
+                    self._queries[key] = self.query(radius, alpha, team)
+                return self._queries[key]
+
+        return list(self.scan(radius, alpha, team))
+
+    @property
+    def candidates(self):
+        """
+        The moving agents and the static resources within the cutoff of the
+        pair tables at the current tick (see World.neighborhoods).
+        """
+        return self.world.neighborhoods[self.slot]
+
+    def query(self, radius, alpha, team='any'):
+        """
+        Filters the candidates of the particle by the radius, the vision
+        angle alpha and the team of the neighbors.
+        """
+        radius2 = radius * radius
+        cosine  = view_cosine(alpha)
+        moving, resources = self.candidates
 
-        source = self._neighbors if source == 'internal' else self.world.agents
-        nearby = lambda pos: self.in_sight(pos, radius, alpha)
+        candidates = []
+        if team != 'mineral':
+            candidates += moving
+        if team in ('any', 'mineral'):
+            candidates += resources
 
-        for agent in source:
+        return [
+            (agent, delta) for agent, kind, dist2, bearing, delta in candidates
+            if (team == 'any' or kind == team) and dist2 <= radius2 and bearing >= cosine
+        ]
+
+    def scan(self, radius, alpha, team='any'):
+        """
+        Searches the cells of the world around the particle for neighbors
+        given a radius and an alpha, yielding tuples of the neighbor and its
+        displacement from the particle.
+        """
+        for agent in self.world.nearby(self.pos, radius):
 
             if agent is self: continue                  # We're not in our own neighborhood
 
@@ -326,9 +416,9 @@ class Particle(object):
                 continue
 
             # Check if the agent's position is in sight
-            if nearby(agent.relative_pos(self.pos)):
-                yield agent
-                continue
+            position = agent.relative_pos(self.pos)
+            if self.in_sight(position, radius, alpha):
+                yield agent, position - self.pos
 
     def find_nearest(self, radius, alpha, team="any", except_state="foo"):
         """
@@ -336,13 +426,21 @@ class Particle(object):
         """
         nearest  = None
         distance = None
-        for neighbor in self.neighbors(radius, alpha, team):
-            d = self.pos.distance2(neighbor.relative_pos(self.pos))
+        for neighbor, delta in self.neighborhood(radius, alpha, team):
+            d = delta[0]*delta[0] + delta[1]*delta[1]
             if (distance is None or d < distance) and neighbor.state != except_state:
                 distance = d
                 nearest  = neighbor
         return nearest
 
+    def find_contact(self):
+        """
+        Returns the nearest enemy that isn't stunned within the stun radius,
+        handed to the particle by the contact phase of the world.
+        """
+        slot = self.world.contacts[self.slot]
+        return self.world.dynamic[slot] if slot >= 0 else None
+
     ##////////////////////////////////////////////////////////////////////
     ## Movement Behavior Velocity Components
     ##////////////////////////////////////////////////////////////////////
@@ -351,39 +449,37 @@ class Particle(object):
         """
         Reports cohesion velocity from an array of neighbors
         """
-        r = self.components['cohesion'].radius
-        a = self.components['cohesion'].alpha
-        neighbors = [n for n in self.neighbors(r,a, team=self.team) if (n.state != GUARDING and n.state != STUNNED)]
+        component = self.components['cohesion']
+        r, a = component.radius, component.alpha
+        deltas = [d for n, d in self.neighborhood(r,a, team=self.team) if (n.state != GUARDING and n.state != STUNNED)]
 
-        if not neighbors:
-            return Vector.zero()
+        if not deltas:
+            return self.vector.zero()
 
-        center = np.average(list(n.relative_pos(self.pos) for n in neighbors), axis=0)
-        delta  = center - self.pos
+        delta  = self.vector.arr(np.average(deltas, axis=0))
 
         scale  = (delta.length / r) ** 2
-        vmaxrt = VMAX * delta.unit
+        vmaxrt = self.vmax * delta.unit
         return vmaxrt * scale
 
     def alignment(self):
         """
         Reports the alignment velocity from an array of neighbors
         """
-        r = self.components['alignment'].radius
-        a = self.components['alignment'].alpha
-        neighbors = [x for x in list(self.neighbors(r,a, team=self.team)) if (x.state == SEEKING or x.state == SPREADING)]
+        component = self.components['alignment']
+        r, a = component.radius, component.alpha
+        neighbors = [(n, d) for n, d in self.neighborhood(r,a, team=self.team) if (n.state == SEEKING or n.state == SPREADING)]
 
         if not neighbors:
-            return Vector.zero()
+            return self.vector.zero()
 
-        center = np.average(list(n.relative_pos(self.pos) for n in neighbors), axis=0)
-        deltap = center - self.pos
+        deltap = self.vector.arr(np.average([d for n, d in neighbors], axis=0))
         scale  = deltap.length2 / (r*r)
 
-        avgvel = np.average(list(n.vel for n in neighbors), axis=0)
-        deltav = Vector.arr(avgvel)
+        avgvel = np.average(list(n.vel for n, d in neighbors), axis=0)
+        deltav = self.vector.arr(avgvel)
 
-        return VMAX * deltav.unit * scale
+        return self.vmax * deltav.unit * scale
 
     def avoidance(self):
         """
@@ -391,19 +487,20 @@ class Particle(object):
 
         Changed the formula to (r - dp.length /r)
         """
-        r = self.components['avoidance'].radius
-        a = self.components['avoidance'].alpha
+        component = self.components['avoidance']
+        r, a = component.radius, component.alpha
 
-        neighbors = [x for x in list(self.neighbors(r,a, team=self.enemy)) if x.state != STUNNED]
+        deltas = [d for n, d in self.neighborhood(r,a, team=self.enemy) if n.state != STUNNED]
 
-        arr = np.zeros(2)
+        arr  = np.zeros(2)
+        vmax = self.vmax
 
-        for n in neighbors:
-            delta = self.pos - n.relative_pos(self.pos)
+        for d in deltas:
+            delta = self.vector.arr(-d)
             scale = (r - delta.length) / r
-            arr += scale * delta.unit * VMAX
+            arr += scale * delta.unit * vmax
 
-        return Vector.arr(arr)
+        return self.vector.arr(arr)
 
     def separation(self):
         """
@@ -411,18 +508,17 @@ class Particle(object):
 
         Changed the formula to (r-dp.length /r)**2
         """
-        r = self.components['separation'].radius
-        a = self.components['separation'].alpha
-        neighbors = list(self.neighbors(r,a, team=self.team))
+        component = self.components['separation']
+        r, a = component.radius, component.alpha
+        deltas = [d for n, d in self.neighborhood(r,a, team=self.team)]
 
-        if not neighbors:
-            return Vector.zero()
+        if not deltas:
+            return self.vector.zero()
 
-        center = np.average(list(n.relative_pos(self.pos) for n in neighbors), axis=0)
-        delta  = center - self.pos
+        delta  = self.vector.arr(np.average(deltas, axis=0))
 
         scale  = ((r - delta.length) / r) ** 2
-        vmaxrt = VMAX * delta.unit
+        vmaxrt = self.vmax * delta.unit
 
         return -1 * vmaxrt * scale
 
@@ -435,24 +531,23 @@ class Particle(object):
         if not hasattr(self, 'target') or self.target is None:
             raise Exception("In Seeking, the particle must have a target")
 
-        direction = self.target.relative_pos(self.pos) - self.pos
-        return VMAX * (direction.unit)
+        direction = self.displacement(self.target)
+        return self.vmax * (direction.unit)
 
     def clearance(self):
         """
         Reports the clearance velocity orthogonal to current velocity
         """
-        r = self.components['clearance'].radius
-        a = self.components['clearance'].alpha
+        component = self.components['clearance']
+        r, a = component.radius, component.alpha
 
-        neighbors = list(n for n in self.neighbors(r,a, team=self.team) if (n.state != GUARDING and n.state != STUNNED))
-        if neighbors:
-            center = np.average(list(n.relative_pos(self.pos) for n in neighbors), axis=0)
-            delta  = center - self.pos
+        deltas = [d for n, d in self.neighborhood(r,a, team=self.team) if (n.state != GUARDING and n.state != STUNNED)]
+        if deltas:
+            delta  = np.average(deltas, axis=0)
             if (np.cross(delta, self.vel) < 0):
                 delta *= -1
-            return VMAX * delta.orthogonal
-        return Vector.zero()
+            return self.vmax * self.vector.arr(delta).orthogonal
+        return self.vector.zero()
 
     def homing(self):
         """
@@ -461,15 +556,15 @@ class Particle(object):
         if not hasattr(self, 'target') or self.target is None:
             raise Exception("In Homing, the particle must have a target")
 
-        direction = self.target.relative_pos(self.pos) - self.pos
-        return VMAX * (direction.unit)
+        direction = self.displacement(self.target)
+        return self.vmax * (direction.unit)
 
     def mineral_cohesion(self):
         if not hasattr(self, 'target') or self.target is None:
             raise Exception("In Mineral_Cohesion, the particle must have a target")
 
-        direction = self.target.relative_pos(self.pos) - self.pos
-        return VMAX * (direction.unit)
+        direction = self.displacement(self.target)
+        return self.vmax * (direction.unit)
 
 ##########################################################################
 ## Resource Object
@@ -477,6 +572,8 @@ class Particle(object):
 
 class ResourceParticle(Particle):
 
+    static = True
+
     def __init__(self, pos, **kwargs):
         # Create the stash that the minerals contain
         self.stash = kwargs.get('stash_size', world_parameters.get('stash_size'))
@@ -0,0 +1,114 @@
+# swarm.pool
+# A per-process pool of worlds that are reset rather than rebuilt
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 17:24:40 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: pool.py [] benjamin@bengfort.com $
+
+"""
+A per-process pool of worlds that are reset rather than rebuilt.
+
+Workers evaluate hundreds of genotypes back to back, each in a world of
+the same shape. Rather than allocating the particles (or the arrays) of a
+new world for every evaluation, worlds are released back into the pool
+when a simulation is done and reset with the parameters of the next one.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+from world import World
+from params import world_parameters, resolve
+
+##########################################################################
+## Module Constants
+##########################################################################
+
+## The settings a world is built with, other than its maximum time
+SETTINGS = (
+    'team_size', 'deposits', 'world_size', 'stash_size', 'maximum_velocity',
+    'debug', 'verlet_skin', 'verlet_period', 'spatial_index', 'boundary',
+    'vectors', 'engine',
+)
+
+##########################################################################
+## World Pool
+##########################################################################
+
+class WorldPool(object):
+    """
+    Keeps the released worlds of a process, keyed by every setting they
+    were built with: the simulation and enemy parameters, the shape of the
+    world (team size, deposits, world size) and its physics (stash size,
+    maximum velocity, vectors, neighbor search and boundary) and engine.
+    Only the ally parameters, the seed and the maximum time of a world are
+    changed when it is reused.
+    """
+
+    def __init__(self):
+        self.worlds = {}
+
+    def __len__(self):
+        return sum(len(worlds) for worlds in self.worlds.values())
+
+    @staticmethod
+    def key(**kwargs):
+        """
+        Returns the settings of the world that would be created with kwargs.
+        Parameter sets are compared by identity; the pooled worlds keep them
+        alive, so their ids are not reused.
+        """
+        params = resolve(kwargs.get('world_params')) or world_parameters.setup()
+        enemy  = resolve(kwargs.get('enemy_params')) or params
+        return (id(params), id(enemy)) + tuple(
+            kwargs.get(name, params.get(name)) for name in SETTINGS
+        )
+
+    @staticmethod
+    def settings(world):
+        """
+        Returns the settings a world was built with as the kwargs of key.
+        """
+        settings = dict((name, getattr(world, name)) for name in SETTINGS if name != 'world_size')
+        settings.update(
+            world_params=world.world_params, enemy_params=world.enemy_params,
+            world_size=world.size[0],
+        )
+        return settings
+
+    def acquire(self, ally_conf_path=None, seed=None, **kwargs):
+        """
+        Returns a world with the allies configured from the path, either a
+        released world with the same settings that is reset or a new world.
+        The maximum time of a reused world is reset along with the params.
+        """
+        worlds = self.worlds.get(self.key(**kwargs))
+        if not worlds:
+            if ally_conf_path is not None:
+                kwargs['ally_conf_path'] = ally_conf_path
+            return World(seed=seed, **kwargs)
+
+        world  = worlds.pop()
+        params = resolve(kwargs.get('world_params')) or world_parameters.setup()
+        return world.reset(
+            params=kwargs.get('ally_params') or ally_conf_path or params.get('ally_conf_path'),
+            seed=seed, maximum_time=kwargs.get('maximum_time', params.get('maximum_time')),
+        )
+
+    def release(self, world):
+        """
+        Returns a world to the pool once its simulation is done.
+        """
+        key = self.key(**self.settings(world))
+        self.worlds.setdefault(key, []).append(world)
+
+    def clear(self):
+        self.worlds = {}
+
+## The pool of the current process
+worlds = WorldPool()
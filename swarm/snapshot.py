@@ -0,0 +1,242 @@
+# swarm.snapshot
+# Compact binary snapshots of the full state of a world
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 16:31:08 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: snapshot.py [] benjamin@bengfort.com $
+
+"""
+Compact binary snapshots of the full state of a world.
+
+A Snapshot captures everything that changes while a world is simulated:
+the position, velocity, state, target, home, memory, loaded flag and stun
+cooldown of every agent, the stash of every resource, the time and the
+state of the random number generator of the world. Snapshots are plain
+NumPy arrays, so they are written to and read from a compressed npz blob
+and restored into a world bit-exactly, with either engine.
+
+Restoring a snapshot never touches the configuration files or the random
+distributions of the initial conditions, which makes it cheap to resume a
+long simulation after a worker dies, or to fork many continuations with
+different parameters from a shared mid-game state (see World.fork).
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import numpy as np
+
+from StringIO import StringIO
+from swarm.exceptions import *
+from swarm.engine import STATES, fsm
+
+##########################################################################
+## Snapshot
+##########################################################################
+
+class Snapshot(object):
+    """
+    The state of a world at a single tick. Agents and resources are stored
+    in the order of `world.dynamic` and `world.static`; targets and homes
+    are indices of the resources (-1 for none) and memories are the (N, R)
+    stamps of the array engine (see swarm.engine.fsm).
+    """
+
+    # Arrays written to the binary snapshot
+    FIELDS = (
+        'identifiers', 'pos', 'vel', 'state', 'target', 'home', 'memory',
+        'loaded', 'stun_cooldown', 'resources', 'rpos', 'stash', 'clock',
+        'rng_keys', 'rng_gauss',
+    )
+
+    def __init__(self, **fields):
+        for name in self.FIELDS:
+            if name not in fields:
+                raise SimulationException("Snapshot is missing the '%s' field" % name)
+            setattr(self, name, fields[name])
+
+    @property
+    def time(self):
+        return int(self.clock[0])
+
+    @property
+    def final_time(self):
+        return int(self.clock[1]) if self.clock[1] >= 0 else None
+
+    @property
+    def ticks(self):
+        return int(self.clock[2])
+
+    def __len__(self):
+        return len(self.identifiers)
+
+    def fields(self):
+        """
+        Returns a dictionary of the arrays of the snapshot.
+        """
+        return dict((name, getattr(self, name)) for name in self.FIELDS)
+
+    def replace(self, **fields):
+        """
+        Returns a copy of the snapshot with some of its arrays replaced.
+        """
+        arrays = self.fields()
+        arrays.update(fields)
+        return self.__class__(**arrays)
+
+    def __repr__(self):
+        return "<Snapshot of %i agents at time %i>" % (len(self), self.time)
+
+    ##////////////////////////////////////////////////////////////////////
+    ## Capture and restore
+    ##////////////////////////////////////////////////////////////////////
+
+    @classmethod
+    def capture(klass, world):
+        """
+        Takes a snapshot of the current state of the world.
+        """
+        fields = {
+            'identifiers': np.array([agent.idx for agent in world.dynamic]),
+            'resources':   np.array([resource.idx for resource in world.static]),
+        }
+
+        if world.arrays is not None:
+            engine = world.arrays
+            fields.update({
+                'pos':    engine.pos.copy(),
+                'vel':    engine.vel.copy(),
+                'state':  engine.state.copy(),
+                'target': engine.target.copy(),
+                'home':   engine.home.copy(),
+                'memory': engine.memory.copy(),
+                'loaded': engine.loaded.copy(),
+                'stun_cooldown': engine.stun_cooldown.copy(),
+                'rpos':   engine.rpos.copy(),
+                'stash':  engine.stash.copy(),
+            })
+            ticks = engine.ticks
+        else:
+            index  = lambda resource: resource.slot if resource is not None else -1
+            memory = np.zeros((len(world.dynamic), len(world.static)), dtype=np.int64)
+            for idx, agent in enumerate(world.dynamic):
+                for order, resource in enumerate(agent.memory):
+                    memory[idx, resource.slot] = order + 1
+
+            fields.update({
+                'pos':    np.array([agent.pos for agent in world.dynamic], dtype=float).reshape(-1, 2),
+                'vel':    np.array([agent.vel for agent in world.dynamic], dtype=float).reshape(-1, 2),
+                'state':  np.array([STATES.index(agent.state) for agent in world.dynamic], dtype=np.int8),
+                'target': np.array([index(agent.target) for agent in world.dynamic], dtype=np.intp),
+                'home':   np.array([index(agent.home) for agent in world.dynamic], dtype=np.intp),
+                'memory': memory,
+                'loaded': np.array([agent.loaded for agent in world.dynamic], dtype=bool),
+                'stun_cooldown': np.array([agent.stun_cooldown for agent in world.dynamic], dtype=float),
+                'rpos':   np.array([resource.pos for resource in world.static], dtype=float).reshape(-1, 2),
+                'stash':  np.array([resource.stash for resource in world.static], dtype=np.int64),
+            })
+            ticks = 0
+
+        # Memory stamps are only meaningful relative to the ticks of the engine
+        final = world.final_time if world.final_time is not None else -1
+        fields['clock'] = np.array([world.time, final, ticks], dtype=np.int64)
+
+        # The state of the Mersenne twister: keys, position and the gaussian cache
+        name, keys, position, gauss, cached = world.random.get_state()
+        fields['rng_keys']  = np.append(keys, np.uint32(position)).astype(np.uint32)
+        fields['rng_gauss'] = np.array([gauss, cached], dtype=float)
+
+        return klass(**fields)
+
+    def restore(self, world):
+        """
+        Restores the state of the snapshot into a world with the same agents
+        and resources (e.g. the world it was taken from or a fork of it),
+        with either engine, and returns the world.
+        """
+        if len(world.dynamic) != len(self) or len(world.static) != len(self.stash):
+            raise SimulationException("Cannot restore %r into a world of a different shape" % self)
+
+        if not np.array_equal(self.rpos, [resource.pos for resource in world.static]):
+            raise SimulationException("Cannot restore %r into a world with other resources" % self)
+
+        if world.arrays is not None:
+            engine = world.arrays
+            engine.pos[:]    = self.pos
+            engine.vel[:]    = self.vel
+            engine.state[:]  = self.state
+            engine.target[:] = self.target
+            engine.home[:]   = self.home
+            engine.memory[:] = self.memory
+            engine.loaded[:] = self.loaded
+            engine.stun_cooldown[:] = self.stun_cooldown
+            engine.stash[:]  = self.stash
+            engine.ticks     = self.ticks
+            engine.count_guards()
+        else:
+            resource = lambda ridx: world.static[ridx] if ridx >= 0 else None
+            for idx, agent in enumerate(world.dynamic):
+                agent.pos    = agent.vector.arr(self.pos[idx].copy())
+                agent.vel    = agent.vector.arr(self.vel[idx].copy())
+                agent.state  = STATES[self.state[idx]]
+                agent.target = resource(self.target[idx])
+                agent.home   = resource(self.home[idx])
+                agent.memory = [world.static[ridx] for ridx in fsm.ordered(self.memory[idx])]
+                agent.loaded = bool(self.loaded[idx])
+                agent.stun_cooldown = float(self.stun_cooldown[idx])
+
+            for ridx, static in enumerate(world.static):
+                static.stash = int(self.stash[ridx])
+
+            world._cells    = None
+            world._pairs    = None
+            world._contacts = None
+            world._guards   = None
+            world._minerals = None
+            world._neighborhoods = None
+
+        world.time       = self.time
+        world.final_time = self.final_time
+        world.random.set_state(('MT19937', self.rng_keys[:-1], int(self.rng_keys[-1]),
+                                int(self.rng_gauss[0]), float(self.rng_gauss[1])))
+        return world
+
+    ##////////////////////////////////////////////////////////////////////
+    ## Serialization
+    ##////////////////////////////////////////////////////////////////////
+
+    def dumps(self):
+        """
+        Returns the snapshot as a compressed binary string.
+        """
+        stream = StringIO()
+        np.savez_compressed(stream, **self.fields())
+        return stream.getvalue()
+
+    @classmethod
+    def loads(klass, data):
+        """
+        Loads a snapshot from a binary string created by dumps.
+        """
+        with np.load(StringIO(data)) as arrays:
+            return klass(**dict((name, arrays[name]) for name in klass.FIELDS))
+
+    def dump_file(self, path):
+        """
+        Writes the binary snapshot out to a file.
+        """
+        with open(path, 'wb') as out:
+            out.write(self.dumps())
+
+    @classmethod
+    def load_file(klass, path):
+        """
+        Loads a binary snapshot from a file.
+        """
+        with open(path, 'rb') as data:
+            return klass.loads(data.read())
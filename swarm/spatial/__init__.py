@@ -0,0 +1,26 @@
+# swarm.spatial
+# Spatial indices for finding neighbors in the periodic world.
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 10:31:15 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: __init__.py [] benjamin@bengfort.com $
+
+"""
+Spatial indices for finding neighbors in the periodic world.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+from grid import *
+from pairwise import *
+from statics import *
+from verlet import *
+from backends import *
+from ghosts import *
+from contacts import *
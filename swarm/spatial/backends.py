@@ -0,0 +1,536 @@
+# swarm.spatial.backends
+# Interchangeable spatial indices for the neighbor queries of a world
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 21:08:32 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: backends.py [] benjamin@bengfort.com $
+
+"""
+Interchangeable spatial indices for the neighbor queries of a world.
+
+The agents of a simulation pile up around the homes and the deposits and
+spread thinly across the rest of the torus, so no single structure is
+always the fastest. Every backend indexes the points of a tick for queries
+up to a radius and answers the two kinds of queries of a world: the
+candidate pairs that the PairTable is computed from, and the candidates
+near a single point (World.nearby). Candidates are a superset of the
+points within the radius, the exact distances are left to the caller, so
+every backend yields exactly the same neighbors.
+
+    grid      a uniform grid of cells at least as wide as the radius
+    sweep     sort and sweep along x, pruning with the periodic y distance
+    quadtree  a region quadtree that splits crowded quadrants
+    kdtree    a KD-tree split at the median, queried with periodic images
+
+Every backend counts its builds and queries and the time spent in them in
+an IndexStats. The BackendSelector picks the backend for a world by timing
+each of them on the points of the current tick, weighted by the number of
+point queries the world makes per tick, and measures them again from time
+to time as the density of the swarm changes.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import time
+import numpy as np
+
+from grid import CellList
+from pairwise import minimal_image, half_size
+from swarm.exceptions import *
+
+##########################################################################
+## Module Constants
+##########################################################################
+
+AUTO      = "auto"      # Pick the backend by measuring them
+LEAF_SIZE = 8           # Points in a leaf of the trees
+MAX_DEPTH = 16          # Deepest level of the quadtree
+SLACK     = 1e-6        # Margin on the radius so candidates are a superset
+
+##########################################################################
+## Helper functions
+##########################################################################
+
+def spans(starts, stops):
+    """
+    Returns the pairs (i, j) for every j in [starts[i], stops[i]) as two
+    integer arrays, without looping in Python.
+    """
+    starts = np.asarray(starts, dtype=np.intp)
+    counts = np.maximum(np.asarray(stops, dtype=np.intp) - starts, 0)
+    first  = np.repeat(np.arange(len(counts)), counts)
+    offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return first, np.repeat(starts, counts) + offset
+
+def ordered(first, second):
+    """
+    Orients candidate pairs so that first < second.
+    """
+    return np.minimum(first, second), np.maximum(first, second)
+
+def wrapped_boxes(point, radius, size):
+    """
+    Returns the boxes (x0, y0, x1, y1) inside the world that cover the
+    square of the radius around the point, split across the boundary.
+    """
+    ranges = []
+    for dim in xrange(2):
+        low, high = point[dim] - radius, point[dim] + radius
+        if high - low >= size[dim]:
+            ranges.append([(0.0, size[dim])])
+        elif low < 0:
+            ranges.append([(0.0, high), (low + size[dim], size[dim])])
+        elif high > size[dim]:
+            ranges.append([(low, size[dim]), (0.0, high - size[dim])])
+        else:
+            ranges.append([(low, high)])
+    return [(x0, y0, x1, y1) for x0, x1 in ranges[0] for y0, y1 in ranges[1]]
+
+##########################################################################
+## Statistics
+##########################################################################
+
+class IndexStats(object):
+    """
+    The number of times a backend was built and queried for pairs and for
+    points, and the seconds spent doing so.
+    """
+
+    __slots__ = ('builds', 'pairs', 'queries', 'time')
+
+    def __init__(self):
+        self.builds  = 0
+        self.pairs   = 0
+        self.queries = 0
+        self.time    = 0.0
+
+    def serialize(self):
+        return dict((name, getattr(self, name)) for name in self.__slots__)
+
+    def __repr__(self):
+        return "<IndexStats %i builds, %i pair and %i point queries in %0.3f seconds>" % (
+            self.builds, self.pairs, self.queries, self.time
+        )
+
+##########################################################################
+## Spatial Index
+##########################################################################
+
+class SpatialIndex(object):
+    """
+    Indexes the (N, 2) points of a periodic world of the given size for
+    queries up to the radius; build, pairs and nearby keep the statistics.
+    Backends subclass it and define the hooks:
+
+        index_points(points): indexes the points of a build
+        find_nearby(point, radius): the indices of the candidate points
+            within the radius of a point
+
+    and may override find_pairs, which by default queries around every
+    point with find_nearby.
+    """
+
+    name = None
+
+    def __init__(self, size, radius, stats=None):
+        self.size   = np.asarray(size, dtype=float)
+        self.radius = radius if radius else max(size)
+        self.stats  = stats if stats is not None else IndexStats()
+        self.points = np.zeros((0, 2))
+
+    def __len__(self):
+        return len(self.points)
+
+    def __repr__(self):
+        return "<%s of %i points>" % (self.__class__.__name__, len(self))
+
+    def build(self, points):
+        """
+        Indexes the points and returns the index.
+        """
+        started = time.time()
+        self.points = np.asarray(points, dtype=float).reshape(-1, 2)
+        self.index_points(self.points)
+        self.stats.builds += 1
+        self.stats.time   += time.time() - started
+        return self
+
+    def pairs(self):
+        """
+        Returns two integer arrays (first, second) of the candidate pairs
+        within the radius, where first < second and every unordered pair is
+        only returned once.
+        """
+        started = time.time()
+        if len(self.points) < 2 or 2 * self.radius >= self.size.min():
+            first, second = np.triu_indices(len(self.points), 1)
+        else:
+            first, second = self.find_pairs()
+        self.stats.pairs += 1
+        self.stats.time  += time.time() - started
+        return first.astype(np.intp), second.astype(np.intp)
+
+    def nearby(self, point, radius=None):
+        """
+        Returns the sorted list of the indices of the candidate points
+        within the radius (by default the radius of the index) of a point.
+        """
+        started = time.time()
+        items = sorted(int(item) for item in self.find_nearby(point, radius or self.radius))
+        self.stats.queries += 1
+        self.stats.time    += time.time() - started
+        return items
+
+    def find_pairs(self):
+        """
+        Finds the candidate pairs by querying around every point, backends
+        with a faster way of finding every pair override this.
+        """
+        firsts, seconds = [np.zeros(0, dtype=np.intp)], [np.zeros(0, dtype=np.intp)]
+        for idx, point in enumerate(self.points):
+            found = np.asarray(self.find_nearby(point, self.radius), dtype=np.intp)
+            found = found[found > idx]
+            firsts.append(np.repeat(idx, len(found)))
+            seconds.append(found)
+        return np.concatenate(firsts), np.concatenate(seconds)
+
+##########################################################################
+## Uniform Grid
+##########################################################################
+
+class GridIndex(SpatialIndex):
+    """
+    The cell list of the world: cells at least as wide as the radius, so
+    that pairs are found in the 3x3 blocks of cells around every cell.
+    """
+
+    name = "grid"
+
+    def index_points(self, points):
+        self.grid = CellList(tuple(self.size), self.radius)
+        for idx, point in enumerate(points):
+            self.grid.insert(idx, point)
+
+    def find_pairs(self):
+        return self.grid.pairs()
+
+    def find_nearby(self, point, radius):
+        return self.grid.nearby(point, radius)
+
+##########################################################################
+## Sort and Sweep
+##########################################################################
+
+class SweepIndex(SpatialIndex):
+    """
+    Sorts the points along x; the candidates of a point are the points
+    whose x is within the radius, found by binary search, including those
+    across the boundary at x=0. Pairs are found without a Python loop.
+    """
+
+    name = "sweep"
+
+    def index_points(self, points):
+        self.order = np.argsort(points[:, 0], kind='mergesort')
+        self.xs    = points[self.order, 0]
+        self.half  = half_size(self.size)
+
+    def find_pairs(self):
+        count  = len(self.xs)
+        reach  = self.radius + SLACK
+        width  = self.size[0]
+        ranks  = np.arange(count)
+
+        # Pairs within the radius along x, and across the boundary at x=0
+        first, second = spans(ranks + 1, np.searchsorted(self.xs, self.xs + reach, 'right'))
+        wfirst, wsecond = spans(np.zeros(count), np.minimum(ranks, np.searchsorted(self.xs, self.xs + reach - width, 'right')))
+        first  = np.concatenate((first, wfirst))
+        second = np.concatenate((second, wsecond))
+        return ordered(self.order[first], self.order[second])
+
+    def find_nearby(self, point, radius):
+        reach = radius + SLACK
+        found = []
+        for x0, y0, x1, y1 in wrapped_boxes(point, reach, self.size):
+            start = np.searchsorted(self.xs, x0, 'left')
+            stop  = np.searchsorted(self.xs, x1, 'right')
+            found.append(self.order[start:stop])
+
+        found = np.unique(np.concatenate(found))
+        dy = np.abs(self.points[found, 1] - point[1])
+        dy = np.minimum(dy, self.size[1] - dy)
+        return found[dy <= reach]
+
+##########################################################################
+## Trees
+##########################################################################
+
+class TreeIndex(SpatialIndex):
+    """
+    The trees adapt their leaves to the density of the points. Candidate
+    pairs are the pairs of points in every pair of leaves whose bounding
+    boxes are within the radius of each other across the periodic boundary,
+    so the pairs are found a leaf at a time rather than a point at a time.
+    """
+
+    def index_points(self, points):
+        self.leaves = []
+        self.root   = self.node(np.arange(len(points)), 0.0, 0.0, self.size[0], self.size[1], 0)
+
+    def leaf(self, items):
+        """
+        Records the items of a leaf of the tree and returns them.
+        """
+        if len(items):
+            self.leaves.append(items)
+        return items
+
+    def find_pairs(self):
+        points = self.points
+        lower  = np.array([points[items].min(0) for items in self.leaves])
+        upper  = np.array([points[items].max(0) for items in self.leaves])
+
+        # The gap between the bounding boxes of every pair of leaves, along
+        # each axis, at the nearest of the periodic images
+        gap = None
+        for shift in (-1, 0, 1):
+            offset = shift * self.size
+            image  = np.maximum(np.maximum(lower[np.newaxis] + offset - upper[:, np.newaxis],
+                                           lower[:, np.newaxis] - upper[np.newaxis] - offset), 0)
+            gap = image if gap is None else np.minimum(gap, image)
+
+        reach = self.radius + SLACK
+        one, two = np.nonzero(np.triu((gap*gap).sum(-1) <= reach * reach))
+
+        # Every pair of items of every pair of near leaves, in one pass over
+        # the items of the leaves laid out end to end
+        items  = np.concatenate(self.leaves)
+        sizes  = np.array([len(leaf) for leaf in self.leaves])
+        starts = np.cumsum(sizes) - sizes
+        counts = sizes[one] * sizes[two]
+        pair   = np.repeat(np.arange(len(counts)), counts)
+        local  = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        width  = sizes[two][pair]
+        first  = items[starts[one][pair] + local // width]
+        second = items[starts[two][pair] + local % width]
+
+        keep = (one[pair] != two[pair]) | (first < second)
+        return ordered(first[keep], second[keep])
+
+##########################################################################
+## Quadtree
+##########################################################################
+
+class QuadTreeIndex(TreeIndex):
+    """
+    A region quadtree over the world that splits every quadrant holding
+    more than LEAF_SIZE points, so crowded areas are finely divided while
+    empty ones are a single node. Queries are boxes split at the boundary.
+    """
+
+    name = "quadtree"
+
+    def node(self, items, x0, y0, x1, y1, depth):
+        """
+        Returns a node (x0, y0, x1, y1, items, children) of the tree.
+        """
+        if len(items) <= LEAF_SIZE or depth >= MAX_DEPTH:
+            return (x0, y0, x1, y1, self.leaf(items), None)
+
+        cx, cy = (x0 + x1) / 2.0, (y0 + y1) / 2.0
+        points = self.points[items]
+        right  = points[:, 0] >= cx
+        top    = points[:, 1] >= cy
+        children = (
+            self.node(items[~right & ~top], x0, y0, cx, cy, depth+1),
+            self.node(items[right & ~top], cx, y0, x1, cy, depth+1),
+            self.node(items[~right & top], x0, cy, cx, y1, depth+1),
+            self.node(items[right & top], cx, cy, x1, y1, depth+1),
+        )
+        return (x0, y0, x1, y1, None, children)
+
+    def find_nearby(self, point, radius):
+        found = []
+        for box in wrapped_boxes(point, radius + SLACK, self.size):
+            self.search(self.root, box, found)
+        if not found:
+            return []
+        return np.unique(np.concatenate(found))
+
+    def search(self, node, box, found):
+        """
+        Collects the items of the leaves under the node inside the box.
+        """
+        x0, y0, x1, y1, items, children = node
+        bx0, by0, bx1, by1 = box
+        if bx0 > x1 or bx1 < x0 or by0 > y1 or by1 < y0:
+            return
+
+        if children is None:
+            points = self.points[items]
+            inside = (points[:, 0] >= bx0) & (points[:, 0] <= bx1) & (points[:, 1] >= by0) & (points[:, 1] <= by1)
+            found.append(items[inside])
+            return
+
+        for child in children:
+            self.search(child, box, found)
+
+##########################################################################
+## Periodic KD-Tree
+##########################################################################
+
+class KDTreeIndex(TreeIndex):
+    """
+    A KD-tree split at the median of the points along the longer side of
+    the region of every node. A periodic query is answered by searching for
+    every image of the point that is within the radius of the boundary,
+    pruning subtrees beyond the radius of the split.
+    """
+
+    name = "kdtree"
+
+    def node(self, items, x0, y0, x1, y1, depth):
+        """
+        Returns a leaf (items) or a node (axis, split, left, right).
+        """
+        if len(items) <= LEAF_SIZE:
+            return self.leaf(items)
+
+        axis   = 0 if x1 - x0 >= y1 - y0 else 1
+        values = self.points[items, axis]
+        order  = np.argsort(values, kind='mergesort')
+        middle = len(items) // 2
+        split  = values[order[middle]]
+
+        left, right = (x0, y0, split, y1), (split, y0, x1, y1)
+        if axis == 1:
+            left, right = (x0, y0, x1, split), (x0, split, x1, y1)
+        return (
+            axis, split,
+            self.node(items[order[:middle]], *(left + (depth+1,))),
+            self.node(items[order[middle:]], *(right + (depth+1,))),
+        )
+
+    def images(self, point, radius):
+        """
+        Returns the periodic images of the point that are within the radius
+        of the world.
+        """
+        shifts = []
+        for dim in xrange(2):
+            offsets = [0.0]
+            if point[dim] - radius < 0:
+                offsets.append(self.size[dim])
+            if point[dim] + radius > self.size[dim]:
+                offsets.append(-self.size[dim])
+            shifts.append(offsets)
+        return [(point[0] + dx, point[1] + dy) for dx in shifts[0] for dy in shifts[1]]
+
+    def find_nearby(self, point, radius):
+        reach = radius + SLACK
+        found = []
+        for image in self.images(point, reach):
+            self.search(self.root, image, reach, found)
+        if not found:
+            return []
+        return np.unique(np.concatenate(found))
+
+    def search(self, node, point, reach, found):
+        """
+        Collects the items of the leaves under the node within the square of
+        the reach around the point.
+        """
+        if not isinstance(node, tuple):
+            delta = np.abs(self.points[node] - point)
+            found.append(node[(delta <= reach).all(-1)])
+            return
+
+        axis, split, left, right = node
+        if point[axis] - reach <= split:
+            self.search(left, point, reach, found)
+        if point[axis] + reach >= split:
+            self.search(right, point, reach, found)
+
+## The backends by name
+BACKENDS = dict((klass.name, klass) for klass in (GridIndex, SweepIndex, QuadTreeIndex, KDTreeIndex))
+
+##########################################################################
+## Backend Selection
+##########################################################################
+
+class BackendSelector(object):
+    """
+    Picks the fastest backend for the points of a world by timing each of
+    the backends on them: a build, the candidate pairs and as many point
+    queries as the world made per build since the last selection. The
+    backends are timed again every interval selections, since the swarm
+    clusters and spreads out over the course of a simulation.
+    """
+
+    def __init__(self, backends=None, interval=100):
+        self.backends = list(backends or sorted(BACKENDS))
+        self.interval = interval
+        self.choice   = None
+        self.timings  = {}      # Seconds of each backend in the last trial
+        self.trials   = 0
+        self.calls    = 0
+        self.last     = (0, 0)  # Builds and point queries at the last trial
+
+    def __repr__(self):
+        return "<BackendSelector chose %s in %i trials>" % (self.choice, self.trials)
+
+    def mix(self, stats):
+        """
+        Returns the number of point queries per build since the last trial.
+        """
+        builds  = sum(stat.builds for stat in stats.values()) - self.last[0]
+        queries = sum(stat.queries for stat in stats.values()) - self.last[1]
+        return float(queries) / builds if builds > 0 else 0.0
+
+    def select(self, points, size, radius, stats=None):
+        """
+        Returns the name of the backend to index the points with, timing the
+        backends first if it is time to.
+        """
+        stats = stats or {}
+        if self.choice is None or self.calls % self.interval == 0:
+            self.trial(points, size, radius, self.mix(stats))
+            self.last = (
+                sum(stat.builds for stat in stats.values()),
+                sum(stat.queries for stat in stats.values()),
+            )
+        self.calls += 1
+        return self.choice
+
+    def trial(self, points, size, radius, mix):
+        """
+        Times every backend on the points and chooses the fastest.
+        """
+        points  = np.asarray(points, dtype=float).reshape(-1, 2)
+        queries = int(round(mix)) if len(points) else 0
+        for name in self.backends:
+            started = time.time()
+            index = BACKENDS[name](size, radius).build(points)
+            index.pairs()
+            for point in points[:queries]:
+                index.nearby(point)
+            self.timings[name] = time.time() - started
+
+        self.choice  = min(self.backends, key=self.timings.get)
+        self.trials += 1
+        return self.choice
+
+def create_index(name, size, radius, stats=None):
+    """
+    Returns an empty backend by name, raising ImproperlyConfigured if it
+    doesn't exist.
+    """
+    if name not in BACKENDS:
+        raise ImproperlyConfigured("Unknown spatial index '%s'" % name)
+    return BACKENDS[name](size, radius, stats)
@@ -0,0 +1,193 @@
+# swarm.spatial.contacts
+# Contacts between the agents of rival teams within the stun radius
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 23:02:14 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: contacts.py [] benjamin@bengfort.com $
+
+"""
+Contacts between the agents of rival teams within the stun radius.
+
+Every agent that isn't stunned looks for the nearest enemy within the stun
+radius every tick, a small radius compared to the radius of the movement
+components, and most agents are nowhere near an enemy. The contacts of a
+tick are found in a phase of their own that only looks at the pairs of
+agents of rival teams: if the bounding boxes of the two teams are further
+apart than the radius there are no contacts at all, otherwise the agents
+of one team are hashed into a grid of cells just wider than the radius and
+the agents of the other team look up the 3x3 cells around them. Each
+agent is then handed its nearest contact.
+
+Contacts have exactly the squared distances of the pairs of the full pair
+table of the tick, so the nearest contact is the same enemy that a search
+of the neighbors of the agent would find.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import numpy as np
+
+from pairwise import minimal_image, half_size
+from backends import SLACK, spans
+
+##########################################################################
+## Module Constants
+##########################################################################
+
+## Rival teams with at most this many pairs are checked without the grid
+BRUTE_FORCE = 400
+
+## The offsets of the 3x3 cells around a cell
+NEIGHBORS = np.array([(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)], dtype=np.int64)
+
+##########################################################################
+## Helper functions
+##########################################################################
+
+def rivals(team, enemy):
+    """
+    Returns the pairs (first, second) of the arrays of indices of the
+    agents of two teams where either team is the enemy of the other, given
+    the team and the enemy of every agent.
+    """
+    teams = np.unique(team)
+    sides = []
+    for idx, one in enumerate(teams):
+        for other in teams[idx+1:]:
+            if ((team == one) & (enemy == other)).any() or ((team == other) & (enemy == one)).any():
+                sides.append((np.flatnonzero(team == one), np.flatnonzero(team == other)))
+    return sides
+
+def box_gap(first, second, size):
+    """
+    Returns the smallest gap along either axis between the bounding boxes
+    of two sets of points across the periodic boundary; no pair of points
+    of the two sets is closer than the gap.
+    """
+    lo1, hi1 = first.min(0), first.max(0)
+    lo2, hi2 = second.min(0), second.max(0)
+    inside = np.maximum(np.maximum(lo2 - hi1, lo1 - hi2), 0.0)
+    across = np.maximum(size - (np.maximum(hi1, hi2) - np.minimum(lo1, lo2)), 0.0)
+    return np.minimum(inside, across).max()
+
+##########################################################################
+## Contact Grid
+##########################################################################
+
+class ContactGrid(object):
+    """
+    Finds the pairs of points of rival sets within the radius of each other
+    in a periodic world of the given size.
+    """
+
+    def __init__(self, size, radius):
+        self.extent = np.asarray(size, dtype=float)
+        self.half   = half_size(size)
+        self.radius = float(radius)
+
+        # Cells per axis wider than the radius, unless that leaves too few
+        # cells for the 3x3 neighborhoods to be distinct
+        self.cells = np.floor(self.extent / (self.radius + SLACK)).astype(np.int64)
+        self.dense = (self.cells < 3).any()
+
+        # Statistics of how often the rival teams were all too far apart
+        self.queries = 0
+        self.skips   = 0
+
+    def __repr__(self):
+        return "<ContactGrid %ix%i cells (%i of %i skipped)>" % (
+            self.cells[0], self.cells[1], self.skips, self.queries
+        )
+
+    def cell(self, points):
+        """
+        Returns the cell coordinates of the points.
+        """
+        return np.floor(points / (self.extent / self.cells)).astype(np.int64) % self.cells
+
+    def key(self, cells):
+        """
+        Returns the keys of cell coordinates (along the last axis).
+        """
+        return cells[..., 0] * self.cells[1] + cells[..., 1]
+
+    def candidates(self, points, first, second):
+        """
+        Returns the candidate pairs (i, j) of the first and second indices of
+        points whose cells are next to each other, or every pair if there
+        are only a few of them.
+        """
+        if self.dense or len(first) * len(second) <= BRUTE_FORCE:
+            return np.repeat(first, len(second)), np.tile(second, len(first))
+
+        # Sort the second set by cell and look up the 3x3 cells of the first
+        keys  = self.key(self.cell(points[second]))
+        order = np.argsort(keys, kind='mergesort')
+        keys  = keys[order]
+
+        cells = (self.cell(points[first])[:, np.newaxis, :] + NEIGHBORS) % self.cells
+        look  = self.key(cells).T.ravel()
+
+        rank, item = spans(np.searchsorted(keys, look, 'left'), np.searchsorted(keys, look, 'right'))
+        return first[rank % len(first)], second[order[item]]
+
+    def pairs(self, points, sides):
+        """
+        Returns the pairs (first, second) of the points of rival sets within
+        the radius of each other, given the sides (first, second) of every
+        pair of rival sets (see rivals), the minimal image displacements from
+        first to second and their squared lengths.
+        """
+        self.queries += 1
+
+        firsts, seconds = [], []
+        for first, second in sides:
+            if box_gap(points[first], points[second], self.extent) > self.radius + SLACK:
+                continue
+            i, j = self.candidates(points, first, second)
+            firsts.append(i)
+            seconds.append(j)
+
+        if not firsts:
+            self.skips += 1
+            first = second = np.zeros(0, dtype=np.intp)
+        else:
+            first, second = np.concatenate(firsts), np.concatenate(seconds)
+
+        delta = points[second] - points[first]
+        minimal_image(delta, self.extent, self.half)
+        dist2 = (delta*delta).sum(-1)
+        keep  = dist2 <= self.radius * self.radius
+        return first[keep], second[keep], delta[keep], dist2[keep]
+
+    def nearest(self, points, sides, team, enemy, radius2, targets):
+        """
+        Returns the index of the nearest enemy of every point within the
+        squared radius of the point (no further than the radius of the grid)
+        that is one of the targets, the lowest index on ties, or -1 if there
+        is none. Points have a team and an enemy team (integer codes), and
+        the sides are the rival sets of the teams.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        first, second, delta, dist2 = self.pairs(points, sides)
+
+        rows  = np.concatenate((first, second))
+        cols  = np.concatenate((second, first))
+        dist2 = np.concatenate((dist2, dist2))
+        keep  = (enemy[rows] == team[cols]) & targets[cols] & (dist2 <= radius2[rows])
+        rows, cols, dist2 = rows[keep], cols[keep], dist2[keep]
+
+        order = np.lexsort((cols, dist2, rows))
+        rows, cols = rows[order], cols[order]
+        first = np.ones(len(rows), dtype=bool)
+        first[1:] = rows[1:] != rows[:-1]
+
+        nearest = np.full(len(points), -1, dtype=np.intp)
+        nearest[rows[first]] = cols[first]
+        return nearest
@@ -0,0 +1,144 @@
+# swarm.spatial.ghosts
+# Ghost copies of the points near the edges of the periodic world
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 22:26:51 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: ghosts.py [] benjamin@bengfort.com $
+
+"""
+Ghost copies of the points near the edges of the periodic world.
+
+The default boundary mode wraps every displacement to the nearest periodic
+image (see minimal_image), which compares every pair against half of the
+world on both axes although most pairs are nowhere near an edge. With the
+ghost boundary mode the points within the cutoff of an edge are copied,
+once per tick, to the opposite side of the world (points near a corner are
+copied three times). Pairs are then found with plain Euclidean distances
+on the padded points and mapped back to the points that own the copies.
+
+Every pair is found between a point and either another point or the ghost
+that is nearest to it, and every ghost remembers the shift it was copied
+with: the displacement of a pair is the difference of the two owners plus
+that shift, with no comparisons at all. The shift is exactly the multiple
+of the world size that minimal_image would add, so the pair table is
+identical to the one of the default boundary mode.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import numpy as np
+
+from pairwise import PairTable, half_size
+from backends import SLACK, spans
+
+##########################################################################
+## Module Constants
+##########################################################################
+
+WRAP       = "wrap"     # Wrap every displacement to the nearest image
+GHOSTS     = "ghosts"   # Pad the edges of the world with ghost copies
+BOUNDARIES = (WRAP, GHOSTS)
+
+##########################################################################
+## Ghost Padding
+##########################################################################
+
+class GhostPadding(object):
+    """
+    Pads the points of a periodic world of the given size with the ghost
+    copies of the points within a margin of the edges, and computes the
+    PairTable of the points from the padded points.
+    """
+
+    def __init__(self, size):
+        self.size = tuple(size)
+        self.half = half_size(size)
+
+        # Statistics of the ghosts that were created
+        self.tables = 0
+        self.ghosts = 0
+
+    def __repr__(self):
+        return "<GhostPadding %i ghosts in %i tables>" % (self.ghosts, self.tables)
+
+    def pad(self, points, margin):
+        """
+        Returns the padded points, the index of the point that owns each of
+        them and the shift each was copied with. The first len(points) of
+        the padded points are the points themselves with a zero shift.
+        """
+        padded = points
+        owners = np.arange(len(points))
+        shifts = np.zeros_like(points)
+
+        # Copying along y after x also copies the corners
+        for dim in xrange(2):
+            coords = padded[:, dim]
+            for edge, shift in ((coords < margin, self.size[dim]), (coords > self.size[dim] - margin, -self.size[dim])):
+                copies = np.flatnonzero(edge)
+                ghosts = padded[copies]
+                moved  = shifts[copies]
+                ghosts[:, dim] += shift
+                moved[:, dim]  += shift
+
+                padded = np.concatenate((padded, ghosts))
+                owners = np.concatenate((owners, owners[copies]))
+                shifts = np.concatenate((shifts, moved))
+
+        return padded, owners, shifts
+
+    def candidates(self, points, cutoff):
+        """
+        Returns the candidate pairs (first, second) of the points with
+        first < second, and the shift of the image of second that is within
+        the cutoff of first, found by sorting and sweeping the padded points.
+        """
+        count = len(points)
+        reach = cutoff + SLACK
+        padded, owners, shifts = self.pad(points, reach)
+        self.ghosts += len(padded) - count
+
+        # Pairs of padded points within the reach along x, then along y
+        order = np.argsort(padded[:, 0], kind='mergesort')
+        xs    = padded[order, 0]
+        near, far = spans(np.arange(1, len(xs) + 1), np.searchsorted(xs, xs + reach, 'right'))
+        near, far = order[near], order[far]
+        close = np.abs(padded[far, 1] - padded[near, 1]) <= reach
+        near, far = near[close], far[close]
+
+        # Keep each pair once, from the point that owns the smaller index to
+        # the point or ghost owned by the other; pairs of ghosts are copies
+        forward  = (near < count) & (owners[near] < owners[far])
+        backward = (far < count) & (owners[far] < owners[near])
+        keep     = forward | backward
+        forward  = forward[keep]
+        near, far = near[keep], far[keep]
+
+        first  = np.where(forward, near, far)
+        second = np.where(forward, owners[far], owners[near])
+        shift  = np.where(forward[:, np.newaxis], shifts[far], shifts[near])
+        return first, second, shift
+
+    def table(self, points, cutoff):
+        """
+        Returns the PairTable of the points within the cutoff. In worlds
+        that are not more than twice as wide as the cutoff a point can have
+        two images within the cutoff, so their pairs are wrapped as usual.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        self.tables += 1
+        if cutoff >= self.half.min():
+            return PairTable(points, self.size, cutoff)
+
+        first, second, shift = self.candidates(points, cutoff)
+        delta = points[second] - points[first]
+        delta += shift
+        dist2 = (delta*delta).sum(-1)
+        keep  = dist2 <= cutoff * cutoff
+        return PairTable.from_pairs(len(points), cutoff, first[keep], second[keep], delta[keep], dist2[keep])
@@ -0,0 +1,123 @@
+# swarm.spatial.grid
+# A uniform grid spatial hash (cell list) for the periodic world
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 10:31:15 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: grid.py [] benjamin@bengfort.com $
+
+"""
+A uniform grid spatial hash (cell list) for the periodic world.
+
+The world is divided into cells that are at least as wide as the largest
+radius that will be queried, so every point within that radius of a query
+point lies in the 3x3 block of cells around it. Cells on the boundary of
+the world wrap around to the opposite side, like the world itself.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import math
+import numpy as np
+
+from collections import defaultdict
+
+##########################################################################
+## Cell List
+##########################################################################
+
+class CellList(object):
+    """
+    Hashes items (usually the index of an agent in the world) into the
+    cells of a uniform grid over a periodic world of the given size.
+    """
+
+    def __init__(self, size, radius):
+        """
+        Creates a grid over a world of size (width, height) whose cells
+        are at least radius wide in both directions.
+        """
+        self.size   = size
+        self.shape  = tuple(max(1, int(dim // radius)) if radius else 1 for dim in size)
+        self.width  = tuple(float(dim) / cells for dim, cells in zip(size, self.shape))
+        self.cells  = defaultdict(list)
+
+    def __len__(self):
+        return sum(len(items) for items in self.cells.values())
+
+    def cell(self, point):
+        """
+        Returns the (column, row) of the cell that contains the point.
+        """
+        return (
+            int(point[0] // self.width[0]) % self.shape[0],
+            int(point[1] // self.width[1]) % self.shape[1],
+        )
+
+    def insert(self, item, point):
+        """
+        Adds the item to the cell that contains the point.
+        """
+        self.cells[self.cell(point)].append(item)
+
+    def block(self, point, radius=None):
+        """
+        Returns the cells that must be inspected to find every item within
+        the radius of the point: the 3x3 block around the point's cell when
+        the radius fits in one cell, more rings of cells otherwise.
+        """
+        return self.around(self.cell(point), radius)
+
+    def around(self, key, radius=None):
+        """
+        Returns the block of cells around the cell with the given key.
+        Cells across the periodic boundary are wrapped, and are only
+        returned once even if the grid is narrower than the block.
+        """
+        column, row = key
+        rings = [1, 1]
+        if radius is not None:
+            rings = [max(1, int(math.ceil(radius / width))) for width in self.width]
+
+        columns = set((column + dx) % self.shape[0] for dx in xrange(-rings[0], rings[0]+1))
+        rows    = set((row + dy) % self.shape[1] for dy in xrange(-rings[1], rings[1]+1))
+        return [(x, y) for x in columns for y in rows]
+
+    def nearby(self, point, radius=None):
+        """
+        Returns the sorted list of items in the block of cells around the
+        point; these are candidates that may be within the radius and still
+        need to be checked against the exact distance.
+        """
+        items = []
+        for key in self.block(point, radius):
+            if key in self.cells:
+                items.extend(self.cells[key])
+        items.sort()
+        return items
+
+    def pairs(self):
+        """
+        Returns two integer arrays (first, second) of the candidate pairs
+        of items in neighboring cells, where first < second so that every
+        unordered pair is only returned once. Items must be integers.
+        """
+        firsts  = [np.zeros(0, dtype=np.intp)]
+        seconds = [np.zeros(0, dtype=np.intp)]
+
+        for key, owners in self.cells.iteritems():
+            candidates = []
+            for other in self.around(key):
+                candidates.extend(self.cells.get(other, ()))
+
+            owners, candidates = np.meshgrid(owners, candidates, indexing='ij')
+            keep = owners < candidates
+            firsts.append(owners[keep])
+            seconds.append(candidates[keep])
+
+        return np.concatenate(firsts).astype(np.intp), np.concatenate(seconds).astype(np.intp)
@@ -0,0 +1,151 @@
+# swarm.spatial.pairwise
+# Per-tick minimal image displacements between every interacting pair
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 11:20:43 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: pairwise.py [] benjamin@bengfort.com $
+
+"""
+Per-tick minimal image displacements between every interacting pair.
+
+Rather than calling relative_pos pairwise from every velocity component
+and every state machine check, the displacement, squared distance and
+bearing (the unit direction) of every pair of agents is computed once per
+tick in a single vectorized pass. Each unordered pair is only computed
+once; the displacement from j to i is the negation of that from i to j.
+
+The PairTable is a sparse, row-compressed table of the pairs within a
+cutoff radius: particles of the reference engine walk their own row while
+the array engine works on every entry at once.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import numpy as np
+
+from swarm.vectors import VectorArray
+
+##########################################################################
+## Helper functions
+##########################################################################
+
+def unit(vectors):
+    """
+    Returns the unit vectors of an array of vectors along the last axis,
+    where vectors of length zero are left as zero vectors.
+    """
+    return VectorArray.arr(vectors).unit.view(np.ndarray)
+
+def minimal_image(delta, size, half):
+    """
+    Wraps an array of displacements (last axis x, y) in place so that
+    every displacement points at the nearest periodic image.
+    """
+    delta -= size * (delta > half)
+    delta += size * (delta < -half)
+    return delta
+
+def half_size(size):
+    """
+    Returns the half of the world size that triggers wrapping, using the
+    same (integer) division as Particle.relative_pos.
+    """
+    return np.array([dim / 2 for dim in size], dtype=float)
+
+##########################################################################
+## Sparse pair table
+##########################################################################
+
+class PairTable(object):
+    """
+    The displacements of every pair of points within the cutoff radius of
+    each other, stored by row: the neighbors of point i are the entries in
+    the slice row(i), sorted by the index of the neighbor.
+
+        rows[k]   the point i that the entry belongs to
+        delta[k]  the displacement from point i to neighbor cols[k]
+        dist2[k]  the squared length of delta[k]
+        unit[k]   the bearing of the neighbor, the unit vector of delta[k]
+    """
+
+    def __init__(self, points, size, cutoff, cells=None):
+        """
+        Computes the table from an (N, 2) array of points in a periodic
+        world. Candidate pairs come from the cell list if one is given,
+        otherwise every pair of points is a candidate.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        count  = len(points)
+
+        if cells is not None:
+            first, second = cells.pairs()
+        else:
+            first, second = np.triu_indices(count, 1)
+
+        # Compute the displacement of every unordered pair exactly once
+        delta = points[second] - points[first]
+        minimal_image(delta, np.asarray(size, dtype=float), half_size(size))
+        dist2 = (delta*delta).sum(-1)
+
+        if cutoff is not None:
+            keep   = dist2 <= cutoff * cutoff
+            first  = first[keep]
+            second = second[keep]
+            delta  = delta[keep]
+            dist2  = dist2[keep]
+
+        self.mirror(count, cutoff, first, second, delta, dist2)
+
+    @classmethod
+    def from_pairs(klass, count, cutoff, first, second, delta, dist2):
+        """
+        Creates a table of count points from the displacements (and their
+        squared lengths) of unordered pairs that were already computed.
+        """
+        table = klass.__new__(klass)
+        table.mirror(count, cutoff, first, second, delta, dist2)
+        return table
+
+    def mirror(self, count, cutoff, first, second, delta, dist2):
+        """
+        Mirrors the unordered pairs so that every point has its own row.
+        """
+        bearing = unit(delta)
+        rows  = np.concatenate((first, second))
+        cols  = np.concatenate((second, first))
+        order = np.lexsort((cols, rows))
+
+        self.size   = count
+        self.cutoff = cutoff
+        self.rows   = rows[order]
+        self.cols   = cols[order]
+        self.delta  = np.concatenate((delta, -delta))[order]
+        self.dist2  = np.concatenate((dist2, dist2))[order]
+        self.unit   = np.concatenate((bearing, -bearing))[order]
+        self.indptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=count))))
+
+    def __len__(self):
+        return len(self.cols)
+
+    def row(self, idx):
+        """
+        Returns the slice of the entries for the neighbors of point idx.
+        """
+        return slice(self.indptr[idx], self.indptr[idx+1])
+
+    def find(self, idx, other):
+        """
+        Returns the entry of the pair (idx, other) or None if the pair is
+        not within the cutoff of each other.
+        """
+        start, stop = self.indptr[idx], self.indptr[idx+1]
+        entry = start + np.searchsorted(self.cols[start:stop], other)
+        if entry < stop and self.cols[entry] == other:
+            return entry
+        return None
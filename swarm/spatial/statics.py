@@ -0,0 +1,154 @@
+# swarm.spatial.statics
+# A spatial index of the static resources, built once per world
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 14:02:55 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: statics.py [] benjamin@bengfort.com $
+
+"""
+A spatial index of the static resources, built once per world.
+
+The homes and the deposits never move, so rather than hashing them into
+the cell list and pair table of the agents every tick, they are indexed
+once. For every cell of a uniform grid the index stores the resources in
+the 3x3 block around the cell along with the periodic image of each that
+is nearest to the cell, so that the displacement from a query point to a
+nearby resource is a single subtraction without any wrapping.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import numpy as np
+
+from grid import CellList
+from pairwise import PairTable, unit, minimal_image, half_size
+
+##########################################################################
+## Static Index
+##########################################################################
+
+class StaticIndex(object):
+    """
+    Indexes the (R, 2) positions of static points in a periodic world of
+    the given size for queries of up to the given radius.
+    """
+
+    def __init__(self, points, size, radius):
+        self.points = np.asarray(points, dtype=float).reshape(-1, 2)
+        self.size   = np.asarray(size, dtype=float)
+        self.half   = half_size(size)
+        self.radius = radius
+        self.grid   = CellList(size, radius)
+        self.shape  = np.array(self.grid.shape)
+        self.width  = np.array(self.grid.width)
+
+        for idx, point in enumerate(self.points):
+            self.grid.insert(idx, point)
+
+        # Images are only unambiguous if the block doesn't wrap onto itself
+        self.wrapped = bool((self.shape < 3).any())
+
+        # Candidates of every cell in row-compressed form, with the image of
+        # every candidate that is nearest to the center of the cell
+        candidates = []
+        images     = []
+        indptr     = [0]
+        for column in xrange(self.shape[0]):
+            for row in xrange(self.shape[1]):
+                members = np.array(sorted(self.grid.nearby(self.center(column, row))), dtype=np.intp)
+                center  = np.array(self.center(column, row))
+                offsets = self.points[members] - center
+                minimal_image(offsets, self.size, self.half)
+                candidates.append(members)
+                images.append(center + offsets)
+                indptr.append(indptr[-1] + len(members))
+
+        self.candidates = np.concatenate(candidates).astype(np.intp)
+        self.images     = np.concatenate(images).reshape(-1, 2)
+        self.indptr     = np.array(indptr, dtype=np.intp)
+
+    def __len__(self):
+        return len(self.points)
+
+    def center(self, column, row):
+        """
+        Returns the center point of a cell of the grid.
+        """
+        return ((column + 0.5) * self.width[0], (row + 0.5) * self.width[1])
+
+    def cells(self, points):
+        """
+        Returns the flat index of the cell of each of the (N, 2) points.
+        """
+        cells = np.floor(points / self.width).astype(np.intp) % self.shape
+        return cells[:, 0] * self.shape[1] + cells[:, 1]
+
+    def within(self, points, radius=None):
+        """
+        Returns a StaticTable of every static point within the radius of
+        each of the (N, 2) query points, e.g. of the deposits in sight of
+        every agent. The radius defaults to (and can't exceed) the radius
+        of the index, larger radii fall back to inspecting every point.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        radius = self.radius if radius is None else radius
+
+        if radius > self.radius:
+            rows, cols = np.indices((len(points), len(self.points)))
+            rows, cols = rows.ravel(), cols.ravel()
+            delta = self.points[cols] - points[rows]
+            minimal_image(delta, self.size, self.half)
+        else:
+            # Expand the candidates of the cell of every query point
+            cells  = self.cells(points)
+            starts = self.indptr[cells]
+            counts = self.indptr[cells + 1] - starts
+            rows   = np.repeat(np.arange(len(points)), counts)
+            offset = np.repeat(starts - np.cumsum(counts) + counts, counts)
+            entries = np.arange(counts.sum()) + offset
+
+            cols  = self.candidates[entries]
+            delta = self.images[entries] - points[rows]
+            if self.wrapped:
+                minimal_image(delta, self.size, self.half)
+
+        dist2 = (delta*delta).sum(-1)
+        keep  = dist2 <= radius * radius
+        return StaticTable(len(points), rows[keep], cols[keep], delta[keep], dist2[keep], radius)
+
+    def nearby(self, point, radius=None):
+        """
+        Returns the sorted indices of the static points within the radius
+        of a single point.
+        """
+        return list(self.within([point], radius).cols)
+
+##########################################################################
+## Static Table
+##########################################################################
+
+class StaticTable(PairTable):
+    """
+    The displacements from each of N query points to the static points
+    within a radius, with the row-compressed layout of the PairTable: the
+    static points near query point i are the entries in row(i), sorted by
+    the index of the static point.
+    """
+
+    def __init__(self, count, rows, cols, delta, dist2, cutoff):
+        order = np.lexsort((cols, rows))
+
+        self.size   = count
+        self.cutoff = cutoff
+        self.rows   = rows[order]
+        self.cols   = cols[order]
+        self.delta  = delta[order]
+        self.dist2  = dist2[order]
+        self.unit   = unit(self.delta)
+        self.indptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=count)))).astype(np.intp)
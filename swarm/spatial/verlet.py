@@ -0,0 +1,131 @@
+# swarm.spatial.verlet
+# Verlet neighbor lists of the moving agents with a skin distance
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 20:41:09 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: verlet.py [] benjamin@bengfort.com $
+
+"""
+Verlet neighbor lists of the moving agents with a skin distance.
+
+Agents move at most the maximum velocity per tick, so the pairs that are
+within the cutoff of each other change slowly. A VerletList keeps the
+candidate pairs within the cutoff plus a skin distance, found with a
+spatial index, and every tick only computes the displacements of those
+candidates.
+The candidates are rebuilt once the points could have moved far enough
+for a pair outside of the list to come within the cutoff: every pair
+within the cutoff now was within the cutoff plus twice the largest
+(minimal image) displacement of any point when the list was built. The
+pair table of every tick is exactly the one a full search would find.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import numpy as np
+
+from grid import CellList
+from pairwise import PairTable, minimal_image, half_size
+
+##########################################################################
+## Verlet List
+##########################################################################
+
+class VerletList(object):
+    """
+    The candidate pairs of the points of a periodic world of the given
+    size within a radius of the cutoff plus the skin. The candidates are
+    also rebuilt every period ticks if a period is given. They are found
+    with a cell list, or with the spatial index returned by index(points,
+    radius) if given (see World.build_index).
+    """
+
+    def __init__(self, size, skin, period=None, index=None):
+        self.size   = np.asarray(size, dtype=float)
+        self.half   = half_size(size)
+        self.skin   = float(skin)
+        self.period = period
+        self.index  = index
+
+        self.radius = None      # The radius the candidates were built with
+        self.origin = None      # The points when the candidates were built
+        self.first  = None      # The candidate pairs, first < second
+        self.second = None
+        self.age    = 0         # Ticks since the candidates were built
+
+        # Statistics of how often the candidates were rebuilt
+        self.builds  = 0
+        self.queries = 0
+
+    def __len__(self):
+        return len(self.first) if self.first is not None else 0
+
+    def __repr__(self):
+        return "<VerletList of %i pairs (%i builds in %i queries)>" % (len(self), self.builds, self.queries)
+
+    def displacement(self, points):
+        """
+        Returns the largest minimal image displacement of any point since
+        the candidates were built.
+        """
+        delta = minimal_image(points - self.origin, self.size, self.half)
+        return np.sqrt((delta*delta).sum(-1).max()) if len(delta) else 0.0
+
+    def stale(self, points, cutoff):
+        """
+        True if the candidates may be missing pairs within the cutoff of the
+        points, or if they are due to be rebuilt.
+        """
+        if self.first is None or len(points) != len(self.origin):
+            return True
+        if self.period is not None and self.age >= self.period:
+            return True
+        return cutoff + 2 * self.displacement(points) > self.radius
+
+    def build(self, points, radius):
+        """
+        Finds the candidate pairs of the points within the radius.
+        """
+        if self.index is not None:
+            cells = self.index(points, radius)
+        else:
+            cells = CellList(self.size, radius)
+            for idx, point in enumerate(points):
+                cells.insert(idx, point)
+        first, second = cells.pairs()
+
+        delta = minimal_image(points[second] - points[first], self.size, self.half)
+        keep  = (delta*delta).sum(-1) <= radius * radius
+
+        self.radius = radius
+        self.origin = points.copy()
+        self.first  = first[keep]
+        self.second = second[keep]
+        self.age    = 0
+        self.builds += 1
+
+    def table(self, points, cutoff, bound=None):
+        """
+        Returns the PairTable of the points within the cutoff, rebuilding the
+        candidates first if they are stale. The candidates are built with the
+        largest cutoff that will be asked for (the bound, if given) plus the
+        skin, so that smaller cutoffs reuse them.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        if self.stale(points, cutoff):
+            self.build(points, max(cutoff, bound or 0.0) + self.skin)
+
+        self.age     += 1
+        self.queries += 1
+
+        first, second = self.first, self.second
+        delta = minimal_image(points[second] - points[first], self.size, self.half)
+        dist2 = (delta*delta).sum(-1)
+        keep  = dist2 <= cutoff * cutoff
+        return PairTable.from_pairs(len(points), cutoff, first[keep], second[keep], delta[keep], dist2[keep])
@@ -0,0 +1,327 @@
+# swarm.trace
+# Structured traces of the events of a simulation
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 19:40:17 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: trace.py [] benjamin@bengfort.com $
+
+"""
+Structured traces of the events of a simulation.
+
+A Trace records the state transitions, the mining and dropping of
+resources and the stuns of the agents of a world into a preallocated ring
+buffer of fixed size records (and optionally the full state of every
+agent whose position, velocity or state changed). The events are found by
+comparing the state of the world before and after each tick, so tracing
+works the same with either engine and the particles never check whether
+they are traced: a world without a trace pays a single check per tick.
+
+Traces can be restricted to some agents and to a range of ticks, queried
+with the same filters, and written to and read from a compressed npz file.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import numpy as np
+
+from StringIO import StringIO
+from collections import namedtuple
+from swarm.exceptions import *
+from swarm.engine import STATES, STUNNED_CODE
+
+##########################################################################
+## Module Constants
+##########################################################################
+
+## Kinds of events, the index of the kind is stored in the record
+TRANSITION = "transition"   # The state of the agent changed
+STUN       = "stun"         # The agent was stunned by an enemy
+MINE       = "mine"         # The agent mined its target
+DROP       = "drop"         # The agent dropped its load at its target
+DIFF       = "diff"         # The full state of the agent (if diffs are traced)
+EVENTS     = (TRANSITION, STUN, MINE, DROP, DIFF)
+
+## The number of records kept by default
+CAPACITY   = 65536
+
+## A fixed size record of the ring buffer; states are indices into STATES
+## and resources are the slots of the static resources (-1 for none)
+RECORD = np.dtype([
+    ('tick',     np.int64),
+    ('agent',    np.int32),
+    ('event',    np.int8),
+    ('before',   np.int8),
+    ('after',    np.int8),
+    ('resource', np.int32),
+    ('loaded',   np.bool_),
+    ('pos',      np.float64, (2,)),
+    ('vel',      np.float64, (2,)),
+])
+
+## A readable record, see Trace.events
+Event = namedtuple('Event', 'tick agent event before after resource loaded pos vel')
+
+##########################################################################
+## Observations
+##########################################################################
+
+def observe(world, motion=False):
+    """
+    Returns the states, loaded flags and target slots of the moving agents
+    of the world (and their positions and velocities if motion is True),
+    in the order of `world.dynamic`, with either engine.
+    """
+    if world.arrays is not None:
+        engine = world.arrays
+        observed = {
+            'state':  engine.state.copy(),
+            'loaded': engine.loaded.copy(),
+            'target': engine.target.copy(),
+        }
+        if motion:
+            observed['pos'] = engine.pos.copy()
+            observed['vel'] = engine.vel.copy()
+        return observed
+
+    codes  = dict((state, code) for code, state in enumerate(STATES))
+    agents = world.dynamic
+    observed = {
+        'state':  np.array([codes[agent.state] for agent in agents], dtype=np.int8),
+        'loaded': np.array([agent.loaded for agent in agents], dtype=bool),
+        'target': np.array([agent.target.slot if agent.target is not None else -1 for agent in agents], dtype=np.intp),
+    }
+    if motion:
+        observed['pos'] = np.array([tuple(agent.pos) for agent in agents], dtype=float).reshape(-1, 2)
+        observed['vel'] = np.array([tuple(agent.vel) for agent in agents], dtype=float).reshape(-1, 2)
+    return observed
+
+##########################################################################
+## Trace
+##########################################################################
+
+class Trace(object):
+    """
+    A ring buffer of the events of a world, which keeps the most recent
+    `capacity` records. Only the agents with the given identifiers and the
+    ticks in the half open range [start, stop) are traced (all of them by
+    default); if diffs is True the full state of every traced agent that
+    changed is recorded every tick as well.
+
+    A trace is attached to a world with World.start_trace (or by creating
+    the world with debug set) and is fed by World.update.
+    """
+
+    def __init__(self, capacity=CAPACITY, agents=None, ticks=None, diffs=False):
+        if capacity < 1:
+            raise ImproperlyConfigured("A trace must hold at least one record")
+
+        self.capacity = capacity
+        self.agents   = set(agents) if agents is not None else None
+        self.ticks    = ticks
+        self.diffs    = diffs
+        self.buffer   = np.zeros(capacity, dtype=RECORD)
+        self.written  = 0       # Records written since the trace was created
+
+        # The identifiers of the agents and resources of the traced world
+        self.identifiers = []
+        self.resources   = []
+        self.mask        = None
+        self._before     = None
+
+    def __len__(self):
+        return min(self.written, self.capacity)
+
+    def __repr__(self):
+        return "<Trace of %i records (%i dropped)>" % (len(self), self.dropped)
+
+    @property
+    def dropped(self):
+        """
+        The number of records that were overwritten by newer records.
+        """
+        return max(0, self.written - self.capacity)
+
+    def bind(self, world):
+        """
+        Attaches the trace to the agents and resources of a world.
+        """
+        self.identifiers = [agent.idx for agent in world.dynamic]
+        self.resources   = [resource.idx for resource in world.static]
+        if self.agents is None:
+            self.mask = None
+        else:
+            self.mask = np.array([idx in self.agents for idx in self.identifiers], dtype=bool)
+        self._before = None
+        return self
+
+    def tracing(self, tick):
+        """
+        True if the tick is within the traced range of ticks.
+        """
+        if self.ticks is None:
+            return True
+        start, stop = self.ticks
+        return (start is None or tick >= start) and (stop is None or tick < stop)
+
+    ##////////////////////////////////////////////////////////////////////
+    ## Recording
+    ##////////////////////////////////////////////////////////////////////
+
+    def before(self, world):
+        """
+        Observes the world before it is updated, if the tick it is about to
+        advance to is traced.
+        """
+        self._before = observe(world, self.diffs) if self.tracing(world.time + 1) else None
+
+    def after(self, world):
+        """
+        Records the events of the tick that the world was just updated by,
+        comparing it against the observation made before the update.
+        """
+        before = self._before
+        if before is None:
+            return
+
+        after   = observe(world, self.diffs)
+        changed = before['state'] != after['state']
+        stunned = changed & (after['state'] == STUNNED_CODE)
+        kinds   = (
+            (TRANSITION, changed & ~stunned),
+            (STUN,       stunned),
+            (MINE,       ~before['loaded'] & after['loaded']),
+            (DROP,       before['loaded'] & ~after['loaded']),
+        )
+
+        if self.diffs:
+            moved = (before['pos'] != after['pos']).any(-1) | (before['vel'] != after['vel']).any(-1)
+            kinds += ((DIFF, moved | changed | (before['target'] != after['target'])),)
+
+        for kind, mask in kinds:
+            if self.mask is not None:
+                mask = mask & self.mask
+            agents = np.flatnonzero(mask)
+            if not len(agents): continue
+
+            records = np.zeros(len(agents), dtype=RECORD)
+            records['tick']   = world.time
+            records['agent']  = agents
+            records['event']  = EVENTS.index(kind)
+            records['before'] = before['state'][agents]
+            records['after']  = after['state'][agents]
+            records['loaded'] = after['loaded'][agents]
+
+            # Mining and drops happen at the target the agent had before
+            target = before['target'] if kind in (MINE, DROP) else after['target']
+            records['resource'] = target[agents]
+
+            if self.diffs:
+                records['pos'] = after['pos'][agents]
+                records['vel'] = after['vel'][agents]
+            self.append(records)
+
+        self._before = None
+
+    def append(self, records):
+        """
+        Writes records into the ring buffer, overwriting the oldest ones.
+        """
+        records = records[-self.capacity:]
+        slots   = (self.written + np.arange(len(records))) % self.capacity
+        self.buffer[slots] = records
+        self.written += len(records)
+
+    ##////////////////////////////////////////////////////////////////////
+    ## Queries
+    ##////////////////////////////////////////////////////////////////////
+
+    def records(self, agents=None, ticks=None, events=None):
+        """
+        Returns the records in the order they were written, filtered by the
+        identifiers of the agents, a [start, stop) range of ticks and the
+        kinds of events.
+        """
+        if self.written > self.capacity:
+            start   = self.written % self.capacity
+            records = np.concatenate((self.buffer[start:], self.buffer[:start]))
+        else:
+            records = self.buffer[:self.written]
+
+        keep = np.ones(len(records), dtype=bool)
+        if agents is not None:
+            agents = set(agents)
+            slots  = [slot for slot, idx in enumerate(self.identifiers) if idx in agents]
+            keep &= np.in1d(records['agent'], slots)
+        if ticks is not None:
+            start, stop = ticks
+            if start is not None: keep &= records['tick'] >= start
+            if stop is not None:  keep &= records['tick'] < stop
+        if events is not None:
+            keep &= np.in1d(records['event'], [EVENTS.index(kind) for kind in events])
+        return records[keep]
+
+    def events(self, **filters):
+        """
+        Yields the filtered records (see records) as readable Events with
+        the identifiers of the agents and resources and the names of the
+        kinds of events and of the states.
+        """
+        for record in self.records(**filters):
+            resource = self.resources[record['resource']] if record['resource'] >= 0 else None
+            pos = tuple(record['pos']) if self.diffs else None
+            vel = tuple(record['vel']) if self.diffs else None
+            yield Event(
+                int(record['tick']), self.identifiers[record['agent']],
+                EVENTS[record['event']], STATES[record['before']], STATES[record['after']],
+                resource, bool(record['loaded']), pos, vel,
+            )
+
+    ##////////////////////////////////////////////////////////////////////
+    ## Serialization
+    ##////////////////////////////////////////////////////////////////////
+
+    def dumps(self):
+        """
+        Returns the records of the trace as a compressed binary string.
+        """
+        stream = StringIO()
+        np.savez_compressed(
+            stream, records=self.records(), identifiers=np.array(self.identifiers),
+            resources=np.array(self.resources), diffs=np.array(self.diffs),
+        )
+        return stream.getvalue()
+
+    @classmethod
+    def loads(klass, data):
+        """
+        Loads a trace from a binary string created by dumps; the trace holds
+        exactly the records that were written out.
+        """
+        with np.load(StringIO(data)) as arrays:
+            records = arrays['records']
+            trace = klass(capacity=max(len(records), 1), diffs=bool(arrays['diffs']))
+            trace.identifiers = arrays['identifiers'].tolist()
+            trace.resources   = arrays['resources'].tolist()
+            trace.append(records)
+            return trace
+
+    def dump_file(self, path):
+        """
+        Writes the binary trace out to a file.
+        """
+        with open(path, 'wb') as out:
+            out.write(self.dumps())
+
+    @classmethod
+    def load_file(klass, path):
+        """
+        Loads a binary trace from a file.
+        """
+        with open(path, 'rb') as data:
+            return klass.loads(data.read())
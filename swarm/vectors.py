@@ -40,6 +40,8 @@ class Vector(np.ndarray):
         """
         Constructor to initialze the array view
         """
+        if not isinstance(array, np.ndarray):
+            array = np.asarray(array)
         arr = array.view(klass)
         arr.flags.writeable = False
         return arr
@@ -59,13 +61,14 @@ class Vector(np.ndarray):
         return klass.arr(np.array(coords))
 
     @classmethod
-    def rand(klass, low, high=None):
+    def rand(klass, low, high=None, random=np.random):
         """
         Construct a random integer vector with values in the range from
         low to high, unless high is None, then from 0 to low. The default
         shape of this vector is 2 (for 2 dimensional particle physics).
+        Draws from the given RandomState, or the global one by default.
         """
-        return klass.arr(np.random.randint(low, high, size=2))
+        return klass.arr(random.randint(low, high, size=2))
 
     ##////////////////////////////////////////////////////////////////////
     ## Vector computation on the array
@@ -130,7 +133,7 @@ class Vector(np.ndarray):
         def angle_radians(self, other):
             angle = np.arccos(np.dot(self.unit, other.unit))
             if np.isnan(angle):
-                if (self.unit==other.unit).all():
+                if self.unit == other.unit:
                     return 0.0
                 return np.pi
             return angle
@@ -166,6 +169,387 @@ class Vector(np.ndarray):
     def __ne__(self, other):
         return not self == other
 
+##########################################################################
+## Vec2 Class
+##########################################################################
+
+class Vec2(object):
+    """
+    A lightweight, immutable 2D vector with the same API as Vector, whose
+    coordinates are Python floats. Arithmetic on two floats is many times
+    faster than dispatching a ufunc on a two element array, which is what
+    the object per agent reference engine spends its time doing.
+
+    Vec2 behaves like a sequence of two floats (and converts to an array)
+    so NumPy functions such as np.average and np.cross still accept it.
+
+    Note that like Vector, a Vec2 MUST be treated as readonly.
+    """
+
+    __slots__ = ('x', 'y')
+
+    def __init__(self, x=0.0, y=0.0):
+        self.x = float(x)
+        self.y = float(y)
+
+    def __reduce__(self):
+        return (self.__class__, (self.x, self.y))
+
+    ##////////////////////////////////////////////////////////////////////
+    ## Class method "constructors" of various types
+    ##////////////////////////////////////////////////////////////////////
+
+    @classmethod
+    def arr(klass, array):
+        """
+        Constructor from an array or any other sequence of two numbers
+        """
+        return klass(array[0], array[1])
+
+    @classmethod
+    def zero(klass):
+        """
+        Construct a zero vector
+        """
+        return klass(0.0, 0.0)
+
+    @classmethod
+    def arrp(klass, *coords):
+        """
+        Constructor to initialize from the coordinates
+        """
+        return klass(*coords)
+
+    @classmethod
+    def rand(klass, low, high=None, random=np.random):
+        """
+        Construct a random integer vector with values in the range from
+        low to high, unless high is None, then from 0 to low.
+        """
+        return klass.arr(random.randint(low, high, size=2))
+
+    ##////////////////////////////////////////////////////////////////////
+    ## Sequence and array protocols
+    ##////////////////////////////////////////////////////////////////////
+
+    def __len__(self):
+        return 2
+
+    def __getitem__(self, idx):
+        return (self.x, self.y)[idx]
+
+    def __iter__(self):
+        yield self.x
+        yield self.y
+
+    def __array__(self, dtype=None):
+        return np.array((self.x, self.y), dtype=dtype)
+
+    def __repr__(self):
+        return "Vec2(%r, %r)" % (self.x, self.y)
+
+    ##////////////////////////////////////////////////////////////////////
+    ## Arithmetic
+    ##////////////////////////////////////////////////////////////////////
+
+    def __add__(self, other):
+        return Vec2(self.x + other[0], self.y + other[1])
+
+    def __radd__(self, other):
+        return Vec2(other[0] + self.x, other[1] + self.y)
+
+    def __sub__(self, other):
+        return Vec2(self.x - other[0], self.y - other[1])
+
+    def __rsub__(self, other):
+        return Vec2(other[0] - self.x, other[1] - self.y)
+
+    def __mul__(self, scalar):
+        return Vec2(self.x * scalar, self.y * scalar)
+
+    def __rmul__(self, scalar):
+        return Vec2(scalar * self.x, scalar * self.y)
+
+    def __div__(self, scalar):
+        return Vec2(self.x / scalar, self.y / scalar)
+
+    __truediv__ = __div__
+
+    def __neg__(self):
+        return Vec2(-self.x, -self.y)
+
+    ##////////////////////////////////////////////////////////////////////
+    ## Vector computation on the floats
+    ##////////////////////////////////////////////////////////////////////
+
+    @property
+    def unit(self):
+        """
+        Returns the unit vector (length 1) of this vector
+        """
+        length = self.length
+        if length > 0:
+            return Vec2(self.x / length, self.y / length)
+        return Vec2(0.0, 0.0)
+
+    @property
+    def length(self):
+        """
+        Compute the length of the vector
+        """
+        return math.sqrt(self.x*self.x + self.y*self.y)
+
+    @property
+    def length2(self):
+        """
+        Compute the squared length of the vector
+        """
+        return self.x*self.x + self.y*self.y
+
+    @property
+    def orthogonal(self):
+        """
+        Returns the unit vector orthogonal in the +z direction
+        """
+        u = self.unit
+        return Vec2(-u.y, u.x)
+
+    def dot(self, other):
+        """
+        Compute the dot product with another vector (or any sequence)
+        """
+        return self.x*other[0] + self.y*other[1]
+
+    def angle(self, other, degrees=True):
+        """
+        Compute the angle between two vectors, like Vector.angle
+        If degrees is true return degrees else radians
+        """
+        u = self.unit
+        v = other.unit
+        cosine = u.x*v.x + u.y*v.y
+        if -1.0 <= cosine <= 1.0:
+            angle = math.acos(cosine)
+        else:
+            angle = 0.0 if u == v else math.pi
+
+        if degrees: return math.degrees(angle)
+        return angle
+
+    def distance(self, other):
+        """
+        Compute the Euclidean distance between two vectors
+        """
+        return math.sqrt(self.distance2(other))
+
+    def distance2(self, other):
+        """
+        Compute the squared Euclidean distance between two vectors
+        """
+        return (self.x-other[0])**2 + (self.y-other[1])**2
+
+    def copy(self):
+        """
+        Returns a copy of this vector
+        """
+        return Vec2(self.x, self.y)
+
+    def __eq__(self, other):
+        """
+        Are two vectors equal? (with the tolerances of np.allclose)
+        """
+        return abs(self.x - other[0]) <= 1e-08 + 1e-05 * abs(other[0]) and \
+               abs(self.y - other[1]) <= 1e-08 + 1e-05 * abs(other[1])
+
+    def __ne__(self, other):
+        return not self == other
+
+##########################################################################
+## VectorArray Class
+##########################################################################
+
+class VectorArray(np.ndarray):
+    """
+    Batched vector computations on an (N, 2) array of vectors (or any
+    array whose last axis holds the x and y coordinates), with the same
+    semantics as the Vector methods applied to every row, including the
+    handling of zero length vectors and of the rounding errors of angle.
+
+    Unlike Vector, a VectorArray is writable so that the engines can
+    update their buffers in place. Vector results are VectorArrays while
+    scalar results (lengths, angles) are plain arrays.
+    """
+
+    ##////////////////////////////////////////////////////////////////////
+    ## Class method "constructors" of various types
+    ##////////////////////////////////////////////////////////////////////
+
+    @classmethod
+    def arr(klass, array):
+        """
+        Constructor from an array or a sequence of vectors (without a copy
+        if the array is already a float array)
+        """
+        return np.asarray(array, dtype=float).view(klass)
+
+    @classmethod
+    def zeros(klass, count):
+        """
+        Construct count zero vectors
+        """
+        return klass.arr(np.zeros((count, 2)))
+
+    @classmethod
+    def polar(klass, radius, theta, center=(0, 0)):
+        """
+        Construct the vectors at the radii and angles (in radians) from the
+        center point.
+        """
+        return klass.arr(np.column_stack((
+            radius * np.cos(theta) + center[0],
+            radius * np.sin(theta) + center[1],
+        )))
+
+    ##////////////////////////////////////////////////////////////////////
+    ## Vector computation on the array
+    ##////////////////////////////////////////////////////////////////////
+
+    @property
+    def x(self):
+        return self.view(np.ndarray)[..., 0]
+
+    @property
+    def y(self):
+        return self.view(np.ndarray)[..., 1]
+
+    @property
+    def length2(self):
+        """
+        Compute the squared length of every vector
+        """
+        vectors = self.view(np.ndarray)
+        return (vectors*vectors).sum(-1)
+
+    @property
+    def length(self):
+        """
+        Compute the length of every vector
+        """
+        return np.sqrt(self.length2)
+
+    @property
+    def unit(self):
+        """
+        Returns the unit vectors, vectors of length zero are left as zero
+        """
+        vectors = self.view(np.ndarray)
+        length  = self.length
+        result  = np.zeros_like(vectors, dtype=float)
+        nonzero = length > 0
+        result[nonzero] = vectors[nonzero] / length[nonzero][..., np.newaxis]
+        return result.view(self.__class__)
+
+    @property
+    def orthogonal(self):
+        """
+        Returns the unit vectors orthogonal in the +z direction
+        """
+        unit = self.unit.view(np.ndarray)
+        return (unit[..., ::-1] * np.array([-1.0, 1.0])).view(self.__class__)
+
+    @property
+    def heading(self):
+        """
+        Returns the direction of every vector in radians from the x axis
+        """
+        return np.arctan2(self.y, self.x)
+
+    def angle(self, other, degrees=True):
+        """
+        Compute the angle between every vector and the other vectors (or a
+        single other vector), like Vector.angle: if rounding errors put the
+        dot product of the units out of range, the angle is zero when the
+        units are close and pi otherwise.
+        """
+        unit  = self.unit.view(np.ndarray)
+        other = VectorArray.arr(other).unit.view(np.ndarray)
+        with np.errstate(invalid='ignore'):
+            angle = np.arccos((unit * other).sum(-1))
+
+        undefined = np.isnan(angle)
+        if undefined.any():
+            close = np.isclose(unit, other).all(-1)
+            angle = np.where(undefined, np.where(close, 0.0, np.pi), angle)
+
+        if degrees: return np.degrees(angle)
+        return angle
+
+    def distance2(self, other):
+        """
+        Compute the squared Euclidean distances to the other vectors
+        """
+        return (self - VectorArray.arr(other)).length2
+
+    def distance(self, other):
+        """
+        Compute the Euclidean distances to the other vectors
+        """
+        return np.sqrt(self.distance2(other))
+
+    def relative_to(self, point, size):
+        """
+        Returns the periodic image of every vector (a position in a world of
+        the given size) that is nearest to the point, like relative_pos.
+        """
+        half  = np.array([dim / 2 for dim in size], dtype=float)
+        size  = np.asarray(size, dtype=float)
+        delta = self.view(np.ndarray) - np.asarray(point, dtype=float)
+        return (self.view(np.ndarray) - size * (delta > half) + size * (delta < -half)).view(self.__class__)
+
+##########################################################################
+## Vision cone helpers
+##########################################################################
+
+## Decimal places of the cosine thresholds, rounded so that exact angles
+## (e.g. perpendicular vectors with a dot product of zero) compare the
+## same way against the threshold as they did against the angle
+COSINE_PLACES  = 12
+
+## Cosines of the whole degrees from 180 down to 0, in ascending order
+DEGREE_COSINES = np.round(np.cos(np.radians(np.arange(180, -1, -1))), COSINE_PLACES)
+
+_view_cosines  = {}
+
+def view_cosine(alpha):
+    """
+    Returns the cosine of half of the vision angle alpha (in degrees, and
+    halved with the same division as Particle.in_sight) such that a unit
+    bearing is in view of a unit heading if their dot product is at least
+    the cosine. Visions of 360 degrees or more return -inf: only the
+    distance matters, so the dot product doesn't have to be computed.
+    """
+    try:
+        return _view_cosines[alpha]
+    except KeyError:
+        half = alpha / 2
+        cosine = float('-inf') if half >= 180 else round(math.cos(math.radians(half)), COSINE_PLACES)
+        return _view_cosines.setdefault(alpha, cosine)
+
+def ceil_supplement(cosine):
+    """
+    Returns ceil(180 - angle) for the angle in degrees whose cosine is
+    given (a scalar or an array) by bisecting the cosines of the whole
+    degrees rather than computing the arccos. Cosines rounded out of the
+    range [-1, 1] are treated as angles of 0 and 180 like Vector.angle.
+    """
+    return np.minimum(np.searchsorted(DEGREE_COSINES, cosine), 180)
+
+## Vector classes that can be selected by the world parameters
+VECTORS = {
+    'ndarray': Vector,
+    'slots':   Vec2,
+}
+
 if __name__ == '__main__':
     v1 = Vector.arr(np.array([2,4]))
     v2 = Vector.arr(np.array([0,1]))
@@ -3,12 +3,28 @@
 import math
 import numpy
 
-try:
-    import pygame
-except ImportError:
-    print "Warning: PyGame required for visual simulations."
+from vectors import VectorArray
+from exceptions import ImproperlyConfigured
+
+# PyGame is only imported once a simulation is visualized
+pygame = None
+
+def import_pygame():
+    """
+    Imports PyGame the first time a simulation is visualized, so that
+    headless simulations and workers never pay for it.
+    """
+    global pygame
+    if pygame is None:
+        try:
+            import pygame as module
+        except ImportError:
+            raise ImproperlyConfigured("PyGame required for visual simulations.")
+        pygame = module
+    return pygame
 
 def visualize(world, screen_size, fps):
+    import_pygame()
     pygame.init()
 
     screen = pygame.display.set_mode(screen_size, 0, 32)
@@ -61,11 +77,11 @@ def update(world):
 def draw(screen, world, ally_0, ally_1, enemy_0, enemy_1, scale, mine_0, mine_1, mine_2, mine_3):
     screen.fill(0xffffffff)
 
-    for agent in world.agents:
-        angle = math.atan2(agent.vel[1], agent.vel[0])
+    headings = VectorArray.arr([agent.vel for agent in world.agents]).heading
+    for agent, angle in zip(world.agents, headings):
 
         # HACK! Kevin- go ahead and fix this!
-        if agent.__class__.__name__ == "ResourceParticle":
+        if agent.team == "mineral":
             if (agent.stash > 50):
                 image = rotation(mine_3, angle)
             elif (agent.stash > 25):
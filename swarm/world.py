@@ -17,11 +17,29 @@ Contains the mechanics and behavior of the world
 ## Imports
 ##########################################################################
 
+import numpy as np
+
+from collections import Counter
 from particle import *
-from vectors import Vector
+from vectors import Vector, VECTORS
 from params import *
+from exceptions import *
+from engine import ArrayEngine
+from spatial import PairTable, StaticIndex, VerletList
+from spatial import AUTO, BACKENDS, IndexStats, BackendSelector, create_index
+from spatial import GHOSTS, BOUNDARIES, GhostPadding, ContactGrid, rivals
+from trace import Trace
+from snapshot import Snapshot
 from distribute import circular_distribute, linear_distribute
 
+##########################################################################
+## Module Constants
+##########################################################################
+
+REFERENCE = "reference"   # One Particle object per agent
+ARRAY     = "array"       # Struct of arrays, see swarm.engine
+ENGINES   = (REFERENCE, ARRAY)
+
 ##########################################################################
 ## Helper functions
 ##########################################################################
@@ -31,7 +49,7 @@ def initialize_particles(**kwargs):
     Initialize N particles in a circular distribution around a center
     point, where N=number. Keyword arguments include a radius from the
     center, an identifier pattern and other keyword arguments that would
-    instantiate a particle.
+    instantiate a particle. Worlds pass their own settings and params.
     """
 
     # Initialize variables needed to do initialization
@@ -42,13 +60,14 @@ def initialize_particles(**kwargs):
     team   = kwargs.get('team', 'ally')
     maxvel = kwargs.get('maximum_velocity', world_parameters.get('maximum_velocity'))
     home   = kwargs.get('home', None)
-    params = kwargs.get('params', world_parameters)
+    params = kwargs.get('params', None)
+    random = kwargs.get('random', np.random)
 
     # Generate coordinates and particles
-    coords = zip(*circular_distribute(num=number, center=center, r=radius))
+    coords = zip(*circular_distribute(num=number, center=center, r=radius, random=random))
     for idx, coord in enumerate(coords):
         position = Vector.arrp(*coord)
-        velocity = Vector.rand(maxvel) if maxvel > 0 else Vector.zero()
+        velocity = Vector.rand(maxvel, random=random) if maxvel > 0 else Vector.zero()
         name     = team + "%02i" % (idx+1)
         yield klass(position, velocity, name, team=team, home=home, params=params)
 
@@ -65,11 +84,32 @@ def initialize_resources(**kwargs):
     length = kwargs.get('length', 3000)
     slope  = kwargs.get('slope', -1)
     yint   = kwargs.get('yint', 3000)
+    stash  = kwargs.get('stash_size', world_parameters.get('stash_size'))
 
     coords = zip(*linear_distribute(number, length, slope, yint))
     for idx, coord in enumerate(coords):
         if coord[0] in (0.0, length): continue  # Skip corners
-        yield klass(Vector.arrp(*coord), identifier="mineral%2i" % (idx+1))
+        yield klass(Vector.arrp(*coord), identifier="mineral%2i" % (idx+1), stash_size=stash)
+
+def random_state(seed=None):
+    """
+    Returns the RandomState of a world: the global NumPy generator if the
+    seed is None, the seed itself if it is a RandomState, otherwise a new
+    generator seeded with it.
+    """
+    if seed is None:
+        return np.random.mtrand._rand
+    if isinstance(seed, np.random.RandomState):
+        return seed
+    return np.random.RandomState(seed)
+
+def engine_kwargs(engine):
+    """
+    Only pass an engine to the world if one was requested, otherwise the
+    engine from the parameters configuration is used.
+    """
+    if engine: return {'engine': engine}
+    return {}
 
 ##########################################################################
 ## The world environment for a simulation
@@ -78,6 +118,13 @@ def initialize_resources(**kwargs):
 class World(object):
     """
     Performs the mechanics of simulating the world
+
+    Every world owns its settings and the parameter sets of its teams: the
+    simulation parameters (by default the global world_parameters, read
+    once when the world is created), the ally and the enemy parameters.
+    Particles read the maximum velocity and the debug flag from the world
+    they are bound to, so worlds with different settings can be simulated
+    side by side in one process.
     """
 
     @staticmethod
@@ -95,53 +142,552 @@ class World(object):
         return ResourceParticle(Vector.arrp(2250,2250), identifier="enemy_home", stash_size=0)
 
     def __init__(self, **kwargs):
+        # The simulation parameters of the world, the global ones by default
+        self.world_params = resolve(kwargs.pop('world_params', None))
+        if self.world_params is None:
+            self.world_params = world_parameters.setup()
+
         # Helper function for accessing kwargs and parameters
-        setting = lambda name: kwargs.pop(name, world_parameters.get(name))
+        setting = lambda name: kwargs.pop(name, self.world_params.get(name))
 
         # Initialize parameters from settings
         world_size = setting('world_size')
         self.size = (world_size, world_size)
         self.iterations = setting('maximum_time')
         self.deposits = setting('deposits')
+        self.team_size = setting('team_size')
+        self.stash_size = setting('stash_size')
+        self.maximum_velocity = setting('maximum_velocity')
+        self.debug = setting('debug')
+        self.verlet_skin = setting('verlet_skin')
+        self.verlet_period = setting('verlet_period')
+        self.spatial_index = setting('spatial_index')
+        if self.spatial_index != AUTO and self.spatial_index not in BACKENDS:
+            raise ImproperlyConfigured("Unknown spatial index '%s'" % self.spatial_index)
+        self.boundary = setting('boundary')
+        if self.boundary not in BOUNDARIES:
+            raise ImproperlyConfigured("Unknown boundary mode '%s'" % self.boundary)
+        self.vectors = setting('vectors')
+        if self.vectors not in VECTORS:
+            raise ImproperlyConfigured("Unknown vector type '%s'" % self.vectors)
+        self.random = random_state(kwargs.pop('seed', None))
         self.time = 0
 
         # Create the home particles
         self.ally_home  = self.create_ally_home()
         self.enemy_home = self.create_enemy_home()
 
-        # Create an empty agents list
-        self.agents = []
+        # Create an empty agents list, split into the agents that move and
+        # the static resources, and their spatial indices
+        self.agents  = []
+        self.dynamic = []
+        self.static  = []
+        self.cell_radius = None
+        self._cells   = None
+        self._pairs   = None
+        self._statics = None
+        self._minerals = None
+        self._neighborhoods = None
+        self._verlet  = None
+        self._contacts = None
+        self._teams   = None
+        self._guards  = None
+
+        # The statistics of the spatial index backends and, unless a backend
+        # was configured, the selector that measures which one to use
+        self.index_stats = {}
+        self.selector = BackendSelector() if self.spatial_index == AUTO else None
+
+        # The ghost copies of the agents near the edges, if the world pads
+        # its boundaries rather than wrapping every displacement
+        self.ghosts = GhostPadding(self.size) if self.boundary == GHOSTS else None
+
+        # The grid that finds the contacts between the rival teams
+        self.contact_grid = ContactGrid(self.size, STUN_RADIUS)
+
+        # The compiled tables of the parameter sets of the agents
+        self.tables = {}
+
+        # Initialize the allies, unless their parameters were given; the
+        # enemies (and agents given without params) use the world's params
+        self.ally_params = resolve(kwargs.pop('ally_params', None))
+        if self.ally_params is None:
+            self.ally_params = AllyParameters.load_file(setting('ally_conf_path'))
+        self.enemy_params = resolve(kwargs.pop('enemy_params', None)) or self.world_params
 
-        # Initialize the allies
-        ally_parameters = AllyParameters.load_file(setting('ally_conf_path'))
         if 'agents' in kwargs:
             self.add_agents(kwargs.pop('agents'))
         else:
-            self.add_agents(initialize_particles(params=ally_parameters, home=self.ally_home))
-            self.add_agents(initialize_particles(team="enemy", center=(2250,2250), home=self.enemy_home))
+            team = {
+                'number': self.team_size, 'maximum_velocity': self.maximum_velocity,
+                'random': self.random,
+            }
+            self.add_agents(initialize_particles(params=self.ally_params, home=self.ally_home, **team))
+            self.add_agents(initialize_particles(team="enemy", center=(2250,2250), home=self.enemy_home,
+                                                 params=self.enemy_params, **team))
 
         # Initialize the bases
         self.add_agent(self.ally_home)
         self.add_agent(self.enemy_home)
 
         # Initialize resources
-        self.add_agents(initialize_resources())
+        self.add_agents(initialize_resources(number=self.deposits, stash_size=self.stash_size))
         self.resources = [agent for agent in self.agents if agent.idx.startswith('mineral')]
 
+        # Load the particles into the array engine, replacing them with views
+        self.engine = setting('engine')
+        if self.engine not in ENGINES:
+            raise ImproperlyConfigured("Unknown simulation engine '%s'" % self.engine)
+
+        self.arrays = None
+        if self.engine == ARRAY:
+            self.arrays     = ArrayEngine(self, self.agents)
+            self.agents     = self.arrays.agents
+            self.ally_home  = self.arrays.view(self.ally_home)
+            self.enemy_home = self.arrays.view(self.enemy_home)
+            self.resources  = [self.arrays.view(depot) for depot in self.resources]
+
+        # The tick at which the outcome of the simulation became final
+        self.final_time = 0 if self.terminal() else None
+
+        # Debug runs trace the full state of every agent (see swarm.trace)
+        self.trace = None
+        if self.debug:
+            self.start_trace(diffs=True)
+
+        # The initial conditions, redrawn by reset
+        self.initial = self.checkpoint()
+
     def add_agent(self, agent):
+        if getattr(self, 'arrays', None) is not None:
+            raise SimulationException("Cannot add agents to a world using the array engine")
         agent.world = self
+        if agent.params is None:
+            agent.params = self.enemy_params if agent.team == 'enemy' else self.world_params
+        agent.table = self.compile(agent.params)
         self.agents.append(agent)
 
+        # Particles use the vector class selected for the world
+        vector = VECTORS[self.vectors]
+        if agent.vector is not vector:
+            agent.vector = vector
+            agent.pos = vector.arr(agent.pos)
+            agent.vel = vector.arr(agent.vel)
+
+        # Static agents are indexed separately, slots index into either list
+        if agent.static:
+            agent.slot = len(self.static)
+            self.static.append(agent)
+            self._statics = None
+        else:
+            agent.slot = len(self.dynamic)
+            self.dynamic.append(agent)
+            self._cells = None
+            self._pairs = None
+            self._verlet = None
+            self._contacts = None
+            self._teams = None
+            self._guards = None
+        self._minerals = None
+        self._neighborhoods = None
+
+        radius = agent.table.max_radius
+        if radius is not None and (self.cell_radius is None or radius > self.cell_radius):
+            self.cell_radius = radius
+            self._statics = None
+            self._verlet  = None
+
     def add_agents(self, agents):
         for agent in agents:
             self.add_agent(agent)
 
+    def compile(self, params):
+        """
+        Returns the compiled table of a parameter set, which is compiled
+        once for the world (see ParameterTable).
+        """
+        if params not in self.tables:
+            self.tables[params] = ParameterTable.compile(params)
+        return self.tables[params]
+
     def update(self):
-        for agent in self.agents:
-            agent.update()
-        for agent in self.agents:
-            agent.blit()
+        trace = self.trace
+        if trace is not None:
+            trace.before(self)
+
+        if self.arrays is not None:
+            self.arrays.step()
+        else:
+            for agent in self.dynamic:
+                agent.update()
+            for agent in self.dynamic:
+                agent.blit()
+            self._cells = None
+            self._pairs = None
+            self._contacts = None
+            self._minerals = None
+            self._neighborhoods = None
+
         self.time += 1
+        if self.final_time is None and self.terminal():
+            self.final_time = self.time
+
+        if trace is not None:
+            trace.after(self)
+
+    def terminal(self):
+        """
+        Returns True if no stash in the world can change anymore: no agent
+        is carrying a load and every resource with anything left in it is
+        the home of every agent. Agents never take from their own home but
+        do raid the homes of the other teams, so empty deposits alone are
+        not enough while both homes hold resources.
+        """
+        if self.arrays is not None:
+            return bool(self.arrays.terminal()[0])
+
+        if any(agent.loaded for agent in self.dynamic):
+            return False
+
+        for resource in self.static:
+            if resource.stash > 0 and any(agent.home is not resource for agent in self.dynamic):
+                return False
+        return True
+
+    def reset(self, params=None, seed=None, maximum_time=None):
+        """
+        Resets the world to new initial conditions in place, reusing its
+        particles (or arrays) rather than building a new world. Agents are
+        redistributed around their homes, drawing from the generator of the
+        world in the same order as initialize_particles, so a world reset
+        with a seed starts exactly like a new world with that seed.
+
+        The allies can be given new parameters (a Configuration or the path
+        to a YAML file) and the world a new maximum time.
+        """
+        if params is not None:
+            if isinstance(params, basestring):
+                params = AllyParameters.load_file(params)
+            self.set_ally_params(params)
+
+        if seed is not None:
+            if self.random is np.random.mtrand._rand:
+                self.random = random_state(seed)
+            else:
+                self.random.seed(seed)
+
+        if maximum_time is not None:
+            self.iterations = maximum_time
+
+        # Redraw the positions and velocities of every team around its home
+        pos = self.initial.pos.copy()
+        vel = self.initial.vel.copy()
+        maxvel = self.maximum_velocity
+        homes  = self.initial.home
+        for home in sorted(set(homes[homes >= 0]), key=list(homes).index):
+            members = np.flatnonzero(homes == home)
+            coords  = circular_distribute(num=len(members), r=100, center=self.initial.rpos[home], random=self.random)
+            pos[members] = np.column_stack(coords)
+            vel[members] = self.random.randint(maxvel, size=(len(members), 2)) if maxvel > 0 else 0
+
+        # Restore the initial state without rewinding the generator
+        state    = self.random.get_state()
+        snapshot = self.initial.replace(pos=pos, vel=vel)
+        snapshot.restore(self)
+        self.random.set_state(state)
+
+        self.final_time = 0 if self.terminal() else None
+        return self
+
+    def set_ally_params(self, params):
+        """
+        Gives the allies of the world (the agents with the parameters the
+        world was loaded with) another set of parameters, compiling them.
+        """
+        params = resolve(params)
+        self.tables.pop(self.ally_params, None)
+        table = self.compile(params)
+        for agent in self.dynamic:
+            if agent.params is self.ally_params:
+                agent.params = params
+                agent.table  = table
+
+        if self.arrays is not None:
+            self.arrays.replace_params(self.ally_params, params)
+        else:
+            radii = [agent.table.max_radius for agent in self.agents if agent.table.max_radius is not None]
+            self.cell_radius = max(radii) if radii else None
+            self._cells    = None
+            self._pairs    = None
+            self._statics  = None
+            self._minerals = None
+            self._neighborhoods = None
+            self._verlet   = None
+
+        self.ally_params = params
+
+    ##////////////////////////////////////////////////////////////////////
+    ## Tracing
+    ##////////////////////////////////////////////////////////////////////
+
+    def start_trace(self, **kwargs):
+        """
+        Starts tracing the events of the world into a new Trace created with
+        the keyword arguments (capacity, agents, ticks and diffs) and returns
+        the trace, which replaces any trace the world already had.
+        """
+        self.trace = Trace(**kwargs).bind(self)
+        return self.trace
+
+    def stop_trace(self):
+        """
+        Stops tracing the world and returns the trace.
+        """
+        trace, self.trace = self.trace, None
+        return trace
+
+    ##////////////////////////////////////////////////////////////////////
+    ## Snapshots
+    ##////////////////////////////////////////////////////////////////////
+
+    def checkpoint(self):
+        """
+        Returns a Snapshot of the current state of the world.
+        """
+        return Snapshot.capture(self)
+
+    def restore(self, snapshot):
+        """
+        Restores the world to the state of a snapshot taken from this world
+        (or from a world with the same agents and resources).
+        """
+        return snapshot.restore(self)
+
+    def fork(self, snapshot=None, ally_params=None, seed=None):
+        """
+        Returns a new world with the same agents, resources and parameters
+        as this one in the state of the snapshot (by default the current
+        state) without loading any configuration or drawing any initial
+        conditions. The allies can be given other parameters, e.g. to try
+        another home_guard_threshold from a mid-game state. The fork draws
+        from its own RandomState, restored from the snapshot unless seeded.
+        """
+        if snapshot is None:
+            snapshot = self.checkpoint()
+        params   = ally_params or self.ally_params
+        agents   = [
+            Particle(agent.pos, agent.vel, agent.idx, team=agent.team,
+                     params=params if agent.params is self.ally_params else agent.params)
+            for agent in self.dynamic
+        ]
+
+        world = World(
+            agents=agents, ally_params=params, enemy_params=self.enemy_params,
+            world_params=self.world_params, world_size=self.size[0],
+            maximum_time=self.iterations, deposits=self.deposits,
+            team_size=self.team_size, stash_size=self.stash_size,
+            maximum_velocity=self.maximum_velocity, debug=self.debug,
+            verlet_skin=self.verlet_skin, verlet_period=self.verlet_period,
+            spatial_index=self.spatial_index, boundary=self.boundary,
+            engine=self.engine, vectors=self.vectors, seed=np.random.RandomState(),
+        )
+        world.restore(snapshot)
+        world.initial = self.initial
+
+        if seed is not None:
+            world.random.seed(seed)
+        return world
+
+    @property
+    def finished(self):
+        """
+        True once the simulation has run for its maximum time or once its
+        outcome is final and further updates can't change any stash.
+        """
+        return self.final_time is not None or self.time >= self.iterations
+
+    def build_index(self, points, radius):
+        """
+        Returns a spatial index of the points for queries up to the radius,
+        with the backend of the world or the one its selector measured to be
+        the fastest for the points (see swarm.spatial.backends).
+        """
+        name = self.spatial_index
+        if self.selector is not None:
+            name = self.selector.select(points, self.size, radius, self.index_stats)
+        if name not in self.index_stats:
+            self.index_stats[name] = IndexStats()
+        return create_index(name, self.size, radius, self.index_stats[name]).build(points)
+
+    @property
+    def cells(self):
+        """
+        The spatial index of the positions of the moving agents at the
+        current tick, for queries up to the maximum radius of any particle
+        in the world. Built on demand and thrown away when the agents move.
+        """
+        if self._cells is None:
+            points = [tuple(agent.pos) for agent in self.dynamic]
+            self._cells = self.build_index(points, self.cell_radius)
+        return self._cells
+
+    @property
+    def reach(self):
+        """
+        The reach of the current state of every moving agent, the radius of
+        any neighbor query it makes this tick (see ParameterTable).
+        """
+        return np.array([agent.table.reach.get(agent.state, 0) for agent in self.dynamic], dtype=float)
+
+    @property
+    def verlet(self):
+        """
+        The Verlet list of the moving agents if the world has a skin, kept
+        across ticks until the agents move too far (see VerletList).
+        """
+        if self._verlet is None and self.verlet_skin is not None:
+            self._verlet = VerletList(self.size, self.verlet_skin, self.verlet_period, self.build_index)
+        return self._verlet
+
+    @property
+    def pairs(self):
+        """
+        The displacements between every pair of moving agents within the
+        largest reach at the current tick, computed once for all the
+        velocity components and state machine checks of every particle.
+        The candidate pairs come from the Verlet list if the world has one,
+        otherwise from the ghost padding of the tick if the world has ghost
+        boundaries, otherwise from the spatial index of the tick.
+        """
+        if self._pairs is None:
+            points = [agent.pos for agent in self.dynamic]
+            cutoff = self.reach.max() if self.dynamic else 0.0
+            if self.verlet is not None:
+                self._pairs = self.verlet.table(points, cutoff, self.cell_radius)
+            elif self.ghosts is not None:
+                self._pairs = self.ghosts.table(points, cutoff)
+            else:
+                self._pairs = PairTable(points, self.size, cutoff, self.cells)
+        return self._pairs
+
+    @property
+    def contacts(self):
+        """
+        The slot of the nearest enemy that isn't stunned within the stun
+        radius of every moving agent at the current tick (or -1), found for
+        every agent at once in a phase of its own that skips the teams
+        entirely while they are far apart (see ContactGrid).
+        """
+        if self._teams is None:
+            teams = sorted(set(agent.team for agent in self.dynamic))
+            team  = np.array([teams.index(agent.team) for agent in self.dynamic], dtype=np.intp)
+            enemy = np.array([teams.index(agent.enemy) if agent.enemy in teams else -1 for agent in self.dynamic], dtype=np.intp)
+            self._teams = (rivals(team, enemy), team, enemy)
+        if self._contacts is None:
+            sides, team, enemy = self._teams
+            points  = [agent.pos for agent in self.dynamic]
+            radius2 = np.array([min(STUN_RADIUS, agent.table.max_radius) ** 2 for agent in self.dynamic], dtype=float)
+            targets = np.array([agent.state != STUNNED for agent in self.dynamic], dtype=bool)
+            self._contacts = self.contact_grid.nearest(points, sides, team, enemy, radius2, targets)
+        return self._contacts
+
+    @property
+    def guards(self):
+        """
+        The number of guarding agents of every team at every resource, keyed
+        by the team and the slot of the resource. Counted once from the
+        states of the agents and then kept up to date as agents start and
+        stop guarding (see move_guard), so that the guard thresholds of the
+        state machine are checked without searching the neighbors.
+        """
+        if self._guards is None:
+            self._guards = Counter(
+                (agent.team, agent.target.slot) for agent in self.dynamic
+                if agent.state == GUARDING and agent.target is not None
+            )
+        return self._guards
+
+    def guard_count(self, team, target):
+        """
+        Returns the number of agents of the team guarding the target at the
+        start of the tick.
+        """
+        return self.guards[(team, target.slot)]
+
+    def move_guard(self, agent, state, target):
+        """
+        Moves the agent from the guards of its current target to the guards
+        of its new target when it blits into the new state, if it guards
+        either of them.
+        """
+        if self._guards is None:
+            return
+        if agent.state == GUARDING and agent.target is not None:
+            self._guards[(agent.team, agent.target.slot)] -= 1
+        if state == GUARDING and target is not None:
+            self._guards[(agent.team, target.slot)] += 1
+
+    @property
+    def statics(self):
+        """
+        The spatial index of the static resources (the homes and deposits),
+        which is only built once since they never move.
+        """
+        if self._statics is None:
+            points = [agent.pos for agent in self.static]
+            self._statics = StaticIndex(points, self.size, self.cell_radius)
+        return self._statics
+
+    @property
+    def minerals(self):
+        """
+        The displacements from every moving agent to the static resources
+        within the largest reach at the current tick.
+        """
+        if self._minerals is None:
+            points = [agent.pos for agent in self.dynamic]
+            cutoff = self.reach.max() if self.dynamic else 0.0
+            self._minerals = self.statics.within(points, cutoff)
+        return self._minerals
+
+    @property
+    def neighborhoods(self):
+        """
+        The candidate neighbors of every moving agent at the current tick:
+        for each agent, the lists of the moving agents and of the static
+        resources within the reach of its state, as tuples of the neighbor,
+        its team, its squared distance, the cosine of its bearing from the
+        heading of the agent and its displacement. The pair tables are
+        converted once for all the agents, which filter their candidates
+        for every query (see Particle.neighborhood).
+        """
+        if self._neighborhoods is None:
+            headings = np.array([tuple(agent.vel.unit) for agent in self.dynamic], dtype=float).reshape(-1, 2)
+            reach2   = self.reach ** 2
+            tables   = []
+            for agents, pairs in ((self.dynamic, self.pairs), (self.static, self.minerals)):
+                keep    = np.flatnonzero(pairs.dist2 <= reach2[pairs.rows])
+                rows    = pairs.rows[keep]
+                members = [agents[col] for col in pairs.cols[keep].tolist()]
+                cosines = (pairs.unit[keep] * headings[rows]).sum(-1)
+                entries = zip(
+                    members, [agent.team for agent in members],
+                    pairs.dist2[keep].tolist(), cosines.tolist(), list(pairs.delta[keep]),
+                )
+                indptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=len(self.dynamic))))).tolist()
+                tables.append([entries[indptr[idx]:indptr[idx+1]] for idx in xrange(len(self.dynamic))])
+            self._neighborhoods = zip(*tables)
+        return self._neighborhoods
+
+    def nearby(self, point, radius=None):
+        """
+        Returns the moving agents in the block of cells around the point,
+        followed by the static resources within the radius (or the cell
+        radius). The moving agents are only candidates that still need to
+        be checked against the radius.
+        """
+        agents = [self.dynamic[idx] for idx in self.cells.nearby(point, radius)]
+        return agents + [self.static[idx] for idx in self.statics.nearby(point, radius)]
 
     def status(self):
         """
@@ -0,0 +1,395 @@
+# tests.engine_tests
+# Tests for the struct-of-arrays simulation engine
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 10:02:37 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: engine_tests.py [] benjamin@bengfort.com $
+
+"""
+Tests for the struct-of-arrays simulation engine
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import unittest
+import numpy as np
+
+from swarm.engine import *
+from swarm.engine import fsm, kernels
+from swarm.spatial import unit
+from swarm.world import World
+from swarm.particle import *
+from swarm.vectors import Vector, view_cosine, ceil_supplement
+from swarm.exceptions import *
+from swarm.params import world_parameters as parameters
+from world_tests import NUM_BASES
+
+##########################################################################
+## Helpers
+##########################################################################
+
+def twin_worlds(seed=42, **kwargs):
+    """
+    Creates a reference and an array world from the same random seed.
+    """
+    np.random.seed(seed)
+    reference = World(engine='reference', **kwargs)
+    np.random.seed(seed)
+    vectorized = World(engine='array', **kwargs)
+    return reference, vectorized
+
+def particles():
+    """
+    A hand built set of particles with neighbors on both teams.
+    """
+    return [
+        Particle(Vector.arrp( 90 ,90 ), Vector.arrp( 10, 10), 'a'),
+        Particle(Vector.arrp( 100,140), Vector.arrp( 10, 0 ), 'b'),
+        Particle(Vector.arrp( 120,160), Vector.arrp( 10, 0 ), 'c'),
+        Particle(Vector.arrp( 140,140), Vector.arrp( 0 , 10), 'd'),
+        Particle(Vector.arrp( 140,120), Vector.arrp( 10, 10), 'e'),
+        Particle(Vector.arrp( 180,220), Vector.arrp( 10, 0 ), 'f'),
+        Particle(Vector.arrp( 60 ,50 ), Vector.arrp(-10,-10), 'g', team='enemy'),
+    ]
+
+##########################################################################
+## Array Engine Test Cases
+##########################################################################
+
+class ArrayEngineTests(unittest.TestCase):
+
+    def test_world_init(self):
+        """
+        Test that the array world has views of every agent and resource
+        """
+        world = World(engine='array')
+        self.assertIsInstance(world.arrays, ArrayEngine)
+
+        expected = (2 * parameters.get('team_size')) + parameters.get('deposits') + NUM_BASES
+        self.assertEqual(len(world.agents), expected)
+
+        allies = [agent for agent in world.agents if agent.team == 'ally']
+        self.assertEqual(len(allies), parameters.get('team_size'))
+
+        minerals = [agent for agent in world.agents if agent.team == 'mineral']
+        self.assertEqual(len(minerals), parameters.get('deposits') + NUM_BASES)
+
+    def test_views_readonly(self):
+        """
+        Assert that the agent views cannot be modified
+        """
+        world = World(engine='array')
+        agent = world.agents[0]
+
+        with self.assertRaises(AttributeError):
+            agent.state = GUARDING
+
+        with self.assertRaises(AttributeError):
+            agent.pos = Vector.zero()
+
+        with self.assertRaises(ValueError):
+            agent.pos[0] = 1.0
+
+    def test_unknown_engine(self):
+        """
+        Check that an unknown engine is improperly configured
+        """
+        with self.assertRaises(ImproperlyConfigured):
+            World(engine='quantum')
+
+    def test_add_agent(self):
+        """
+        Assert agents can't be added to a running array engine
+        """
+        world = World(engine='array')
+        with self.assertRaises(SimulationException):
+            world.add_agent(Particle(Vector.rand(12), Vector.rand(12), 'test'))
+
+    def test_update_world(self):
+        """
+        Check that updating swaps in new positions and keeps stashes
+        """
+        world = World(engine='array')
+        before = [agent.pos for agent in world.agents]
+        world.update()
+
+        self.assertEqual(world.time, 1)
+        self.assertEqual(world.status()[:2], (0, 0))
+        moved = [agent for agent, pos in zip(world.agents, before) if agent.pos != pos]
+        self.assertGreater(len(moved), 0)
+
+    def test_reference_equivalence(self):
+        """
+        Assert both engines agree on a simulation from the same seed
+        """
+        reference, vectorized = twin_worlds()
+
+        for step in xrange(40):
+            reference.update()
+            vectorized.update()
+
+        self.assertEqual(reference.status(), vectorized.status())
+        for expected, observed in zip(reference.agents, vectorized.agents):
+            self.assertEqual(expected.idx, observed.idx)
+            self.assertEqual(expected.state, observed.state)
+            self.assertEqual(expected.loaded, observed.loaded)
+            self.assertTrue(np.allclose(expected.pos, observed.pos, atol=1e-6))
+            self.assertTrue(np.allclose(expected.vel, observed.vel, atol=1e-6))
+
+    def test_particle_equivalence(self):
+        """
+        Assert both engines agree on a hand built set of particles
+        """
+        reference  = World(agents=particles(), engine='reference')
+        vectorized = World(agents=particles(), engine='array')
+
+        for step in xrange(10):
+            reference.update()
+            vectorized.update()
+
+        for expected, observed in zip(reference.agents, vectorized.agents):
+            self.assertEqual(expected.state, observed.state)
+            self.assertTrue(np.allclose(expected.pos, observed.pos, atol=1e-6))
+
+##########################################################################
+## Velocity Component Kernel Test Cases
+##########################################################################
+
+class KernelTests(unittest.TestCase):
+
+    def test_compiled_behaviors(self):
+        """
+        Check the compiled tables against the parameters of each state
+        """
+        engine = World(engine='array').arrays
+        params = engine.psets[0]
+
+        for code, state in enumerate(STATES):
+            if state == STUNNED:
+                self.assertFalse(engine.active[0, code].any())
+                continue
+
+            components = params.get(state).components
+            for cidx, name in enumerate(COMPONENTS):
+                self.assertEqual(engine.active[0, code, cidx], name in components)
+                if name in components:
+                    self.assertEqual(engine.weights[0, code, cidx], components[name].weight)
+
+    def test_clamp(self):
+        """
+        Assert only velocities longer than vmax are clamped
+        """
+        velocity = np.array([[3.0, 4.0], [0.1, 0.0], [0.0, 0.0]])
+        kernels.clamp(velocity, 1.0)
+        self.assertTrue(np.allclose(velocity, [[0.6, 0.8], [0.1, 0.0], [0.0, 0.0]]))
+
+    def test_centers(self):
+        """
+        Test the mean displacement of the masked pairs of every agent
+        """
+        rows  = np.array([0, 0, 0, 2])
+        mask  = np.array([True, True, False, False])
+        delta = np.array([[2.0, 0.0], [0.0, 4.0], [9.0, 9.0], [1.0, 1.0]])
+
+        center, found = kernels.centers(rows, mask, delta, 3)
+        self.assertTrue(np.allclose(center, [[1.0, 2.0], [0.0, 0.0], [0.0, 0.0]]))
+        self.assertEqual(list(found), [True, False, False])
+
+    def test_sight(self):
+        """
+        Test the per-agent radius and vision angle of the pairs
+        """
+        rows    = np.array([0, 0, 1, 1])
+        dist2   = np.array([25.0, 400.0, 25.0, 25.0])
+        cosines = np.cos(np.radians([10.0, 10.0, 100.0, 170.0]))
+        radius  = np.array([10.0, 10.0])
+        mask    = kernels.sight(rows, dist2, cosines, radius, np.array([view_cosine(90), view_cosine(200)]))
+        self.assertEqual(list(mask), [True, False, True, False])
+
+        mask = kernels.sight(rows, dist2, cosines, radius, np.array([view_cosine(360), view_cosine(400)]))
+        self.assertEqual(list(mask), [True, False, True, True])
+
+    def test_flock_components(self):
+        """
+        Compare every flocking kernel against the Particle components
+        """
+        reference = World(agents=particles(), engine='reference')
+        engine    = World(agents=particles(), engine='array').arrays
+
+        pairs  = engine.pair_table()
+        key    = (engine.pset, engine.state)
+        cosines = kernels.bearing_cosines(pairs.rows, pairs.unit, unit(engine.vel))
+        masks  = engine.neighbor_masks(pairs)
+
+        for cidx, name in enumerate(FLOCK_COMPONENTS):
+            radius = engine.radii[key][:, cidx]
+            mask   = masks[name] & kernels.sight(pairs.rows, pairs.dist2, cosines, radius, engine.cosines[key][:, cidx])
+            observed = engine.flock_component(name, mask, pairs, radius)
+
+            agents = [p for p in reference.agents if not isinstance(p, ResourceParticle)]
+            for idx, particle in enumerate(agents):
+                if name not in particle.components: continue
+                expected = getattr(particle, name)()
+                self.assertTrue(np.allclose(expected, observed[idx]), "%s of %s" % (name, particle.idx))
+
+##########################################################################
+## Finite State Machine Test Cases
+##########################################################################
+
+class StateMachineTests(unittest.TestCase):
+
+    def test_rank(self):
+        """
+        Test the rank of agents that share a key in index order
+        """
+        keys = np.array([2, 1, 2, 2, 1])
+        mask = np.array([True, True, False, True, True])
+        self.assertEqual(list(fsm.rank(keys, mask)), [0, 0, -1, 1, 1])
+
+    def test_stun_cooldown(self):
+        """
+        Compare the stun cooldowns against the angles of Vector.angle
+        """
+        delta    = np.random.uniform(-10, 10, (50, 2))
+        velocity = np.random.uniform(-10, 10, (50, 2))
+        velocity[0] = delta[0] * 3
+        velocity[1] = 0
+        velocity[2] = -delta[2]
+        velocity[3] = (delta[3, 1], -delta[3, 0])
+
+        cooldowns = ceil_supplement((unit(delta) * unit(velocity)).sum(-1))
+        for idx in xrange(50):
+            expected = 180 - Vector.arr(delta[idx]).angle(Vector.arr(velocity[idx]))
+            self.assertEqual(cooldowns[idx], np.ceil(expected))
+
+    def test_memory_order(self):
+        """
+        Assert the view of the memory is ordered by the stamps
+        """
+        world  = World(agents=particles(), engine='array')
+        engine = world.arrays
+        engine.memory[0, 4] = fsm.stamp(3, len(engine.stash))[4]
+        engine.memory[0, 2] = fsm.stamp(1, len(engine.stash))[2]
+        engine.memory[0, 3] = fsm.stamp(3, len(engine.stash))[3]
+
+        memory = world.agents[0].memory
+        self.assertEqual([view.index for view in memory], [2, 3, 4])
+        self.assertEqual(fsm.latest(engine.memory)[0][0], 4)
+
+    def test_mining_contention(self):
+        """
+        Assert agents arriving together mine in index order
+        """
+        agents = [
+            Particle(Vector.arrp(400, 400), Vector.arrp(1, 0), 'a'),
+            Particle(Vector.arrp(402, 400), Vector.arrp(1, 0), 'b'),
+        ]
+        world  = World(agents=agents, engine='array')
+        engine = world.arrays
+        deposit = len(engine.stash) - 1
+
+        engine.rpos[deposit]  = (410, 400)
+        engine.stash[deposit] = 1
+        engine.state[:]  = SEEKING_CODE
+        engine.target[:] = deposit
+        engine.memory[:, deposit] = 1
+        engine.depo_guard_threshold[:] = 0
+
+        world.update()
+        self.assertEqual(engine.stash[deposit], 0)
+        self.assertEqual([view.state for view in world.agents[:2]], [CARAVAN, SPREADING])
+        self.assertEqual([view.loaded for view in world.agents[:2]], [True, False])
+        self.assertEqual(world.agents[1].memory, [])
+
+##########################################################################
+## Ensemble Engine Test Cases
+##########################################################################
+
+class EnsembleEngineTests(unittest.TestCase):
+
+    def test_ensemble_equivalence(self):
+        """
+        Assert every world of an ensemble evolves like it would alone
+        """
+        seeds  = (3, 5, 8)
+        worlds = []
+        for seed in seeds:
+            np.random.seed(seed)
+            worlds.append(World(engine='reference'))
+        ensemble = EnsembleEngine(worlds)
+
+        alone = []
+        for seed in seeds:
+            np.random.seed(seed)
+            alone.append(World(engine='array'))
+
+        for step in xrange(40):
+            ensemble.step()
+            for world in alone:
+                world.update()
+
+        worlds, count = ensemble.shape
+        self.assertEqual(ensemble.status(), [world.status() for world in alone])
+        for idx, world in enumerate(alone):
+            agents = slice(idx * count, (idx+1) * count)
+            self.assertTrue(np.array_equal(ensemble.state[agents], world.arrays.state))
+            self.assertTrue(np.allclose(ensemble.pos[agents], world.arrays.pos, atol=1e-6))
+
+    def test_results(self):
+        """
+        Check the results have the shape of the runsim results
+        """
+        worlds = [World(engine='reference') for idx in xrange(2)]
+        ensemble = EnsembleEngine(worlds)
+        ensemble.step()
+
+        results = ensemble.results(4.0)
+        self.assertEqual(len(results), 2)
+        for result in results:
+            self.assertEqual(set(result), {'fitness', 'run_time', 'iterations', 'final_time', 'home_stash', 'enemy_stash'})
+            self.assertEqual(result['iterations'], 1)
+            self.assertEqual(result['run_time'], 2.0)
+
+    def test_final_time(self):
+        """
+        Assert the ensemble records when the outcome of each world is final
+        """
+        worlds = [World(engine='reference') for idx in xrange(2)]
+        for depot in worlds[1].resources:
+            depot.stash = 0
+
+        ensemble = EnsembleEngine(worlds)
+        self.assertEqual(list(ensemble.terminal()), [False, True])
+        self.assertFalse(ensemble.finished)
+
+        ensemble.step()
+        results = ensemble.results()
+        self.assertIsNone(results[0]['final_time'])
+        self.assertEqual(results[1]['final_time'], 0)
+        self.assertEqual(results[1]['iterations'], 0)
+
+    def test_mismatched_worlds(self):
+        """
+        Assert worlds of different shapes can't be ensembled
+        """
+        with self.assertRaises(SimulationException):
+            EnsembleEngine([World(engine='array')])
+
+        with self.assertRaises(SimulationException):
+            EnsembleEngine([World(), World(world_size=2000)])
+
+        agents = [Particle(Vector.arrp(10, 10), Vector.arrp(5, 5), 'a')]
+        with self.assertRaises(SimulationException):
+            EnsembleEngine([World(), World(agents=agents)])
+
+        with self.assertRaises(SimulationException):
+            EnsembleEngine([World(), World(maximum_velocity=6)])
+
+        with self.assertRaises(ImproperlyConfigured):
+            EnsembleEngine([World(maximum_time=100), World(maximum_time=200)])
@@ -18,6 +18,7 @@ Check the integration of particles with the world
 ##########################################################################
 
 import unittest
+import numpy as np
 
 from swarm.particle import *
 from swarm.world import World
@@ -128,3 +129,35 @@ class ParticleTests(unittest.TestCase):
         """
         expected = self.world.agents[10]
         self.assertEqual(self.particle.find_nearest(300,360), expected)
+
+    def test_memoized_neighborhood(self):
+        """
+        Assert identical queries are memoized until the particles blit
+        """
+        neighborhood = self.particle.neighborhood(300, 180, 'gold')
+        self.assertIs(self.particle.neighborhood(300, 180, 'gold'), neighborhood)
+        self.assertIsNot(self.particle.neighborhood(300, 360, 'gold'), neighborhood)
+        self.assertEqual(set(agent.idx for agent, delta in neighborhood), {'g', 'h', 'i'})
+
+        self.world.update()
+        self.assertIsNot(self.particle.neighborhood(300, 180, 'gold'), neighborhood)
+
+    def test_internal_neighborhood(self):
+        """
+        Compare the candidates of the pair tables against the world's cells
+        """
+        world = World(seed=5)
+        for tick in xrange(20):
+            world.update()
+
+        for agent in world.dynamic:
+            reach = agent.table.reach.get(agent.state, 0)
+            for candidates in agent.candidates:
+                self.assertTrue(all(dist2 <= reach * reach for n, t, dist2, c, d in candidates))
+
+            for radius, alpha, team in ((30, 360, agent.enemy), (150, 115, agent.team), (200, 360, 'mineral'), (300, 180, 'any')):
+                internal = agent.neighborhood(radius, alpha, team)
+                external = agent.neighborhood(radius, alpha, team, source='world')
+                self.assertEqual(sorted(id(n) for n, d in internal), sorted(id(n) for n, d in external))
+                for neighbor, delta in internal:
+                    self.assertTrue(np.allclose(delta, neighbor.relative_pos(agent.pos) - agent.pos))
@@ -21,6 +21,7 @@ import os
 import yaml
 import unittest
 import tempfile
+import numpy as np
 
 from copy import copy
 from swarm.params import *
@@ -132,6 +133,19 @@ class ConfigurationTests(unittest.TestCase):
         self.assertEqual(config.get('nested').get('level'), 'lobby')
         self.assertEqual(config.get('nested').get('nested').get('level'), 'basement')
 
+    def test_nested_instances(self):
+        """
+        Assert nested configurations aren't shared between instances
+        """
+        first  = TestConfiguration()
+        second = TestConfiguration()
+        first.configure({"nested": {"level": "lobby"}})
+        second.configure({"nested": {"level": "roof"}})
+
+        self.assertEqual(first.nested.level, 'lobby')
+        self.assertEqual(second.nested.level, 'roof')
+        self.assertEqual(TestConfiguration.nested.level, 1)
+
     def test_options(self):
         """
         Test the options method
@@ -193,6 +207,133 @@ class ConfigurationTests(unittest.TestCase):
         self.assertEqual(config.nested.level, 1)
         self.assertEqual(len(config.nested.empty), 0)
 
+    def test_load_yaml_cache(self):
+        """
+        Assert YAML files are cached by content and returned as copies
+        """
+        first = load_yaml(self.config_file)
+        first['items'].append('kiwis')
+        self.assertEqual(load_yaml(self.config_file), self.FIXTURE)
+
+        with open(self.config_file, "w") as conf:
+            yaml.dump({"myprop": "Mary"}, conf, default_flow_style=False)
+        self.assertEqual(load_yaml(self.config_file), {"myprop": "Mary"})
+
+    def test_dump_plain(self):
+        """
+        Test that dumped parameters are plain YAML that load back the same
+        """
+        params = AllyParameters()
+        params.caravan = MovementBehavior({
+            'avoidance':   VelocityComponent(1, 0.83, 100, 180),
+            'homing':      VelocityComponent(2, 0.83, None, None),
+        })
+        params.caravan.components['avoidance'].view_cosine()
+        params.dump_file(self.config_file)
+
+        with open(self.config_file, "r") as conf:
+            content = conf.read()
+        self.assertNotIn('!!', content)
+        self.assertNotIn('_cosine', content)
+        self.assertNotIn('max_radius', content)
+
+        self.assertEqual(load_yaml(self.config_file), params.serialize())
+        loaded = AllyParameters.load_file(self.config_file)
+        self.assertIsNone(loaded.caravan.components['homing'].radius)
+
+##########################################################################
+## Compiled Parameter Table Tests
+##########################################################################
+
+class ParameterTableTests(unittest.TestCase):
+
+    def test_compile(self):
+        """
+        Compare the compiled table against the parameter set
+        """
+        params = AllyParameters()
+        table  = ParameterTable.compile(params)
+        self.assertEqual(table.max_radius, params.max_radius)
+        self.assertEqual(table.home_guard_threshold, params.home_guard_threshold)
+
+        for state in BEHAVIORS:
+            components = params.get(state).components
+            self.assertEqual([c.name for c in table.behaviors[state]], components.keys())
+            for idx, compiled in enumerate(table.behaviors[state]):
+                component = components[compiled.name]
+                self.assertIs(table.components[state][compiled.name], compiled)
+                self.assertEqual(compiled.weight, component.weight)
+                self.assertEqual(table.weights[state][idx], component.weight)
+                self.assertEqual(table.priorities[state][idx], component.priority)
+                if component.radius is None:
+                    self.assertTrue(np.isnan(table.radii[state][idx]))
+                else:
+                    self.assertEqual(table.radii[state][idx], component.radius)
+                if component.alpha is not None:
+                    self.assertEqual(compiled.cosine, component.view_cosine())
+                    self.assertEqual(table.cosines[state][idx], compiled.cosine)
+
+        self.assertNotIn('stunned', table.behaviors)
+
+    def test_reach(self):
+        """
+        Test the reach of every state includes the state machine radii
+        """
+        params = AllyParameters()
+        params.spreading = MovementBehavior({'cohesion': VelocityComponent(1, 0.8, 250, 360)})
+        params.seeking   = MovementBehavior({
+            'avoidance':   VelocityComponent(1, 0.8, 40, 90),
+            'seeking':     VelocityComponent(2, 0.6, 300, 360),
+        })
+        params.caravan   = MovementBehavior({'homing': VelocityComponent(1, 0.8, None, None)})
+        params.guarding  = MovementBehavior({'separation': VelocityComponent(1, 0.6, 20, 90)})
+
+        table = ParameterTable.compile(params)
+        self.assertEqual(table.reach['spreading'], 250)
+        self.assertEqual(table.reach['seeking'], 40)
+        self.assertEqual(table.reach['caravan'], STUN_RADIUS)
+        self.assertEqual(table.reach['guarding'], STUN_RADIUS)
+        self.assertNotIn('stunned', table.reach)
+
+        # Like the queries, the reach is capped at the maximum radius
+        params = AllyParameters()
+        for state in BEHAVIORS:
+            setattr(params, state, MovementBehavior({'separation': VelocityComponent(1, 0.6, 100, 90)}))
+        table = ParameterTable.compile(params)
+        self.assertEqual(table.reach['spreading'], 100)
+        self.assertEqual(table.reach['seeking'], 100)
+
+    def test_immutable(self):
+        """
+        Assert the compiled table can't be changed
+        """
+        table = ParameterTable.compile(AllyParameters())
+        with self.assertRaises(AttributeError):
+            table.max_radius = 10
+        with self.assertRaises(AttributeError):
+            table.behaviors['seeking'][0].radius = 10
+        with self.assertRaises(ValueError):
+            table.weights['seeking'][0] = 1.0
+
+    def test_world_tables(self):
+        """
+        Test that a world compiles each parameter set once for its agents
+        """
+        from swarm.world import World
+
+        world  = World()
+        tables = set(id(agent.table) for agent in world.agents)
+        self.assertEqual(len(tables), len(world.tables))
+        for agent in world.agents:
+            self.assertIs(agent.table, world.tables[agent.params])
+
+        params = AllyParameters()
+        params.home_guard_threshold = 3
+        world.set_ally_params(params)
+        for agent in world.dynamic:
+            self.assertIs(agent.table, world.compile(agent.params))
+        self.assertEqual(len(world.tables), len(tables))
+
 class SubNestedConfiguration(Configuration):
 
     level = 2
@@ -0,0 +1,170 @@
+# tests.snapshot_tests
+# Tests for the binary snapshots of the world
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 16:58:21 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: snapshot_tests.py [] benjamin@bengfort.com $
+
+"""
+Tests for the binary snapshots of the world
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import os
+import unittest
+import tempfile
+import numpy as np
+
+from swarm.world import World
+from swarm.snapshot import Snapshot
+from swarm.exceptions import *
+
+##########################################################################
+## Helpers
+##########################################################################
+
+ENGINES = ('reference', 'array')
+
+def advance(world, ticks):
+    """
+    Advances the world and returns the state of every agent and resource.
+    """
+    for tick in xrange(ticks):
+        world.update()
+    return [
+        (tuple(agent.pos), tuple(agent.vel), agent.state, agent.loaded,
+         agent.stun_cooldown, getattr(agent.target, 'idx', None),
+         [resource.idx for resource in agent.memory])
+        for agent in world.agents if agent.team != 'mineral'
+    ] + [world.status(), world.time]
+
+##########################################################################
+## Snapshot Test Cases
+##########################################################################
+
+class SnapshotTests(unittest.TestCase):
+
+    def test_restore(self):
+        """
+        Assert a restored world continues bit-exactly
+        """
+        for engine in ENGINES:
+            world = World(engine=engine)
+            advance(world, 40)
+            snapshot = world.checkpoint()
+            expected = advance(world, 40)
+
+            world.restore(snapshot)
+            self.assertEqual(world.time, 40)
+            self.assertEqual(advance(world, 40), expected)
+
+    def test_fork(self):
+        """
+        Check that forks continue exactly like the world they forked from
+        """
+        for engine in ENGINES:
+            world = World(engine=engine)
+            advance(world, 40)
+            forks = [world.fork() for idx in xrange(2)]
+            expected = advance(world, 40)
+
+            for fork in forks:
+                self.assertIs(fork.ally_params, world.ally_params)
+                self.assertEqual(advance(fork, 40), expected)
+
+    def test_fork_params(self):
+        """
+        Test forking a continuation with other ally parameters
+        """
+        world  = World()
+        params = world.ally_params.__class__()
+        params.home_guard_threshold = 2
+        fork = world.fork(ally_params=params)
+
+        self.assertIs(fork.ally_params, params)
+        for agent in fork.dynamic:
+            if agent.team == 'ally':
+                self.assertIs(agent.params, params)
+            else:
+                self.assertIsNot(agent.params, params)
+
+    def test_fork_empty(self):
+        """
+        Test forking from a snapshot of a world without agents
+        """
+        for engine in ENGINES:
+            world = World(agents=[], engine=engine)
+            world.update()
+            snapshot = world.checkpoint()
+            self.assertEqual(len(snapshot), 0)
+
+            advance(world, 2)
+            self.assertEqual(world.fork(snapshot).time, 1)
+
+    def test_binary_roundtrip(self):
+        """
+        Check that snapshots survive being written out as binary
+        """
+        world = World(engine='array')
+        advance(world, 40)
+        snapshot = world.checkpoint()
+        expected = advance(world, 20)
+
+        data = snapshot.dumps()
+        self.assertIsInstance(data, str)
+        world.restore(Snapshot.loads(data))
+        self.assertEqual(advance(world, 20), expected)
+
+        path = tempfile.mktemp(suffix='.npz')
+        try:
+            snapshot.dump_file(path)
+            restored = Snapshot.load_file(path)
+        finally:
+            if os.path.exists(path): os.remove(path)
+
+        for name in Snapshot.FIELDS:
+            self.assertTrue(np.array_equal(getattr(restored, name), getattr(snapshot, name)))
+
+    def test_across_engines(self):
+        """
+        Assert snapshots of the reference engine restore into the arrays
+        """
+        world = World(engine='reference')
+        other = World(engine='array', seed=42)
+        other.restore(world.checkpoint())
+        self.assertEqual([tuple(agent.pos) for agent in other.agents],
+                         [tuple(agent.pos) for agent in world.agents])
+        self.assertEqual(advance(other, 1)[-2:], advance(world, 1)[-2:])
+
+    def test_random_state(self):
+        """
+        Test the world's generator is seeded and restored with the snapshot
+        """
+        first  = World(seed=42)
+        second = World(seed=42)
+        self.assertEqual([tuple(agent.vel) for agent in first.agents],
+                         [tuple(agent.vel) for agent in second.agents])
+        self.assertIsNot(first.random, np.random.mtrand._rand)
+        self.assertIs(World().random, np.random.mtrand._rand)
+
+        snapshot = first.checkpoint()
+        draws = first.random.rand(5)
+        first.restore(snapshot)
+        self.assertTrue(np.array_equal(first.random.rand(5), draws))
+
+    def test_mismatched_restore(self):
+        """
+        Assert snapshots can't be restored into a world of a different shape
+        """
+        world = World()
+        snapshot = world.checkpoint()
+        snapshot.stash = snapshot.stash[:-1]
+        with self.assertRaises(SimulationException):
+            World().restore(snapshot)
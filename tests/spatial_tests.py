@@ -0,0 +1,521 @@
+# tests.spatial_tests
+# Tests for the spatial indices of the periodic world
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 10:48:51 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: spatial_tests.py [] benjamin@bengfort.com $
+
+"""
+Tests for the spatial indices of the periodic world
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import unittest
+import numpy as np
+
+from swarm.spatial import *
+from swarm.world import World
+from swarm.particle import *
+from swarm.vectors import Vector
+from swarm.exceptions import *
+
+##########################################################################
+## Helpers
+##########################################################################
+
+def periodic_distance2(a, b, size):
+    """
+    Brute force squared minimal image distance between two points.
+    """
+    delta = np.abs(np.asarray(a, dtype=float) - np.asarray(b, dtype=float))
+    delta = np.minimum(delta, np.asarray(size, dtype=float) - delta)
+    return (delta*delta).sum()
+
+##########################################################################
+## Cell List Test Cases
+##########################################################################
+
+class CellListTests(unittest.TestCase):
+
+    def test_shape(self):
+        """
+        Assert cells are at least as wide as the radius
+        """
+        grid = CellList((3000, 3000), 450)
+        self.assertEqual(grid.shape, (6, 6))
+        self.assertEqual(grid.width, (500.0, 500.0))
+
+        grid = CellList((1000, 1000), 5000)
+        self.assertEqual(grid.shape, (1, 1))
+
+    def test_wrapped_block(self):
+        """
+        Test that the block of a corner cell wraps across the boundary
+        """
+        grid  = CellList((1000, 1000), 100)
+        block = set(grid.block((10, 10)))
+        self.assertEqual(len(block), 9)
+        self.assertIn((9, 9), block)
+        self.assertIn((0, 9), block)
+        self.assertIn((9, 0), block)
+
+    def test_narrow_block(self):
+        """
+        Assert cells are not repeated when the grid is narrower than 3x3
+        """
+        grid = CellList((1000, 1000), 400)
+        grid.insert('a', (10, 10))
+        self.assertEqual(len(grid.block((10, 10))), 4)
+        self.assertEqual(grid.nearby((900, 900)), ['a'])
+
+    def test_brute_force(self):
+        """
+        Compare the candidates of the grid against a brute force search
+        """
+        size   = (3000, 3000)
+        radius = 300
+        points = np.random.uniform(0, 3000, (400, 2))
+        grid   = CellList(size, radius)
+        for idx, point in enumerate(points):
+            grid.insert(idx, point)
+
+        for query in points[:50]:
+            expected = set(idx for idx, point in enumerate(points)
+                           if periodic_distance2(query, point, size) <= radius*radius)
+            candidates = grid.nearby(query)
+            self.assertTrue(expected.issubset(candidates))
+            self.assertEqual(candidates, sorted(candidates))
+
+    def test_larger_radius(self):
+        """
+        Test that a query larger than the cells inspects more rings
+        """
+        grid = CellList((3000, 3000), 100)
+        grid.insert('a', (50, 50))
+        grid.insert('b', (450, 50))
+        self.assertEqual(grid.nearby((50, 50)), ['a'])
+        self.assertEqual(grid.nearby((50, 50), 400), ['a', 'b'])
+
+    def test_world_cells(self):
+        """
+        Assert the world rebuilds its cell list after the agents move
+        """
+        agents = [
+            Particle(Vector.arrp(10, 10), Vector.arrp(5, 5), 'a'),
+            Particle(Vector.arrp(2990, 2990), Vector.arrp(5, 5), 'b'),
+        ]
+        world = World(agents=agents)
+        cells = world.cells
+        self.assertIs(cells, world.cells)
+        self.assertIn(world.agents[1], world.nearby(world.agents[0].pos))
+
+        world.update()
+        self.assertIsNot(cells, world.cells)
+
+##########################################################################
+## Pairwise Displacement Test Cases
+##########################################################################
+
+class PairwiseTests(unittest.TestCase):
+
+    def setUp(self):
+        self.size   = (1000, 1000)
+        self.points = np.random.uniform(0, 1000, (120, 2))
+
+    def test_cell_pairs(self):
+        """
+        Assert the cell list returns every unordered pair once
+        """
+        grid = CellList(self.size, 100)
+        for idx, point in enumerate(self.points):
+            grid.insert(idx, point)
+
+        first, second = grid.pairs()
+        self.assertTrue((first < second).all())
+        pairs = set(zip(first, second))
+        self.assertEqual(len(pairs), len(first))
+
+        for idx, jdx in zip(*np.triu_indices(len(self.points), 1)):
+            if periodic_distance2(self.points[idx], self.points[jdx], self.size) <= 100*100:
+                self.assertIn((idx, jdx), pairs)
+
+    def test_pair_table(self):
+        """
+        Compare the pair table against Particle.relative_pos
+        """
+        agents = [Particle(Vector.arr(point), Vector.arrp(1, 0), str(idx)) for idx, point in enumerate(self.points)]
+        world  = World(agents=agents, world_size=1000)
+        grid   = CellList(self.size, 100)
+        for idx, point in enumerate(self.points):
+            grid.insert(idx, point)
+        pairs  = PairTable(self.points, self.size, 100, grid)
+
+        for idx, agent in enumerate(agents):
+            for other in agents:
+                if other is agent: continue
+                delta = other.relative_pos(agent.pos) - agent.pos
+                entry = pairs.find(idx, other.slot)
+                if delta.length2 <= 100*100:
+                    self.assertIsNotNone(entry)
+                    self.assertTrue(np.allclose(pairs.delta[entry], delta))
+                    self.assertTrue(np.allclose(pairs.unit[entry], delta.unit))
+                    self.assertAlmostEqual(pairs.dist2[entry], delta.length2)
+                else:
+                    self.assertIsNone(entry)
+
+    def test_pair_table_rows(self):
+        """
+        Assert that rows are sorted and mirrored
+        """
+        pairs = PairTable(self.points, self.size, 150)
+        for idx in xrange(len(self.points)):
+            cols = pairs.cols[pairs.row(idx)]
+            self.assertEqual(list(cols), sorted(cols))
+            self.assertTrue((pairs.rows[pairs.row(idx)] == idx).all())
+            for entry in xrange(pairs.indptr[idx], pairs.indptr[idx+1]):
+                mirror = pairs.find(pairs.cols[entry], idx)
+                self.assertTrue(np.array_equal(pairs.delta[entry], -pairs.delta[mirror]))
+
+##########################################################################
+## Static Index Test Cases
+##########################################################################
+
+class StaticIndexTests(unittest.TestCase):
+
+    def assertWithin(self, index, points, radius, size):
+        """
+        Compare a query of the index against a brute force search
+        """
+        table = index.within(points, radius)
+        for idx, point in enumerate(points):
+            expected = [sdx for sdx, static in enumerate(index.points)
+                        if periodic_distance2(point, static, size) <= radius*radius]
+            self.assertEqual(list(table.cols[table.row(idx)]), expected)
+
+            for entry in xrange(table.indptr[idx], table.indptr[idx+1]):
+                delta = table.delta[entry]
+                self.assertAlmostEqual((delta*delta).sum(), periodic_distance2(point, index.points[table.cols[entry]], size))
+                self.assertTrue(np.allclose((point + delta) % size, index.points[table.cols[entry]]))
+
+    def test_brute_force(self):
+        """
+        Compare the static index against a brute force search
+        """
+        size   = (3000, 3000)
+        index  = StaticIndex(np.random.uniform(0, 3000, (300, 2)), size, 200)
+        points = np.random.uniform(0, 3000, (60, 2))
+        self.assertFalse(index.wrapped)
+        self.assertWithin(index, points, 200, size)
+        self.assertWithin(index, points, 120, size)
+
+    def test_wrapped_index(self):
+        """
+        Test an index whose grid is too narrow for the periodic images
+        """
+        size  = (1000, 1000)
+        index = StaticIndex([(10, 10), (990, 500), (500, 500)], size, 400)
+        self.assertTrue(index.wrapped)
+        self.assertWithin(index, [(980, 10), (20, 480), (600, 600)], 400, size)
+
+    def test_larger_radius(self):
+        """
+        Assert queries beyond the radius of the index inspect every point
+        """
+        size  = (3000, 3000)
+        index = StaticIndex(np.random.uniform(0, 3000, (50, 2)), size, 100)
+        self.assertWithin(index, np.random.uniform(0, 3000, (10, 2)), 700, size)
+        self.assertEqual(index.nearby((50, 50), 5000), range(50))
+
+    def test_world_statics(self):
+        """
+        Assert the world only updates and pairs the moving agents
+        """
+        agents = [
+            Particle(Vector.arrp(10, 10), Vector.arrp(5, 5), 'a'),
+            Particle(Vector.arrp(2990, 2990), Vector.arrp(5, 5), 'b'),
+        ]
+        world = World(agents=agents)
+        self.assertEqual(world.dynamic, agents)
+        self.assertEqual(len(world.static), len(world.agents) - 2)
+        self.assertTrue(all(agent.static for agent in world.static))
+        self.assertEqual(len(world.pairs.indptr), 3)
+
+        statics = world.statics
+        world.update()
+        self.assertIs(statics, world.statics)
+        self.assertEqual(world.ally_home.slot, 0)
+        self.assertTrue(np.allclose(agents[0].displacement(world.ally_home), world.ally_home.pos - agents[0].pos))
+
+##########################################################################
+## Verlet List Test Cases
+##########################################################################
+
+class VerletListTests(unittest.TestCase):
+
+    def assertSameTable(self, table, expected):
+        """
+        Compare a pair table against another, entry by entry
+        """
+        for name in ('rows', 'cols', 'delta', 'dist2', 'indptr'):
+            self.assertTrue(np.array_equal(getattr(table, name), getattr(expected, name)))
+
+    def test_exact_pairs(self):
+        """
+        Assert the Verlet list finds exactly the pairs of a full search
+        """
+        size   = (1000, 1000)
+        points = np.random.uniform(0, 1000, (150, 2))
+        verlet = VerletList(size, 40)
+
+        for tick in xrange(40):
+            points = (points + np.random.uniform(-5, 5, points.shape)) % 1000
+            cutoff = np.random.choice([60, 100])
+            grid   = CellList(size, cutoff)
+            for idx, point in enumerate(points):
+                grid.insert(idx, point)
+            self.assertSameTable(verlet.table(points, cutoff, 100), PairTable(points, size, cutoff, grid))
+
+        self.assertEqual(verlet.queries, 40)
+        self.assertLess(verlet.builds, 40)
+
+    def test_stale(self):
+        """
+        Test the candidates are rebuilt once points moved beyond the skin
+        """
+        verlet = VerletList((1000, 1000), 20)
+        points = np.array([[10.0, 10.0], [500.0, 500.0]])
+        verlet.table(points, 100)
+        self.assertFalse(verlet.stale(points, 100))
+        self.assertTrue(verlet.stale(points, 130))
+
+        points[0] = [995.0, 5.0]
+        self.assertAlmostEqual(verlet.displacement(points), np.hypot(15, 5))
+        self.assertTrue(verlet.stale(points, 100))
+
+        verlet = VerletList((1000, 1000), 20, period=2)
+        for tick in xrange(4):
+            verlet.table(points, 100)
+        self.assertEqual(verlet.builds, 2)
+
+    def test_world_verlet(self):
+        """
+        Check that a world with a skin simulates exactly like one without
+        """
+        worlds = [World(seed=5, verlet_skin=skin) for skin in (None, 60)]
+        self.assertIsNone(worlds[0].verlet)
+        for tick in xrange(60):
+            for world in worlds:
+                world.update()
+            self.assertSameTable(worlds[1].pairs, worlds[0].pairs)
+
+        self.assertEqual(*[[tuple(agent.pos) for agent in world.agents] for world in worlds])
+        self.assertLess(worlds[1].verlet.builds, 60)
+
+##########################################################################
+## Spatial Index Backend Test Cases
+##########################################################################
+
+class BackendTests(unittest.TestCase):
+
+    def setUp(self):
+        # A thin uniform swarm with a crowd across the corner of the world
+        crowd = np.random.normal(0, 40, (120, 2)) % 1000
+        self.size   = (1000, 1000)
+        self.points = np.vstack((np.random.uniform(0, 1000, (80, 2)), crowd))
+
+    def test_brute_force(self):
+        """
+        Compare the candidates of every backend against a brute force search
+        """
+        radius = 80
+        for name in BACKENDS:
+            index = create_index(name, self.size, radius).build(self.points)
+            first, second = index.pairs()
+            self.assertTrue((first < second).all())
+            pairs = set(zip(first, second))
+            self.assertEqual(len(pairs), len(first))
+
+            for idx, jdx in zip(*np.triu_indices(len(self.points), 1)):
+                if periodic_distance2(self.points[idx], self.points[jdx], self.size) <= radius*radius:
+                    self.assertIn((idx, jdx), pairs, name)
+
+            for query in self.points[::10]:
+                for distance in (radius, 300):
+                    expected = set(idx for idx, point in enumerate(self.points)
+                                   if periodic_distance2(query, point, self.size) <= distance*distance)
+                    candidates = index.nearby(query, distance)
+                    self.assertTrue(expected.issubset(candidates), name)
+                    self.assertEqual(candidates, sorted(candidates))
+
+    def test_stats(self):
+        """
+        Assert backends count their builds and queries
+        """
+        stats = IndexStats()
+        index = create_index('sweep', self.size, 100, stats).build(self.points)
+        index.pairs()
+        index.nearby((10, 10))
+        index.nearby((500, 500))
+        self.assertEqual((stats.builds, stats.pairs, stats.queries), (1, 1, 2))
+        self.assertGreater(stats.time, 0)
+
+        with self.assertRaises(ImproperlyConfigured):
+            create_index('octree', self.size, 100)
+
+    def test_selector(self):
+        """
+        Test the selector times every backend and chooses the fastest
+        """
+        selector = BackendSelector(interval=3)
+        choices  = [selector.select(self.points, self.size, 100) for idx in xrange(4)]
+        self.assertEqual(selector.trials, 2)
+        self.assertEqual(sorted(selector.timings), sorted(BACKENDS))
+        self.assertEqual(selector.choice, min(selector.timings, key=selector.timings.get))
+        self.assertIn(choices[0], BACKENDS)
+
+    def test_world_backends(self):
+        """
+        Check that every backend simulates exactly like the cell list
+        """
+        worlds = [World(seed=5, spatial_index=name) for name in sorted(BACKENDS)]
+        for tick in xrange(30):
+            for world in worlds:
+                world.update()
+
+        expected = [tuple(agent.pos) for agent in worlds[0].agents]
+        for world in worlds[1:]:
+            self.assertEqual([tuple(agent.pos) for agent in world.agents], expected)
+            self.assertEqual(world.index_stats.keys(), [world.spatial_index])
+            self.assertEqual(world.index_stats[world.spatial_index].builds, 30)
+
+        self.assertIsNone(World().selector)
+        world = World(spatial_index='auto')
+        world.update()
+        self.assertIn(world.selector.choice, world.index_stats)
+
+        with self.assertRaises(ImproperlyConfigured):
+            World(spatial_index='octree')
+
+##########################################################################
+## Ghost Padding Test Cases
+##########################################################################
+
+class GhostPaddingTests(unittest.TestCase):
+
+    def assertSameTable(self, table, expected):
+        """
+        Compare a pair table against another, entry by entry
+        """
+        for name in ('rows', 'cols', 'delta', 'dist2', 'unit', 'indptr'):
+            self.assertTrue(np.array_equal(getattr(table, name), getattr(expected, name)))
+
+    def test_padding(self):
+        """
+        Test points near the edges and corners are copied to the other side
+        """
+        ghosts = GhostPadding((1000, 1000))
+        points = np.array([[500.0, 500.0], [10.0, 500.0], [995.0, 3.0]])
+        padded, owners, shifts = ghosts.pad(points, 20)
+
+        self.assertTrue(np.array_equal(padded[:3], points))
+        self.assertEqual(sorted(owners[3:]), [1, 2, 2, 2])
+        self.assertTrue(np.array_equal(padded, points[owners] + shifts))
+        self.assertIn([-5.0, 1003.0], padded.tolist())
+
+    def test_exact_pairs(self):
+        """
+        Assert the padded pairs are exactly those of the wrapped pairs
+        """
+        for size, cutoff in (((1000, 1000), 80), ((1000, 1000), 300), ((101, 101), 50.4), ((101, 101), 60)):
+            ghosts = GhostPadding(size)
+            crowd  = np.random.normal(0, cutoff, (120, 2)) % size[0]
+            points = np.vstack((np.random.uniform(0, size[0], (80, 2)), crowd, [[0.0, 0.0]]))
+            self.assertSameTable(ghosts.table(points, cutoff), PairTable(points, size, cutoff))
+
+    def test_world_ghosts(self):
+        """
+        Check that worlds with ghost boundaries simulate exactly like others
+        """
+        for engine in ('reference', 'array'):
+            worlds = [World(engine=engine, seed=5, boundary=mode) for mode in (WRAP, GHOSTS)]
+            self.assertIsNone(worlds[0].ghosts)
+            for tick in xrange(60):
+                for world in worlds:
+                    world.update()
+
+            self.assertEqual(*[[tuple(agent.pos) for agent in world.agents] for world in worlds])
+            self.assertEqual(worlds[1].ghosts.tables, 60)
+
+        with self.assertRaises(ImproperlyConfigured):
+            World(boundary="mirror")
+
+##########################################################################
+## Contact Grid Test Cases
+##########################################################################
+
+class ContactGridTests(unittest.TestCase):
+
+    def brute_nearest(self, points, size, team, enemy, radius2, targets):
+        """
+        Brute force nearest target of the enemy team of every point
+        """
+        nearest = []
+        for idx, point in enumerate(points):
+            found = [
+                (periodic_distance2(point, other, size), jdx)
+                for jdx, other in enumerate(points)
+                if team[jdx] == enemy[idx] and targets[jdx]
+            ]
+            found = [(dist2, jdx) for dist2, jdx in found if dist2 <= radius2[idx]]
+            nearest.append(min(found)[1] if found else -1)
+        return nearest
+
+    def test_brute_force(self):
+        """
+        Compare the nearest contacts against a brute force search
+        """
+        for size, count in (((1000, 1000), 300), ((60, 60), 40)):
+            points  = np.vstack((np.random.uniform(0, size[0], (count / 2, 2)), np.random.normal(0, 15, (count / 2, 2)) % size[0]))
+            team    = np.random.randint(0, 2, count)
+            enemy   = 1 - team
+            radius2 = np.random.choice([900, 400], count).astype(float)
+            targets = np.random.rand(count) < 0.8
+
+            grid = ContactGrid(size, 30)
+            nearest = grid.nearest(points, rivals(team, enemy), team, enemy, radius2, targets)
+            self.assertEqual(list(nearest), self.brute_nearest(points, size, team, enemy, radius2, targets))
+
+    def test_skip(self):
+        """
+        Assert teams whose bounding boxes are far apart are skipped
+        """
+        grid   = ContactGrid((1000, 1000), 30)
+        points = np.array([[10.0, 10.0], [20.0, 990.0], [500.0, 500.0], [520.0, 510.0]])
+        team   = np.array([0, 0, 1, 1])
+        sides  = rivals(team, 1 - team)
+        self.assertEqual(list(grid.nearest(points, sides, team, 1 - team, np.full(4, 900.0), np.ones(4, bool))), [-1] * 4)
+        self.assertEqual(grid.skips, 1)
+
+        # Across the periodic boundary the teams are in contact
+        points[2:] = [[985.0, 5.0], [700.0, 700.0]]
+        self.assertEqual(list(grid.nearest(points, sides, team, 1 - team, np.full(4, 900.0), np.ones(4, bool))), [2, -1, 0, -1])
+        self.assertEqual(grid.skips, 1)
+        self.assertEqual(len(rivals(team, team)), 0)
+
+    def test_world_contacts(self):
+        """
+        Check that the contacts of a world are the nearest enemies in sight
+        """
+        world = World(seed=5, team_size=40)
+        for tick in xrange(40):
+            world.update()
+            for agent in world.dynamic:
+                expected = agent.find_nearest(STUN_RADIUS, 360, team=agent.enemy, except_state=STUNNED)
+                self.assertIs(agent.find_contact(), expected)
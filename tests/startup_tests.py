@@ -0,0 +1,114 @@
+# tests.startup_tests
+# Tests for the import time of the swarm package
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 19:02:13 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: startup_tests.py [] benjamin@bengfort.com $
+
+"""
+Tests for the import time of the swarm package
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import os
+import sys
+import json
+import unittest
+import subprocess
+
+from swarm.params import *
+from swarm.world import World
+
+##########################################################################
+## Helpers
+##########################################################################
+
+## Root of the repository, where `import swarm` is run from
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+## Seconds a fresh interpreter may spend importing the package
+IMPORT_BUDGET = 1.5
+
+PROBE = """
+import sys, time, json
+started = time.time()
+import swarm
+from swarm.params import world_parameters
+print json.dumps({
+    'elapsed': time.time() - started, 'modules': sorted(sys.modules),
+    'loaded': world_parameters.loaded,
+})
+"""
+
+def probe_import():
+    """
+    Imports swarm in a fresh interpreter and returns the seconds it took,
+    the modules that were imported and whether the parameters were loaded.
+    """
+    output = subprocess.check_output([sys.executable, '-c', PROBE], cwd=ROOT)
+    return json.loads(output.strip().splitlines()[-1])
+
+##########################################################################
+## Startup Test Cases
+##########################################################################
+
+class StartupTests(unittest.TestCase):
+
+    def test_import_budget(self):
+        """
+        Assert importing swarm is fast and doesn't import PyGame
+        """
+        probe = probe_import()
+        self.assertLess(probe['elapsed'], IMPORT_BUDGET)
+        self.assertNotIn('pygame', probe['modules'])
+
+    def test_import_parameters(self):
+        """
+        Assert importing swarm neither loads the parameters nor PyYAML
+        """
+        probe = probe_import()
+        self.assertFalse(probe['loaded'])
+        self.assertNotIn('yaml', probe['modules'])
+
+    def test_lazy_configuration(self):
+        """
+        Test a lazy configuration is only loaded when it is accessed
+        """
+        config = LazyConfiguration(AllyParameters)
+        self.assertFalse(config.loaded)
+
+        self.assertNotIsInstance(config, Configuration)
+        self.assertIs(plain({'params': config})['params'], config)
+        self.assertFalse(config.loaded)
+
+        self.assertIsInstance(resolve(config), AllyParameters)
+        self.assertTrue(config.loaded)
+        self.assertIs(config.setup(), resolve(config))
+
+    def test_world_resolves(self):
+        """
+        Assert worlds are given the configurations lazy ones stand in for
+        """
+        allies = LazyConfiguration(AllyParameters)
+        world  = World(world_params=world_parameters, ally_params=allies)
+        self.assertIs(world.world_params, world_parameters.setup())
+        self.assertIs(world.ally_params, allies.setup())
+        self.assertIsInstance(world.ally_params, AllyParameters)
+
+    def test_lazy_forwarding(self):
+        """
+        Check attributes are read from and written to the loaded configuration
+        """
+        config = LazyConfiguration(SimulationParameters)
+        self.assertEqual(config.get('team_size'), config.setup().team_size)
+
+        config.maximum_time = 42
+        self.assertEqual(config.setup().maximum_time, 42)
+        self.assertEqual(config.maximum_time, 42)
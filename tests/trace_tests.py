@@ -0,0 +1,131 @@
+# tests.trace_tests
+# Tests for the structured traces of the world
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 20:12:45 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: trace_tests.py [] benjamin@bengfort.com $
+
+"""
+Tests for the structured traces of the world
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import os
+import unittest
+import tempfile
+import numpy as np
+
+from swarm.trace import *
+from swarm.world import World
+from swarm.exceptions import *
+
+##########################################################################
+## Helpers
+##########################################################################
+
+def traced(engine='reference', steps=150, **kwargs):
+    """
+    Returns a trace of a seeded world advanced by a number of steps.
+    """
+    world = World(engine=engine, seed=5)
+    trace = world.start_trace(**kwargs)
+    for tick in xrange(steps):
+        world.update()
+    return trace
+
+def record(tick, agent):
+    """
+    Returns a single record of a tick and agent.
+    """
+    records = np.zeros(1, dtype=RECORD)
+    records['tick']  = tick
+    records['agent'] = agent
+    return records
+
+##########################################################################
+## Trace Test Cases
+##########################################################################
+
+class TraceTests(unittest.TestCase):
+
+    def test_disabled(self):
+        """
+        Assert worlds are only traced when debugging or asked to
+        """
+        world = World(debug=False)
+        self.assertIsNone(world.trace)
+        world.update()
+
+        world = World(debug=True)
+        self.assertTrue(world.trace.diffs)
+        world.update()
+        self.assertEqual(len(world.trace), len(world.dynamic))
+        self.assertEqual(set(world.trace.records()['event']), set([EVENTS.index(DIFF)]))
+
+    def test_engines(self):
+        """
+        Check that both engines trace the same events
+        """
+        events = [list(traced(engine).events()) for engine in ('reference', 'array')]
+        self.assertGreater(len(events[0]), 0)
+        self.assertEqual(events[0], events[1])
+
+        for event in events[0]:
+            if event.event == MINE:
+                self.assertTrue(event.loaded)
+                self.assertTrue(event.resource.startswith('mineral'))
+            if event.event == TRANSITION:
+                self.assertNotEqual(event.before, event.after)
+
+    def test_filters(self):
+        """
+        Test recording and querying some agents within a range of ticks
+        """
+        trace = traced(steps=30, agents=['ally01', 'enemy03'], ticks=(10, 20), diffs=True)
+        events = list(trace.events())
+        self.assertEqual(set(event.agent for event in events), set(['ally01', 'enemy03']))
+        self.assertEqual(set(event.tick for event in events), set(xrange(10, 20)))
+        self.assertEqual(len(events[0].pos), 2)
+
+        records = trace.records(agents=['ally01'], ticks=(12, 14), events=[DIFF])
+        self.assertEqual(list(records['tick']), [12, 13])
+        self.assertEqual(len(trace.records(events=[STUN])), 0)
+
+    def test_ring_buffer(self):
+        """
+        Assert the ring buffer keeps the most recent records in order
+        """
+        trace = Trace(capacity=4)
+        for tick in xrange(6):
+            trace.append(record(tick, 0))
+        self.assertEqual(len(trace), 4)
+        self.assertEqual(trace.dropped, 2)
+        self.assertEqual(list(trace.records()['tick']), [2, 3, 4, 5])
+
+        trace.append(np.concatenate([record(tick, 0) for tick in xrange(6, 12)]))
+        self.assertEqual(list(trace.records()['tick']), [8, 9, 10, 11])
+
+        with self.assertRaises(ImproperlyConfigured):
+            Trace(capacity=0)
+
+    def test_binary_roundtrip(self):
+        """
+        Check that traces survive being written out as binary
+        """
+        trace = traced(steps=20, diffs=True, capacity=500)
+        path  = tempfile.mktemp(suffix='.npz')
+        try:
+            trace.dump_file(path)
+            loaded = Trace.load_file(path)
+        finally:
+            if os.path.exists(path): os.remove(path)
+
+        self.assertEqual(len(loaded), len(trace))
+        self.assertEqual(list(loaded.events()), list(trace.events()))
@@ -222,3 +222,157 @@ class VectorsTests(unittest.TestCase):
         B = A.copy()
         self.assertIsNot(A,B)
         self.assertEqual(A,B)
+
+##########################################################################
+## Vec2 Test Case
+##########################################################################
+
+class Vec2Tests(unittest.TestCase):
+
+    def test_constructors(self):
+        """
+        Test the constructors of Vec2 return float coordinates
+        """
+        for vec in (Vec2.arr(np.array([10, 4])), Vec2.arrp(10, 4), Vec2.arr(Vector.arrp(10, 4))):
+            self.assertTrue(isinstance(vec, Vec2))
+            self.assertTrue(isinstance(vec.x, float))
+            self.assertEqual((vec.x, vec.y), (10.0, 4.0))
+
+        self.assertEqual(tuple(Vec2.zero()), (0.0, 0.0))
+        vec = Vec2.rand(6, 12)
+        self.assertTrue(6 <= vec.x < 12 and 6 <= vec.y < 12)
+        self.assertFalse(hasattr(vec, '__dict__'))
+
+    def test_same_as_vector(self):
+        """
+        Compare every computation of Vec2 with that of Vector
+        """
+        points = ((10, 0), (0, 10), (10, 10), (-10, -10), (23, 7), (0, 0), (3.5, -1.25))
+        for a in points:
+            va, sa = Vector.arrp(*a), Vec2.arrp(*a)
+            self.assertEqual(tuple(va.unit), tuple(sa.unit))
+            self.assertEqual(va.length, sa.length)
+            self.assertEqual(va.length2, sa.length2)
+            self.assertEqual(sa.copy(), va)
+            if va.length > 0:
+                self.assertEqual(tuple(va.orthogonal), tuple(sa.orthogonal))
+
+            for b in points:
+                vb, sb = Vector.arrp(*b), Vec2.arrp(*b)
+                self.assertAlmostEqual(va.angle(vb), sa.angle(sb))
+                self.assertAlmostEqual(va.distance(vb), sa.distance(sb))
+                self.assertEqual(va.distance2(vb), sa.distance2(sb))
+                self.assertEqual(tuple(va + vb), tuple(sa + sb))
+                self.assertEqual(tuple(va - vb), tuple(sa - sb))
+                self.assertEqual(va == vb, sa == sb)
+
+    def test_arithmetic(self):
+        """
+        Test the arithmetic of Vec2 with scalars, arrays and NumPy
+        """
+        vec = Vec2(3, 4)
+        self.assertEqual(tuple(2 * vec), (6.0, 8.0))
+        self.assertEqual(tuple(vec * 0.5), (1.5, 2.0))
+        self.assertEqual(tuple(vec / 2), (1.5, 2.0))
+        self.assertEqual(tuple(-vec), (-3.0, -4.0))
+        self.assertEqual(tuple(vec + np.array([1, 1])), (4.0, 5.0))
+        self.assertEqual(vec.dot((1, 2)), 11.0)
+
+        self.assertTrue(np.array_equal(np.average([vec, Vec2(1, 0)], axis=0), [2.0, 2.0]))
+        self.assertEqual(np.cross(vec, Vec2(0, 1)), 3.0)
+        self.assertTrue(np.array_equal(np.array([vec, vec], dtype=float), [[3, 4], [3, 4]]))
+
+    def test_world_vectors(self):
+        """
+        Assert the world gives its particles the selected vector class
+        """
+        from swarm.world import World
+        world = World(vectors='slots')
+        for agent in world.agents:
+            self.assertTrue(isinstance(agent.pos, Vec2))
+            self.assertTrue(isinstance(agent.vel, Vec2))
+
+        reference = World(vectors='ndarray', seed=3)
+        slots     = World(vectors='slots', seed=3)
+        for tick in xrange(20):
+            reference.update()
+            slots.update()
+        self.assertEqual([tuple(agent.pos) for agent in reference.agents],
+                         [tuple(agent.pos) for agent in slots.agents])
+
+##########################################################################
+## VectorArray Test Case
+##########################################################################
+
+class VectorArrayTests(unittest.TestCase):
+
+    def setUp(self):
+        self.points = np.array([
+            (10, 0), (0, 10), (10, 10), (-10, -10), (23, 7), (0, 0), (3.5, -1.25),
+            (0.1, 0.3), (-0.1, -0.3),
+        ], dtype=float)
+        self.vectors = VectorArray.arr(self.points)
+
+    def test_arr(self):
+        """
+        Test construction of a vector array without a copy
+        """
+        self.assertTrue(isinstance(self.vectors, VectorArray))
+        self.assertEqual(self.vectors.shape, (9, 2))
+        self.assertTrue(np.shares_memory(self.vectors, self.points))
+        self.assertEqual(VectorArray.zeros(3).shape, (3, 2))
+        self.assertTrue(np.array_equal(self.vectors.x, self.points[:, 0]))
+        self.assertFalse(isinstance(self.vectors.length, VectorArray))
+
+    def test_same_as_vector(self):
+        """
+        Compare every batched computation with that of Vector per row
+        """
+        vectors = self.vectors
+        for idx, point in enumerate(self.points):
+            vec = Vector.arr(point.copy())
+            self.assertEqual(vec.length, vectors.length[idx])
+            self.assertEqual(vec.length2, vectors.length2[idx])
+            self.assertTrue(np.array_equal(vec.unit, vectors.unit[idx]))
+            if vec.length > 0:
+                self.assertTrue(np.array_equal(vec.orthogonal, vectors.orthogonal[idx]))
+
+            other  = Vector.arrp(3, -4)
+            angles = vectors.angle(other)
+            self.assertAlmostEqual(vec.angle(other), angles[idx])
+            self.assertEqual(vec.distance2(other), vectors.distance2(other)[idx])
+            self.assertAlmostEqual(vec.distance(other), vectors.distance(other)[idx])
+
+    def test_angle_rounding(self):
+        """
+        Test the angle of (anti)parallel vectors whose dot product rounds
+        out of the range of arccos, like Vector.angle
+        """
+        vectors = VectorArray.arr([(0.1, 0.3), (0.1, 0.3), (0.0, 0.0)])
+        others  = VectorArray.arr([(0.1, 0.3), (-0.1, -0.3), (1.0, 0.0)])
+        angles  = vectors.angle(others)
+        self.assertFalse(np.isnan(angles).any())
+        for idx in xrange(3):
+            expected = Vector.arr(vectors[idx].view(np.ndarray)).angle(Vector.arr(others[idx].view(np.ndarray)))
+            self.assertAlmostEqual(angles[idx], expected)
+
+        self.assertAlmostEqual(VectorArray.arr([(1, 0)]).angle([(0, 1)], degrees=False)[0], np.pi / 2)
+
+    def test_relative_to(self):
+        """
+        Assert periodic images are the nearest to the point
+        """
+        size   = (1000, 1000)
+        points = VectorArray.arr([(10, 10), (990, 500), (500, 500), (400, 980)])
+        images = points.relative_to((950, 20), size)
+        expected = [(1010, 10), (990, 500), (500, 500), (1400, -20)]
+        self.assertTrue(np.array_equal(images, expected))
+
+    def test_polar(self):
+        """
+        Test the polar constructor and the headings of the vectors
+        """
+        theta  = np.array([0, np.pi / 2, np.pi])
+        points = VectorArray.polar(np.array([1.0, 2.0, 3.0]), theta, (10, 10))
+        self.assertTrue(np.allclose(points, [(11, 10), (10, 12), (7, 10)]))
+        self.assertTrue(np.allclose((points - (10, 10)).view(VectorArray).heading, theta))
@@ -18,8 +18,11 @@ Integration testing for the simulated world
 ##########################################################################
 
 import unittest
+import numpy as np
 
 from swarm.world import *
+from swarm.pool import WorldPool
+from swarm.engine import STATES
 from swarm.params import world_parameters as parameters
 
 ##########################################################################
@@ -67,3 +70,268 @@ class WorldTests(unittest.TestCase):
         self.assertEqual(world.time, 0)
 
         old_state = []
+
+    def test_terminal_world(self):
+        """
+        Assert the world is only final once no stash can change
+        """
+        for engine in ('reference', 'array'):
+            world = World(engine=engine)
+            self.assertFalse(world.terminal())
+            self.assertIsNone(world.final_time)
+
+            for depot in world.resources:
+                while depot.mine(): pass
+            self.assertTrue(world.terminal())
+
+            # Either team can still raid the home of the other
+            world.enemy_home.drop()
+            self.assertFalse(world.terminal())
+
+    def test_final_time(self):
+        """
+        Check that the world finishes when the outcome is final
+        """
+        for engine in ('reference', 'array'):
+            world = World(engine=engine)
+            for depot in world.resources:
+                while depot.mine(): pass
+
+            world.update()
+            self.assertEqual(world.final_time, 1)
+            self.assertTrue(world.finished)
+
+            world = World(engine=engine, maximum_time=3)
+            while not world.finished:
+                world.update()
+            self.assertEqual(world.time, 3)
+            self.assertIsNone(world.final_time)
+
+    def test_reset(self):
+        """
+        Assert a reset world starts exactly like a new world
+        """
+        for engine in ('reference', 'array'):
+            world = World(engine=engine, seed=7)
+            for tick in xrange(30):
+                world.update()
+
+            world.reset(seed=11, maximum_time=50)
+            fresh = World(engine=engine, seed=11)
+            self.assertEqual(world.time, 0)
+            self.assertEqual(world.iterations, 50)
+            self.assertEqual(world.status(), fresh.status())
+            for agent, other in zip(world.agents, fresh.agents):
+                self.assertEqual(tuple(agent.pos), tuple(other.pos))
+                self.assertEqual(tuple(agent.vel), tuple(other.vel))
+                self.assertEqual((agent.state, agent.target, agent.loaded), (other.state, None, False))
+
+            for tick in xrange(30):
+                world.update()
+                fresh.update()
+            self.assertEqual(world.status(), fresh.status())
+
+    def test_reset_params(self):
+        """
+        Check that resetting with new params configures the allies
+        """
+        for engine in ('reference', 'array'):
+            world  = World(engine=engine)
+            params = AllyParameters.load_file('conf/best.yaml')
+            world.reset(params=params)
+            self.assertIs(world.ally_params, params)
+            self.assertEqual(
+                [agent.params is params for agent in world.dynamic],
+                [agent.team == 'ally' for agent in world.dynamic]
+            )
+
+    def test_isolated_params(self):
+        """
+        Assert worlds with different settings run side by side
+        """
+        for engine in ('reference', 'array'):
+            enemies = SimulationParameters()
+            slow = World(engine=engine, maximum_velocity=3, team_size=10, enemy_params=enemies)
+            fast = World(engine=engine, team_size=12)
+            self.assertIs(fast.world_params, parameters.setup())
+
+            for tick in xrange(10):
+                slow.update()
+                fast.update()
+
+            speeds = lambda world: [tuple(agent.vel) for agent in world.agents if agent.team in ('ally', 'enemy')]
+            self.assertEqual(len(speeds(slow)), 20)
+            self.assertTrue(all(x*x + y*y <= 9 + 1e-9 for x, y in speeds(slow)))
+            self.assertTrue(any(x*x + y*y > 9 for x, y in speeds(fast)))
+            self.assertEqual(parameters.get('maximum_velocity'), 12)
+
+            if engine == 'reference':
+                self.assertEqual(
+                    [agent.params is enemies for agent in slow.dynamic],
+                    [agent.team == 'enemy' for agent in slow.dynamic]
+                )
+                self.assertFalse(any(agent.params is enemies for agent in fast.dynamic))
+
+    def test_fork_settings(self):
+        """
+        Check that forks keep the settings and params of their world
+        """
+        world = World(maximum_velocity=4, team_size=5, enemy_params=SimulationParameters())
+        fork  = world.fork()
+        for name in ('maximum_velocity', 'team_size', 'debug', 'world_params', 'enemy_params'):
+            self.assertIs(getattr(fork, name), getattr(world, name))
+
+    def test_guard_counts(self):
+        """
+        Assert the guard counts are kept up to date as agents guard
+        """
+        params = AllyParameters.load_file('conf/params.yaml')
+        params.depo_guard_threshold = 2
+        params.home_guard_threshold = 3
+
+        for engine in ('reference', 'array'):
+            world   = World(engine=engine, seed=5, ally_params=params)
+            guarded = 0
+            for tick in xrange(300):
+                world.update()
+                if tick == 200:
+                    snapshot = world.checkpoint()
+                if tick == 250:
+                    world.restore(snapshot)
+                self.assertEqual(guard_counts(world), recount_guards(world))
+                guarded = max(guarded, sum(recount_guards(world).values()))
+            self.assertGreater(guarded, 0)
+
+    def test_guard_thresholds(self):
+        """
+        Assert agents don't guard targets that already have enough guards
+        """
+        params = AllyParameters.load_file('conf/params.yaml')
+        params.depo_guard_threshold = 2
+        params.home_guard_threshold = 2
+
+        for engine in ('reference', 'array'):
+            world = World(engine=engine, seed=5, ally_params=params)
+            start = world.checkpoint()
+            resources = list(start.resources)
+
+            for state, target in ((SEEKING, 'mineral 6'), (CARAVAN, 'ally_home')):
+                slot = resources.index(target)
+
+                # The arriving agent guards only once one of the guards left
+                for guards, expected in ((2, False), (1, True)):
+                    world.restore(arriving(start, state, slot, guards))
+                    world.update()
+                    self.assertEqual([agent.state for agent in world.agents[:guards]], [GUARDING] * guards)
+                    self.assertEqual(world.agents[guards].state == GUARDING, expected)
+
+    def test_guard_reach(self):
+        """
+        Assert guards stay within the guard radius of their target
+        """
+        params = AllyParameters.load_file('conf/best.yaml')
+        world  = World(engine='array', seed=5, ally_params=params)
+        size   = np.asarray(world.size, dtype=float)
+
+        guarded = 0
+        for tick in xrange(1500):
+            world.update()
+            for agent in world.agents:
+                if agent.team in ('ally', 'enemy') and agent.state == GUARDING:
+                    delta  = np.asarray(agent.target.pos, dtype=float) - np.asarray(agent.pos, dtype=float)
+                    delta -= size * np.round(delta / size)
+                    self.assertLess(np.hypot(*delta), 200)
+                    guarded += 1
+        self.assertGreater(guarded, 0)
+
+
+##########################################################################
+## World Pool Test Case
+##########################################################################
+
+class WorldPoolTests(unittest.TestCase):
+
+    def test_reuse(self):
+        """
+        Test that released worlds of the same shape are reused
+        """
+        pool  = WorldPool()
+        world = pool.acquire(seed=3)
+        world.update()
+        pool.release(world)
+        self.assertEqual(len(pool), 1)
+
+        self.assertIsNot(pool.acquire(world_size=2000), world)
+        self.assertIs(pool.acquire(seed=3, maximum_time=20), world)
+        self.assertEqual(len(pool), 0)
+        self.assertEqual(world.time, 0)
+        self.assertEqual(world.iterations, 20)
+
+    def test_settings(self):
+        """
+        Assert worlds are only reused by acquires with the same settings
+        """
+        pool  = WorldPool()
+        world = World(engine='array', maximum_velocity=3.0)
+        pool.release(world)
+
+        fresh = pool.acquire(None, engine='array')
+        self.assertIsNot(fresh, world)
+        self.assertEqual(fresh.maximum_velocity, parameters.get('maximum_velocity'))
+        self.assertIsNot(pool.acquire(None, engine='array', maximum_velocity=3.0, stash_size=40), world)
+        self.assertIsNot(pool.acquire(None, engine='array', maximum_velocity=3.0, enemy_params=SimulationParameters()), world)
+        self.assertIs(pool.acquire(None, engine='array', maximum_velocity=3.0), world)
+        self.assertEqual(len(pool), 0)
+
+##########################################################################
+## Helpers
+##########################################################################
+
+def guard_counts(world):
+    """
+    The non-zero guard counts of a world with either engine by team and the
+    slot (or the index in the array engine) of the resource
+    """
+    if world.arrays is None:
+        return dict((key, count) for key, count in world.guards.items() if count)
+    engine = world.arrays
+    return dict(
+        ((engine.teams[team], slot), engine.guards[team, slot])
+        for team, slot in zip(*engine.guards.nonzero())
+    )
+
+def recount_guards(world):
+    """
+    Counts the guards of a world from the states of its agents
+    """
+    counts = {}
+    for agent in world.agents:
+        if agent.team in ('ally', 'enemy') and agent.state == GUARDING:
+            key = (agent.team, agent.target.slot if world.arrays is None else agent.target.index)
+            counts[key] = counts.get(key, 0) + 1
+    return counts
+
+def arriving(snapshot, state, target, guards):
+    """
+    Returns a copy of the snapshot in which the first allies guard the
+    target and the next ally arrives at it, either seeking the target (the
+    only resource it remembers) or as a loaded caravan.
+    """
+    pos, states, targets = snapshot.pos.copy(), snapshot.state.copy(), snapshot.target.copy()
+    memory, loaded, stash = snapshot.memory.copy(), snapshot.loaded.copy(), snapshot.stash.copy()
+
+    for idx in xrange(guards + 1):
+        pos[idx] = snapshot.rpos[target] + (2 * idx, 2)
+        targets[idx] = target
+    states[:guards] = STATES.index(GUARDING)
+    states[guards]  = STATES.index(state)
+    loaded[:guards] = False
+    loaded[guards]  = state == CARAVAN
+    memory[:guards+1] = 0
+    if state == SEEKING:
+        memory[guards, target] = 1
+    stash[target] = max(stash[target], 5)
+
+    return snapshot.replace(
+        pos=pos, state=states, target=targets, memory=memory, loaded=loaded, stash=stash
+    )